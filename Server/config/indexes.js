@@ -14,7 +14,8 @@ export const createIndexes = async () => {
     const realMatchesCollection = db.collection('real_matches');
     
     // Single field indexes for frequent queries
-    await realMatchesCollection.createIndex({ 'fixture.id': 1 }, { background: true });
+    // Unique: concurrent upserts keyed on fixture.id must not create duplicate fixtures
+    await realMatchesCollection.createIndex({ 'fixture.id': 1 }, { background: true, unique: true });
     await realMatchesCollection.createIndex({ 'fixture.timestamp': 1 }, { background: true });
     await realMatchesCollection.createIndex({ 'fixture.status.short': 1 }, { background: true });
     await realMatchesCollection.createIndex({ 'league.id': 1 }, { background: true });
@@ -187,7 +188,7 @@ export const ensureIndexes = async () => {
     
     // Create real_matches indexes
     const realMatchesIndexes = [
-      { key: { 'fixture.id': 1 } },
+      { key: { 'fixture.id': 1 }, unique: true },
       { key: { 'fixture.timestamp': 1 } },
       { key: { 'fixture.status.short': 1 } },
       { key: { 'league.id': 1 } },
@@ -218,7 +219,8 @@ export const ensureIndexes = async () => {
       if (!indexExists(existingRealMatchesIndexes, keyString)) {
         await realMatchesCollection.createIndex(idxSpec.key, { 
           background: true, 
-          sparse: idxSpec.sparse || false 
+          sparse: idxSpec.sparse || false,
+          unique: idxSpec.unique || false
         });
         console.log(`  Created index: real_matches.${keyString}`);
       }
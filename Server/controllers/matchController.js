@@ -33,6 +33,7 @@ import {
   mergeWatchedCountIntoDocuments,
 } from '../services/watchedMatchCounts.js';
 import { getMatchEngagementByFixtureId } from '../services/matchEngagementAggregate.js';
+import { applyWatchedMatchToUserStats } from '../services/userStats.js';
 
 // Get matches
 const getMatches = async (req, res) => {
@@ -120,6 +121,7 @@ const createMatch = async (req, res) => {
 
     let result = await db.collection('matches').insertOne(match);
     console.log("Match inserted for fixture " + match.fixture.id);
+    await applyWatchedMatchToUserStats(match, 1);
     
     // Log the match creation to RabbitMQ
     await logMatchCreated(username, { ...match, _id: result.insertedId }, req);
@@ -153,8 +155,11 @@ const deleteMatch = async (req, res) => {
       return res.status(401).json({ message: "Not authorized" });
     }
 
-    await db.collection('matches').deleteOne(filter);
+    const deleted = await db.collection('matches').deleteOne(filter);
     console.log("Match deleted with id " + fixtureId + " and username " + username);
+    if (deleted.deletedCount === 1) {
+      await applyWatchedMatchToUserStats(validatedResult, -1);
+    }
     
     // Log the match deletion to RabbitMQ
     await logMatchDeleted(username, validatedResult, req);
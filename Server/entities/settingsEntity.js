@@ -2,7 +2,8 @@ import { z } from 'zod';
 
 const playersApiInfoSettingSchema = z.object({
   type: z.literal('PLAYERS_API_INFO'),
-  pages_searched: z.array(z.number().int()),
+  pages_searched_ranges: z.array(z.tuple([z.number().int(), z.number().int()])).default([]),
+  pages_searched_count: z.number().int().default(0),
   total_pages: z.number().int(),
   last_update: z.date().nullable()
 });
@@ -19,7 +20,8 @@ const landingMatchPayloadSchema = z.object({
 
 const defaultPlayersApiInfoSetting = () => playersApiInfoSettingSchema.parse({
   type: 'PLAYERS_API_INFO',
-  pages_searched: [],
+  pages_searched_ranges: [],
+  pages_searched_count: 0,
   total_pages: 0,
   last_update: null
 });
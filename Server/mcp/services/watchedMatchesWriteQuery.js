@@ -5,6 +5,7 @@ import {
   parseMatch,
 } from '../../entities/matchEntity.js';
 import { logMatchCreated, logMatchDeleted } from '../../controllers/logController.js';
+import { applyWatchedMatchToUserStats } from '../../services/userStats.js';
 import {
   searchRealMatchesByNames,
   searchWatchedMatchesByNames,
@@ -192,6 +193,7 @@ export async function markWatchedMatchesByNames({
       const result = await db.collection('matches').insertOne(match);
       inserted += 1;
       fixtureIdsTouched.push(body.fixture.id);
+      await applyWatchedMatchToUserStats(match, 1);
       await logMatchCreated(
         username,
         { ...match, _id: result.insertedId },
@@ -300,6 +302,7 @@ export async function unmarkWatchedMatchesByNames({
       if (del.deletedCount === 1) {
         deleted += 1;
         fixtureIdsTouched.push(validated.fixture.id);
+        await applyWatchedMatchToUserStats(validated, -1);
         await logMatchDeleted(username, validated, MCP_LOG_REQ);
       }
     } catch (e) {
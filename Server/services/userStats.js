@@ -0,0 +1,68 @@
+import { getDB } from '../config/db.js';
+
+/**
+ * Incremental maintenance of the materialised `user_stats` document of a user
+ * (`_id` = username), read by the Stats `/user-general-stats/` and `/leagues-viewed/` endpoints.
+ *
+ * The schema is defined by Stats (Stats/api/user_stats.py, build_user_stats); the counters
+ * built here must match it exactly. Adding a match increments them and removing it
+ * decrements them. Documents that do not exist
+ * yet are not created here: Stats builds them from `matches` on the first read.
+ */
+export const USER_STATS_COLLECTION = 'user_stats';
+
+const hasScore = (match) => match?.goals?.home != null && match?.goals?.away != null;
+
+/**
+ * $inc/$set update adding (sign 1) or removing (sign -1) a match from the counters,
+ * or null when the match has no score yet and so does not count.
+ */
+export const buildUserStatsUpdate = (match, sign) => {
+  if (!hasScore(match)) {
+    return null;
+  }
+  const home = match.teams.home;
+  const away = match.teams.away;
+  const day = new Date(match.fixture.timestamp * 1000).toISOString().slice(0, 10);
+
+  const update = {
+    $inc: {
+      total_matches: sign,
+      total_goals: sign * (match.goals.home + match.goals.away),
+      [`seasons.${match.league.season}`]: sign,
+      [`days.${day}`]: sign,
+      [`teams.${home.id}.matches`]: sign,
+      [`teams.${home.id}.goals`]: sign * match.goals.home,
+      [`teams.${away.id}.matches`]: sign,
+      [`teams.${away.id}.goals`]: sign * match.goals.away,
+      [`leagues.${match.league.id}.matches`]: sign,
+    },
+    $currentDate: { updated_at: true },
+  };
+  if (sign > 0) {
+    update.$set = {
+      [`teams.${home.id}.name`]: home.name,
+      [`teams.${away.id}.name`]: away.name,
+      [`leagues.${match.league.id}.name`]: match.league.name,
+    };
+  }
+  return update;
+};
+
+/**
+ * Apply a watched match added (sign 1) or removed (sign -1) to the user's stats document.
+ * Failures are logged and never fail the match write itself.
+ */
+export async function applyWatchedMatchToUserStats(match, sign) {
+  const update = buildUserStatsUpdate(match, sign);
+  if (!update) {
+    return;
+  }
+  try {
+    await getDB()
+      .collection(USER_STATS_COLLECTION)
+      .updateOne({ _id: match.user.username }, update);
+  } catch (error) {
+    console.error(`Error updating user_stats of ${match.user.username}: ${error.message}`);
+  }
+}
@@ -0,0 +1,152 @@
+"""
+Columnar loading of watched matches (collection `matches`) for the stats views.
+
+Only the fields the stats use are fetched, and they are flattened straight into typed
+columns instead of a DataFrame of nested dicts:
+- int64: fixture_id, home_id, away_id, home_goals, away_goals, league_id, season, timestamp
+- text: home_name, away_name, league_name
+- with details=True also: _id, league_round, location, status (needed to return whole matches)
+
+team_totals aggregates such a frame into per-team results and goals.
+"""
+import numpy as np
+import pandas as pd
+
+INT_COLUMNS = ['fixture_id', 'home_id', 'away_id', 'home_goals', 'away_goals', 'league_id', 'season', 'timestamp']
+TEXT_COLUMNS = ['home_name', 'away_name', 'league_name']
+DETAIL_COLUMNS = ['_id', 'league_round', 'location', 'status']
+
+MATCH_PROJECTION = {
+    'fixture.id': 1,
+    'fixture.timestamp': 1,
+    'league.id': 1,
+    'league.name': 1,
+    'league.season': 1,
+    'teams.home.id': 1,
+    'teams.home.name': 1,
+    'teams.away.id': 1,
+    'teams.away.name': 1,
+    'goals.home': 1,
+    'goals.away': 1,
+}
+
+MATCH_DETAIL_PROJECTION = {
+    **MATCH_PROJECTION,
+    'league.round': 1,
+    'location': 1,
+    'status': 1,
+}
+
+
+def load_matches_frame(collection, query, details=False):
+    """Run query on the matches collection and return the projected matches as a flat DataFrame"""
+    projection = MATCH_DETAIL_PROJECTION if details else MATCH_PROJECTION
+    columns = INT_COLUMNS + TEXT_COLUMNS + (DETAIL_COLUMNS if details else [])
+    values = {column: [] for column in columns}
+
+    for match in collection.find(query, projection):
+        fixture = match.get('fixture') or {}
+        league = match.get('league') or {}
+        teams = match.get('teams') or {}
+        home = teams.get('home') or {}
+        away = teams.get('away') or {}
+        goals = match.get('goals') or {}
+
+        values['fixture_id'].append(fixture.get('id') or 0)
+        values['home_id'].append(home.get('id') or 0)
+        values['away_id'].append(away.get('id') or 0)
+        values['home_goals'].append(goals.get('home') or 0)
+        values['away_goals'].append(goals.get('away') or 0)
+        values['league_id'].append(league.get('id') or 0)
+        values['season'].append(league.get('season') or 0)
+        values['timestamp'].append(fixture.get('timestamp') or 0)
+        values['home_name'].append(home.get('name'))
+        values['away_name'].append(away.get('name'))
+        values['league_name'].append(league.get('name'))
+        if details:
+            values['_id'].append(str(match.get('_id', '')))
+            values['league_round'].append(league.get('round'))
+            values['location'].append(match.get('location', ''))
+            values['status'].append(match.get('status', ''))
+
+    frame = {column: np.asarray(values[column], dtype=np.int64) for column in INT_COLUMNS}
+    frame.update({column: values[column] for column in columns if column not in frame})
+    return pd.DataFrame(frame, columns=columns)
+
+
+def match_row_to_response(row):
+    """Nested match shape returned to the WebApp, from a row loaded with details=True"""
+    return {
+        '_id': row['_id'],
+        'fixture': {
+            'id': int(row['fixture_id']),
+            'timestamp': int(row['timestamp'])
+        },
+        'league': {
+            'id': int(row['league_id']),
+            'name': row['league_name'],
+            'round': row['league_round'],
+            'season': int(row['season'])
+        },
+        'teams': {
+            'home': {
+                'id': int(row['home_id']),
+                'name': row['home_name']
+            },
+            'away': {
+                'id': int(row['away_id']),
+                'name': row['away_name']
+            }
+        },
+        'goals': {
+            'home': int(row['home_goals']),
+            'away': int(row['away_goals'])
+        },
+        'location': row['location'],
+        'status': row['status']
+    }
+
+
+def team_totals(matches_df):
+    """Per-team totals over a matches frame: one row per team (index team_id, in order of first
+    appearance) with team_name, matches, wins, draws, losses, goals_for and goals_against.
+
+    Home and away sides are interleaved into one array per column and aggregated in a single
+    groupby, instead of walking the matches in Python.
+    """
+    columns = ['team_name', 'matches', 'wins', 'draws', 'losses', 'goals_for', 'goals_against']
+    if matches_df.empty:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name='team_id', dtype=np.int64))
+
+    sides = len(matches_df) * 2
+    team_id = np.empty(sides, dtype=np.int64)
+    team_name = np.empty(sides, dtype=object)
+    goals_for = np.empty(sides, dtype=np.int64)
+    goals_against = np.empty(sides, dtype=np.int64)
+
+    team_id[0::2] = matches_df['home_id'].to_numpy()
+    team_id[1::2] = matches_df['away_id'].to_numpy()
+    team_name[0::2] = matches_df['home_name'].to_numpy(dtype=object)
+    team_name[1::2] = matches_df['away_name'].to_numpy(dtype=object)
+    goals_for[0::2] = matches_df['home_goals'].to_numpy()
+    goals_for[1::2] = matches_df['away_goals'].to_numpy()
+    goals_against[0::2] = matches_df['away_goals'].to_numpy()
+    goals_against[1::2] = matches_df['home_goals'].to_numpy()
+
+    return pd.DataFrame({
+        'team_id': team_id,
+        'team_name': team_name,
+        'wins': (goals_for > goals_against).astype(np.int64),
+        'draws': (goals_for == goals_against).astype(np.int64),
+        'losses': (goals_for < goals_against).astype(np.int64),
+        'goals_for': goals_for,
+        'goals_against': goals_against,
+    }).groupby('team_id', sort=False).agg(
+        team_name=('team_name', 'first'),
+        matches=('wins', 'size'),
+        wins=('wins', 'sum'),
+        draws=('draws', 'sum'),
+        losses=('losses', 'sum'),
+        goals_for=('goals_for', 'sum'),
+        goals_against=('goals_against', 'sum'),
+    )
@@ -0,0 +1,147 @@
+"""
+Player insights over a set of watched fixtures, shared by general-stats, favourite-team-stats
+and players-viewed.
+
+One aggregate fetches the lineups and the substitution, goal and card events of every fixture
+from real_matches, and one traversal accumulates, per player and per team they played for:
+- matches: appearances (startXI or came on as sub, see player_participation)
+- startXI_matches: appearances in the startXI
+- goals: goal events as scorer, excluding own goals and missed penalties
+- assists: goal events as assist
+- involved_matches: matches with an appearance, goal or assist (counts players without lineups)
+"""
+from django.conf import settings
+
+# Goal event details that do not count as a goal for the scorer
+NON_SCORING_GOAL_DETAILS = ('own goal', 'missed penalty')
+
+
+def fetch_real_matches(fixture_ids, statistics=False):
+    """Lineups and subst/goal/card events (and team statistics if asked) of the fixtures"""
+    project = {
+        'fixture.id': 1,
+        'lineups': 1,
+        'events': {
+            '$filter': {
+                'input': {'$ifNull': ['$events', []]},
+                'as': 'event',
+                'cond': {'$in': [{'$toLower': '$$event.type'}, ['subst', 'goal', 'card']]}
+            }
+        }
+    }
+    if statistics:
+        project['statistics'] = 1
+
+    collection_real_matches = settings.MONGO_DB['real_matches']
+    return list(collection_real_matches.aggregate([
+        {'$match': {'fixture.id': {'$in': fixture_ids}}},
+        {'$project': project}
+    ]))
+
+
+class PlayerInsights:
+    """Per-player, per-team counters of the watched fixtures (see module docstring)"""
+
+    def __init__(self, real_matches):
+        self.real_matches = real_matches
+        # player_id -> {'name': str, 'teams': {team_id: counters}}
+        self.players = {}
+        for real_match in real_matches:
+            self._add_match(real_match)
+
+    @classmethod
+    def for_fixtures(cls, fixture_ids, statistics=False):
+        if not fixture_ids:
+            return cls([])
+        return cls(fetch_real_matches(fixture_ids, statistics=statistics))
+
+    def _team_counters(self, player_id, player_name, team_id, team_name):
+        player = self.players.setdefault(player_id, {'name': player_name, 'teams': {}})
+        counters = player['teams'].get(team_id)
+        if counters is None:
+            counters = player['teams'][team_id] = {
+                'team_id': team_id,
+                'team_name': team_name or f'Team {team_id}',
+                'matches': 0,
+                'startXI_matches': 0,
+                'goals': 0,
+                'assists': 0,
+                'involved_matches': 0,
+            }
+        elif team_name and counters['team_name'] == f'Team {team_id}':
+            counters['team_name'] = team_name
+        return counters
+
+    def _add_match(self, real_match):
+        # player_id -> (team_id, team_name, started)
+        appearances = {}
+        for lineup in real_match.get('lineups') or []:
+            team = lineup.get('team') or {}
+            for player_info in lineup.get('startXI') or []:
+                player = player_info.get('player') or {}
+                if player.get('id') and player.get('name'):
+                    self._team_counters(player['id'], player['name'], team.get('id'), team.get('name'))
+                    appearances[player['id']] = (team.get('id'), team.get('name'), True)
+
+        events = real_match.get('events') or []
+        for event in events:
+            if (event.get('type') or '').lower() != 'subst':
+                continue
+            # The player coming on is in event.assist
+            assist = event.get('assist') or {}
+            if assist.get('id') and assist.get('name') and assist['id'] not in appearances:
+                team = event.get('team') or {}
+                self._team_counters(assist['id'], assist['name'], team.get('id'), team.get('name'))
+                appearances[assist['id']] = (team.get('id'), team.get('name'), False)
+
+        involved = set()
+        for player_id, (team_id, team_name, started) in appearances.items():
+            counters = self.players[player_id]['teams'][team_id]
+            counters['matches'] += 1
+            if started:
+                counters['startXI_matches'] += 1
+            involved.add((player_id, team_id))
+
+        for event in events:
+            if (event.get('type') or '').lower() != 'goal':
+                continue
+            team = event.get('team') or {}
+            scorer = event.get('player') or {}
+            detail = (event.get('detail') or '').lower()
+            if scorer.get('id') and scorer.get('name') and detail not in NON_SCORING_GOAL_DETAILS:
+                self._team_counters(scorer['id'], scorer['name'], team.get('id'), team.get('name'))['goals'] += 1
+                involved.add((scorer['id'], team.get('id')))
+            assist = event.get('assist') or {}
+            if assist.get('id') and assist.get('name'):
+                self._team_counters(assist['id'], assist['name'], team.get('id'), team.get('name'))['assists'] += 1
+                involved.add((assist['id'], team.get('id')))
+
+        for player_id, team_id in involved:
+            self.players[player_id]['teams'][team_id]['involved_matches'] += 1
+
+    def totals(self, team_id=None, exclude_team_id=None):
+        """player_id -> counters summed over the player's teams (only team_id, or all but
+        exclude_team_id, when given) plus 'name' and the per-team counters in 'teams'"""
+        totals = {}
+        for player_id, player in self.players.items():
+            teams = [
+                counters for tid, counters in player['teams'].items()
+                if (team_id is None or tid == team_id) and (exclude_team_id is None or tid != exclude_team_id)
+            ]
+            if not teams:
+                continue
+            entry = {'name': player['name'], 'teams': teams}
+            for key in ('matches', 'startXI_matches', 'goals', 'assists', 'involved_matches'):
+                entry[key] = sum(counters[key] for counters in teams)
+            totals[player_id] = entry
+        return totals
+
+    def events(self, event_type, team_id=None):
+        """Fetched events of one type (lower-case), optionally only those of a team"""
+        for real_match in self.real_matches:
+            for event in real_match.get('events') or []:
+                if (event.get('type') or '').lower() != event_type:
+                    continue
+                if team_id is not None and (event.get('team') or {}).get('id') != team_id:
+                    continue
+                yield event
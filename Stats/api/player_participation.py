@@ -1,84 +1,35 @@
 """
-Shared helpers for player participation in real_matches (startXI or substitution).
-Aligned with Stats player_stats and MCP player_played_* logic.
-"""
-
-
-def find_player_team(real_match, player_id):
-    """
-    Returns (team_id, started, participated).
-    started=True if in startXI; participated=True if started or came on as sub (assist on subst).
-    """
-    lineups = real_match.get('lineups') or []
-    for lineup in lineups:
-        team = lineup.get('team') or {}
-        team_id = team.get('id')
-        for player_info in lineup.get('startXI') or []:
-            pid = (player_info.get('player') or {}).get('id')
-            if pid == player_id:
-                return team_id, True, True
-
-    for event in real_match.get('events') or []:
-        event_type = (event.get('type') or '').lower()
-        if event_type == 'subst':
-            assist = event.get('assist') or {}
-            if assist.get('id') == player_id:
-                team = event.get('team') or {}
-                return team.get('id'), False, True
-
-    return None, False, False
-
+Shared helpers for player participation (startXI or came on as substitute).
 
-def count_player_match_events(real_match, player_id):
-    """Goals (excl. own goal / missed penalty), assists, yellow cards, red cards."""
-    goals = 0
-    assists = 0
-    yellow_cards = 0
-    red_cards = 0
-
-    for event in real_match.get('events') or []:
-        event_type = (event.get('type') or '').lower()
-        detail = (event.get('detail') or '').lower()
-        event_player_id = (event.get('player') or {}).get('id')
-
-        if (
-            event_type == 'goal'
-            and event_player_id == player_id
-            and detail != 'own goal'
-            and detail != 'missed penalty'
-        ):
-            goals += 1
-
-        if event_type == 'goal':
-            assist = event.get('assist')
-            if assist and assist.get('id') == player_id:
-                assists += 1
+Participation is precomputed by the Updater in the `player_appearances` collection: one row per
+fixture and player who appeared, with fixture_id, player_id, player_name, team_id, team_name,
+is_home, opponent_id, opponent_name, league_id, season, timestamp, started, goals (excl. own
+goal / missed penalty), assists, yellow_cards and red_cards.
+"""
+from django.conf import settings
 
-        if event_type == 'card' and event_player_id == player_id:
-            if 'yellow' in detail:
-                yellow_cards += 1
-            elif 'red' in detail:
-                red_cards += 1
 
-    return goals, assists, yellow_cards, red_cards
+def find_player_appearances(query, sort=None):
+    """player_appearances rows matching query, optionally sorted"""
+    cursor = settings.MONGO_DB['player_appearances'].find(query, {'_id': 0})
+    if sort:
+        cursor = cursor.sort(sort)
+    return list(cursor)
 
 
-def player_participation_match_clause(player_id):
-    """Mongo $or clause: player in startXI or substitution (assist id)."""
+def appearance_player_stats(appearance):
+    """player_stats of a match row from a player_appearances row"""
     return {
-        '$or': [
-            {'lineups.startXI.player.id': player_id},
-            {
-                'events.type': {'$regex': 'subst', '$options': 'i'},
-                'events.assist.id': player_id,
-            },
-        ]
+        'started': bool(appearance.get('started')),
+        'goals': appearance.get('goals', 0),
+        'assists': appearance.get('assists', 0),
+        'yellow_cards': appearance.get('yellow_cards', 0),
+        'red_cards': appearance.get('red_cards', 0),
     }
 
 
-def build_match_row(real_match, player_id, started, watched, location=''):
+def build_match_row(real_match, appearance, watched, location=''):
     """Shape compatible with WebApp Match + player_stats (+ watched)."""
-    goals, assists, yellow_cards, red_cards = count_player_match_events(real_match, player_id)
     fixture = real_match.get('fixture') or {}
     league = real_match.get('league') or {}
     teams = real_match.get('teams') or {}
@@ -111,13 +62,7 @@ def build_match_row(real_match, player_id, started, watched, location=''):
         if isinstance(fixture.get('status'), dict)
         else (real_match.get('status') or ''),
         'watched': bool(watched),
-        'player_stats': {
-            'started': bool(started),
-            'goals': goals,
-            'assists': assists,
-            'yellow_cards': yellow_cards,
-            'red_cards': red_cards,
-        },
+        'player_stats': appearance_player_stats(appearance),
     }
 
 
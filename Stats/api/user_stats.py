@@ -0,0 +1,160 @@
+"""
+Materialised per-user stats (collection `user_stats`, `_id` = username) behind
+/user-general-stats/ and /leagues-viewed/.
+
+This module is the canonical definition of the user_stats schema, and build_user_stats the
+reference for what a document must hold. The Server (services/userStats.js,
+buildUserStatsUpdate) and the Updater (app/user_stats.py, _counters and build_user_stats)
+write the same counters by hand, so a change here must be made there too, followed by a
+rebuild_user_stats job. The document holds counters of the user's matches that have a score:
+- total_matches, total_goals
+- seasons.<season>: matches
+- days.<YYYY-MM-DD>: matches (UTC day of the fixture)
+- teams.<team_id>: {name, matches, goals}
+- leagues.<league_id>: {name, matches}
+
+The Server increments it when a user adds or removes a match and the Updater when it writes a
+new score, so reads cost one document lookup. A missing document is built from `matches` on
+the first read; the Updater rebuilds every document nightly to reconcile increments lost while
+one was being built. Counters that drop to 0 stay in the document and are skipped when reading.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from django.conf import settings
+
+from .match_frames import load_matches_frame
+
+USER_STATS_COLLECTION = 'user_stats'
+
+
+def _scored_matches_query(username):
+    return {
+        '$and': [
+            {'user.username': username},
+            {'goals.home': {'$exists': True, '$ne': None}},
+            {'goals.away': {'$exists': True, '$ne': None}}
+        ]
+    }
+
+
+def build_user_stats(username):
+    """Compute the user_stats document of a user from all their matches"""
+    df = load_matches_frame(settings.MONGO_DB['matches'], _scored_matches_query(username))
+
+    teams = {}
+    # Home sides first, then away sides, so ties keep the order the views always used
+    for ids, names, goals in (
+        (df['home_id'], df['home_name'], df['home_goals']),
+        (df['away_id'], df['away_name'], df['away_goals']),
+    ):
+        for team_id, team_name, team_goals in zip(ids.tolist(), names, goals.tolist()):
+            team = teams.setdefault(str(team_id), {'name': team_name, 'matches': 0, 'goals': 0})
+            team['matches'] += 1
+            team['goals'] += team_goals
+
+    leagues = {}
+    for league_id, league_name in zip(df['league_id'].tolist(), df['league_name']):
+        league = leagues.setdefault(str(league_id), {'name': league_name, 'matches': 0})
+        league['matches'] += 1
+
+    days = pd.to_datetime(df['timestamp'], unit='s').dt.strftime('%Y-%m-%d')
+
+    return {
+        '_id': username,
+        'total_matches': int(len(df)),
+        'total_goals': int((df['home_goals'] + df['away_goals']).sum()),
+        'seasons': {str(season): int(count) for season, count in df['season'].value_counts(sort=False).items()},
+        'days': {day: int(count) for day, count in days.value_counts(sort=False).items()},
+        'teams': teams,
+        'leagues': leagues,
+        'updated_at': datetime.now(timezone.utc),
+    }
+
+
+def get_user_stats(username):
+    """The user_stats document of a user, built and stored first if it does not exist yet"""
+    collection = settings.MONGO_DB[USER_STATS_COLLECTION]
+    user_stats = collection.find_one({'_id': username})
+    if user_stats is not None:
+        return user_stats
+
+    # Upserts rather than insert_one: concurrent first reads each store a complete build
+    # instead of racing on the _id
+    user_stats = build_user_stats(username)
+    collection.replace_one({'_id': username}, user_stats, upsert=True)
+
+    # Increments sent while the document did not exist yet were dropped: rebuild once if a match
+    # was added or removed during the build
+    if settings.MONGO_DB['matches'].count_documents(_scored_matches_query(username)) != user_stats['total_matches']:
+        user_stats = build_user_stats(username)
+        collection.replace_one({'_id': username}, user_stats, upsert=True)
+    return user_stats
+
+
+def _positive(counters, key='matches'):
+    """(id, entry) pairs of a counters map whose key is above 0, in document order"""
+    return [(int(entry_id), entry) for entry_id, entry in (counters or {}).items() if entry.get(key, 0) > 0]
+
+
+def general_stats_response(user_stats):
+    """Payload of /user-general-stats/ from a user_stats document"""
+    total_matches = user_stats.get('total_matches', 0)
+    if total_matches <= 0:
+        return {
+            'totalMatches': 0,
+            'matchesBySeason': [],
+            'goalsPerMatch': 0,
+            'favouriteTeams': [],
+            'monthlyActivity': [],
+            'favouriteLeagues': [],
+            'topGoalsTeams': [],
+            'totalGoals': 0,
+            'lastMatchDate': None
+        }
+    total_goals = user_stats.get('total_goals', 0)
+
+    seasons = sorted(
+        ((int(season), count) for season, count in (user_stats.get('seasons') or {}).items() if count > 0),
+        reverse=True
+    )
+
+    days = {day: count for day, count in (user_stats.get('days') or {}).items() if count > 0}
+    year_ago = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+    months = {}
+    for day, count in days.items():
+        if day >= year_ago:
+            months[day[:7]] = months.get(day[:7], 0) + count
+
+    teams = _positive(user_stats.get('teams'))
+    leagues = _positive(user_stats.get('leagues'))
+
+    return {
+        'totalMatches': total_matches,
+        'matchesBySeason': [{'season': season, 'matches': count} for season, count in seasons[:5]],
+        'goalsPerMatch': round(total_goals / total_matches, 1),
+        'favouriteTeams': [
+            {'id': team_id, 'name': team['name'], 'matches': team['matches']}
+            for team_id, team in sorted(teams, key=lambda item: -item[1]['matches'])[:5]
+        ],
+        'monthlyActivity': [{'month': month, 'matches': count} for month, count in sorted(months.items())],
+        'favouriteLeagues': [
+            {'id': league_id, 'name': league['name'], 'matches': league['matches']}
+            for league_id, league in sorted(leagues, key=lambda item: -item[1]['matches'])[:5]
+        ],
+        'topGoalsTeams': [
+            {'id': team_id, 'name': team['name'], 'goals': team.get('goals', 0)}
+            for team_id, team in sorted(teams, key=lambda item: -item[1].get('goals', 0))[:5]
+        ],
+        'totalGoals': total_goals,
+        'lastMatchDate': max(days) if days else None
+    }
+
+
+def leagues_viewed_response(user_stats):
+    """Payload of /leagues-viewed/ from a user_stats document: matches per league, most first"""
+    leagues = sorted(_positive(user_stats.get('leagues')), key=lambda item: (-item[1]['matches'], item[0]))
+    return [
+        {'league_id': league_id, 'league_name': league['name'], 'count': league['matches']}
+        for league_id, league in leagues
+    ]
@@ -9,6 +9,8 @@ import pandas as pd
 import os
 from datetime import datetime
 
+from ..match_frames import load_matches_frame, match_row_to_response
+from ..player_insights import PlayerInsights
 from ..teams_query_filters import parse_teams_query_params, add_teams_mongo_filters
 
 class FavouriteTeamStatsAPIView(APIView):
@@ -79,7 +81,7 @@ class FavouriteTeamStatsAPIView(APIView):
         # Use the MongoDB connection from settings
         collection_matches = settings.MONGO_DB['matches']
         collection_locations = settings.MONGO_DB['locations']
-        favourite_team_matches = pd.DataFrame(list(collection_matches.find(query)))
+        favourite_team_matches = load_matches_frame(collection_matches, query, details=True)
         locations = pd.DataFrame(list(collection_locations.find({'user.username': username})))
 
         if len(favourite_team_matches) == 0:
@@ -104,23 +106,23 @@ class FavouriteTeamStatsAPIView(APIView):
 
         # Calculate goals and results
         for _, match in matches_df.iterrows():
-            is_home = match['teams']['home']['id'] == int(team_id)
+            is_home = match['home_id'] == int(team_id)
             
             if is_home:
-                goals_scored += match['goals']['home']
-                goals_conceded += match['goals']['away']
-                if match['goals']['home'] > match['goals']['away']:
+                goals_scored += match['home_goals']
+                goals_conceded += match['away_goals']
+                if match['home_goals'] > match['away_goals']:
                     wins += 1
-                elif match['goals']['home'] < match['goals']['away']:
+                elif match['home_goals'] < match['away_goals']:
                     losses += 1
                 else:
                     draws += 1
             else:
-                goals_scored += match['goals']['away']
-                goals_conceded += match['goals']['home']
-                if match['goals']['away'] > match['goals']['home']:
+                goals_scored += match['away_goals']
+                goals_conceded += match['home_goals']
+                if match['away_goals'] > match['home_goals']:
                     wins += 1
-                elif match['goals']['away'] < match['goals']['home']:
+                elif match['away_goals'] < match['home_goals']:
                     losses += 1
                 else:
                     draws += 1
@@ -130,11 +132,11 @@ class FavouriteTeamStatsAPIView(APIView):
         win_rate = round((wins / total_matches) * 100) if total_matches > 0 else 0
 
         # Find crazy match (highest total goals)
-        matches_df['total_goals'] = matches_df.apply(lambda x: x['goals']['home'] + x['goals']['away'], axis=1)
+        matches_df['total_goals'] = matches_df['home_goals'] + matches_df['away_goals']
         max_total_goals = matches_df['total_goals'].max()
         crazy_match_candidates = matches_df[matches_df['total_goals'] == max_total_goals]
         crazy_match_row = crazy_match_candidates.sample(n=1).iloc[0]
-        crazy_match = self._format_match_for_response(crazy_match_row)
+        crazy_match = match_row_to_response(crazy_match_row)
 
         # Find biggest win (largest positive goal difference)
         biggest_win = self._find_biggest_win(matches_df, team_id)
@@ -158,7 +160,8 @@ class FavouriteTeamStatsAPIView(APIView):
         team_totals = player_insights.get('team_totals', {})
 
         # Get team name
-        team_name = matches_df.iloc[0]['teams']['home']['name'] if matches_df.iloc[0]['teams']['home']['id'] == int(team_id) else matches_df.iloc[0]['teams']['away']['name']
+        first_match = matches_df.iloc[0]
+        team_name = first_match['home_name'] if first_match['home_id'] == int(team_id) else first_match['away_name']
 
         return {
             'team_id': int(team_id),
@@ -218,7 +221,7 @@ class FavouriteTeamStatsAPIView(APIView):
                 location_counts[location_name] = location_counts.get(location_name, 0) + 1
                 
                 # Check if team is home or away
-                is_home = match['teams']['home']['id'] == int(team_id)
+                is_home = match['home_id'] == int(team_id)
                 
                 # Check if location is a stadium
                 location_row = locations_df[locations_df['id'] == location_id]
@@ -258,47 +261,15 @@ class FavouriteTeamStatsAPIView(APIView):
 
         return location_stats
 
-    def _format_match_for_response(self, match_row):
-        """Format a match row for API response"""
-        return {
-            '_id': str(match_row.get('_id', '')),
-            'fixture': {
-                'id': match_row['fixture']['id'],
-                'timestamp': match_row['fixture']['timestamp']
-            },
-            'league': {
-                'id': match_row['league']['id'],
-                'name': match_row['league']['name'],
-                'round': match_row['league']['round'],
-                'season': match_row['league']['season']
-            },
-            'teams': {
-                'home': {
-                    'id': match_row['teams']['home']['id'],
-                    'name': match_row['teams']['home']['name']
-                },
-                'away': {
-                    'id': match_row['teams']['away']['id'],
-                    'name': match_row['teams']['away']['name']
-                }
-            },
-            'goals': {
-                'home': match_row['goals']['home'],
-                'away': match_row['goals']['away']
-            },
-            'location': match_row.get('location', ''),
-            'status': match_row.get('status', '')
-        }
-
     def _find_biggest_rival(self, matches_df, team_id):
         """Find the team that the favourite team has played against most"""
         rival_matches = []
         
         for _, match in matches_df.iterrows():
-            if match['teams']['home']['id'] == int(team_id):
-                rival_matches.append(match['teams']['away']['id'])
+            if match['home_id'] == int(team_id):
+                rival_matches.append(match['away_id'])
             else:
-                rival_matches.append(match['teams']['home']['id'])
+                rival_matches.append(match['home_id'])
 
         if not rival_matches:
             return None
@@ -310,11 +281,11 @@ class FavouriteTeamStatsAPIView(APIView):
 
         # Get rival team name from any match
         rival_match = matches_df[
-            (matches_df.apply(lambda x: x['teams']['home']['id'], axis=1) == biggest_rival_id) | 
-            (matches_df.apply(lambda x: x['teams']['away']['id'], axis=1) == biggest_rival_id)
+            (matches_df['home_id'] == biggest_rival_id) | 
+            (matches_df['away_id'] == biggest_rival_id)
         ].iloc[0]
 
-        rival_name = rival_match['teams']['home']['name'] if rival_match['teams']['home']['id'] == biggest_rival_id else rival_match['teams']['away']['name']
+        rival_name = rival_match['home_name'] if rival_match['home_id'] == biggest_rival_id else rival_match['away_name']
 
         return {
             'team_id': int(biggest_rival_id),
@@ -329,13 +300,9 @@ class FavouriteTeamStatsAPIView(APIView):
 
         team_id_int = int(team_id)
 
-        def extract_scores(row):
-            if row['teams']['home']['id'] == team_id_int:
-                return row['goals']['home'], row['goals']['away']
-            return row['goals']['away'], row['goals']['home']
-
-        team_goals = matches_df.apply(lambda row: extract_scores(row)[0], axis=1)
-        opponent_goals = matches_df.apply(lambda row: extract_scores(row)[1], axis=1)
+        is_home = matches_df['home_id'] == team_id_int
+        team_goals = matches_df['home_goals'].where(is_home, matches_df['away_goals'])
+        opponent_goals = matches_df['away_goals'].where(is_home, matches_df['home_goals'])
         goal_diff = team_goals - opponent_goals
         winning_mask = goal_diff > 0
 
@@ -347,11 +314,11 @@ class FavouriteTeamStatsAPIView(APIView):
         biggest_win_candidates = matches_df[winning_goal_diff == max_diff]
         biggest_win_row = biggest_win_candidates.sample(n=1).iloc[0]
 
-        return self._format_match_for_response(biggest_win_row)
+        return match_row_to_response(biggest_win_row)
 
     def _collect_player_insights(self, matches_df, team_id):
         """Aggregate player goals, assists, and appearances in a single pass."""
-        fixture_ids = matches_df['fixture'].apply(lambda x: x['id']).tolist()
+        fixture_ids = matches_df['fixture_id'].tolist()
         team_id_int = int(team_id)
 
         result_template = {
@@ -369,124 +336,31 @@ class FavouriteTeamStatsAPIView(APIView):
         if not fixture_ids:
             return result_template
 
-        collection_real_matches = settings.MONGO_DB['real_matches']
-        pipeline = [
-            {'$match': {'fixture.id': {'$in': fixture_ids}}},
-            {'$project': {
-                'fixture.id': 1,
-                'lineups': {
-                    '$filter': {
-                        'input': {'$ifNull': ['$lineups', []]},
-                        'as': 'lineup',
-                        'cond': {'$eq': ['$$lineup.team.id', team_id_int]}
-                    }
-                },
-                'opponent_lineups': {
-                    '$filter': {
-                        'input': {'$ifNull': ['$lineups', []]},
-                        'as': 'lineup',
-                        'cond': {'$ne': ['$$lineup.team.id', team_id_int]}
-                    }
-                },
-                'substitution_events': {
-                    '$filter': {
-                        'input': {'$ifNull': ['$events', []]},
-                        'as': 'event',
-                        'cond': {
-                            '$and': [
-                                {'$eq': ['$$event.team.id', team_id_int]},
-                                {'$eq': [{'$toLower': '$$event.type'}, 'subst']},
-                                {'$ne': ['$$event.assist', None]}
-                            ]
-                        }
-                    }
-                },
-                'opponent_substitution_events': {
-                    '$filter': {
-                        'input': {'$ifNull': ['$events', []]},
-                        'as': 'event',
-                        'cond': {
-                            '$and': [
-                                {'$ne': ['$$event.team.id', team_id_int]},
-                                {'$eq': [{'$toLower': '$$event.type'}, 'subst']},
-                                {'$ne': ['$$event.assist', None]}
-                            ]
-                        }
-                    }
-                },
-                'goal_events': {
-                    '$filter': {
-                        'input': {'$ifNull': ['$events', []]},
-                        'as': 'event',
-                        'cond': {
-                            '$and': [
-                                {'$eq': [{'$toLower': '$$event.type'}, 'goal']},
-                                {'$eq': ['$$event.team.id', team_id_int]}
-                            ]
-                        }
-                    }
-                },
-                'opponent_goal_events': {
-                    '$filter': {
-                        'input': {'$ifNull': ['$events', []]},
-                        'as': 'event',
-                        'cond': {
-                            '$and': [
-                                {'$eq': [{'$toLower': '$$event.type'}, 'goal']},
-                                {'$ne': ['$$event.team.id', team_id_int]}
-                            ]
-                        }
-                    }
-                },
-                'card_events': {
-                    '$filter': {
-                        'input': {'$ifNull': ['$events', []]},
-                        'as': 'event',
-                        'cond': {
-                            '$and': [
-                                {'$eq': ['$$event.team.id', team_id_int]},
-                                {'$eq': [{'$toLower': '$$event.type'}, 'card']}
-                            ]
-                        }
-                    }
-                },
-                'team_statistics': {
-                    '$filter': {
-                        'input': {'$ifNull': ['$statistics', []]},
-                        'as': 'team_stats',
-                        'cond': {'$eq': ['$$team_stats.team.id', team_id_int]}
-                    }
-                }
-            }}
-        ]
-
-        real_matches = list(collection_real_matches.aggregate(pipeline))
-        if not real_matches:
+        insights = PlayerInsights.for_fixtures(fixture_ids, statistics=True)
+        if not insights.real_matches:
             return result_template
 
-        def _ensure_player_entry(container, player_id, player_name):
-            if player_id not in container:
-                container[player_id] = {
-                    'name': player_name,
-                    'goals': 0,
-                    'assists': 0,
-                    'matches': 0,
-                    'startXI_matches': 0
-                }
-            return container[player_id]
-
-        def _ensure_opponent_entry(container, player_id, player_name):
-            if player_id not in container:
-                container[player_id] = {
-                    'name': player_name,
-                    'goals_against': 0,
-                    'matches': 0,
-                    'startXI_matches': 0
-                }
-            return container[player_id]
+        # Players of the team count every match they appeared, scored or assisted in
+        player_stats = {
+            player_id: {
+                'name': stats['name'],
+                'goals': stats['goals'],
+                'assists': stats['assists'],
+                'matches': stats['involved_matches'],
+                'startXI_matches': stats['startXI_matches']
+            }
+            for player_id, stats in insights.totals(team_id=team_id_int).items()
+        }
+        opponent_player_stats = {
+            player_id: {
+                'name': stats['name'],
+                'goals_against': stats['goals'],
+                'matches': stats['involved_matches'],
+                'startXI_matches': stats['startXI_matches']
+            }
+            for player_id, stats in insights.totals(exclude_team_id=team_id_int).items()
+        }
 
-        player_stats = {}
-        opponent_player_stats = {}
         total_yellow_cards = 0
         total_red_cards = 0
         total_fouls = 0
@@ -495,82 +369,17 @@ class FavouriteTeamStatsAPIView(APIView):
         possession_total = 0.0
         possession_matches = 0
 
-        for real_match in real_matches:
-            players_in_match = set()
-            players_started = set()
-            opponent_players_in_match = set()
-            opponent_players_started = set()
-
-            for lineup in real_match.get('lineups', []):
-                for player_info in lineup.get('startXI', []):
-                    player = player_info.get('player', {})
-                    player_id = player.get('id')
-                    player_name = player.get('name')
-                    if player_id and player_name:
-                        _ensure_player_entry(player_stats, player_id, player_name)
-                        players_in_match.add(player_id)
-                        players_started.add(player_id)
-
-            for lineup in real_match.get('opponent_lineups', []):
-                for player_info in lineup.get('startXI', []):
-                    player = player_info.get('player', {})
-                    player_id = player.get('id')
-                    player_name = player.get('name')
-                    if player_id and player_name:
-                        _ensure_opponent_entry(opponent_player_stats, player_id, player_name)
-                        opponent_players_in_match.add(player_id)
-                        opponent_players_started.add(player_id)
-
-            for event in real_match.get('substitution_events', []):
-                assist = event.get('assist', {})
-                player_id = assist.get('id')
-                player_name = assist.get('name')
-                if player_id and player_name:
-                    _ensure_player_entry(player_stats, player_id, player_name)
-                    players_in_match.add(player_id)
-
-            for event in real_match.get('opponent_substitution_events', []):
-                assist = event.get('assist', {})
-                player_id = assist.get('id')
-                player_name = assist.get('name')
-                if player_id and player_name:
-                    _ensure_opponent_entry(opponent_player_stats, player_id, player_name)
-                    opponent_players_in_match.add(player_id)
-
-            for event in real_match.get('goal_events', []):
-                scorer = event.get('player', {})
-                scorer_id = scorer.get('id')
-                scorer_name = scorer.get('name')
-                if scorer_id and scorer_name:
-                    player_entry = _ensure_player_entry(player_stats, scorer_id, scorer_name)
-                    player_entry['goals'] += 1
-                    players_in_match.add(scorer_id)
-
-                assist = event.get('assist', {})
-                assist_id = assist.get('id')
-                assist_name = assist.get('name')
-                if assist_id and assist_name:
-                    assist_entry = _ensure_player_entry(player_stats, assist_id, assist_name)
-                    assist_entry['assists'] += 1
-                    players_in_match.add(assist_id)
-
-            for event in real_match.get('opponent_goal_events', []):
-                scorer = event.get('player', {})
-                scorer_id = scorer.get('id')
-                scorer_name = scorer.get('name')
-                if scorer_id and scorer_name:
-                    opponent_entry = _ensure_opponent_entry(opponent_player_stats, scorer_id, scorer_name)
-                    opponent_entry['goals_against'] += 1
-                    opponent_players_in_match.add(scorer_id)
-
-            for event in real_match.get('card_events', []):
-                detail = (event.get('detail') or '').lower()
-                if 'red' in detail:
-                    total_red_cards += 1
-                elif 'yellow' in detail:
-                    total_yellow_cards += 1
-
-            for team_stat in real_match.get('team_statistics', []):
+        for event in insights.events('card', team_id=team_id_int):
+            detail = (event.get('detail') or '').lower()
+            if 'red' in detail:
+                total_red_cards += 1
+            elif 'yellow' in detail:
+                total_yellow_cards += 1
+
+        for real_match in insights.real_matches:
+            for team_stat in real_match.get('statistics') or []:
+                if (team_stat.get('team') or {}).get('id') != team_id_int:
+                    continue
                 for stat in team_stat.get('statistics', []):
                     stat_type = (stat.get('type') or '').lower()
                     value = stat.get('value')
@@ -604,18 +413,6 @@ class FavouriteTeamStatsAPIView(APIView):
                     elif 'corner' in stat_type:
                         total_corner_kicks += numeric_value
 
-            for player_id in players_in_match:
-                player_stats[player_id]['matches'] += 1
-
-            for player_id in players_started:
-                player_stats[player_id]['startXI_matches'] += 1
-
-            for player_id in opponent_players_in_match:
-                opponent_player_stats[player_id]['matches'] += 1
-
-            for player_id in opponent_players_started:
-                opponent_player_stats[player_id]['startXI_matches'] += 1
-
         def _sorted_projection(filter_fn, key_name):
             items = [
                 {
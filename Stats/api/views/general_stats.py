@@ -6,8 +6,13 @@ import pandas as pd
 import os
 from datetime import datetime
 
+from ..match_frames import load_matches_frame, match_row_to_response, team_totals
+from ..player_insights import PlayerInsights
 from ..teams_query_filters import parse_teams_query_params, add_teams_mongo_filters
 
+# Teams need this many watched matches to compete for the percentage and average insights
+MIN_TEAM_MATCHES = 3
+
 class GeneralStatsAPIView(APIView):
     def get(self, request, *args, **kwargs):
         # Access the validation data added by the middleware
@@ -72,7 +77,7 @@ class GeneralStatsAPIView(APIView):
         # Use the MongoDB connection from settings
         collection_matches = settings.MONGO_DB['matches']
         collection_locations = settings.MONGO_DB['locations']
-        matches = pd.DataFrame(list(collection_matches.find(query)))
+        matches = load_matches_frame(collection_matches, query, details=True)
         locations = pd.DataFrame(list(collection_locations.find({'user.username': username})))
 
         if len(matches) == 0:
@@ -87,26 +92,29 @@ class GeneralStatsAPIView(APIView):
         """Calculate general statistics based on matches and locations"""
         
         # Calculate total goals for each match
-        matches_df['total_goals'] = matches_df.apply(lambda x: x['goals']['home'] + x['goals']['away'], axis=1)
-        matches_df['goal_diff'] = matches_df.apply(lambda x: abs(x['goals']['home'] - x['goals']['away']), axis=1)
+        matches_df['total_goals'] = matches_df['home_goals'] + matches_df['away_goals']
+        matches_df['goal_diff'] = (matches_df['home_goals'] - matches_df['away_goals']).abs()
         
+        # Per-team results and goals, shared by the team insights below
+        team_table = team_totals(matches_df)
+
         # King of draws (team with most draws)
-        draw_stats = self._find_king_of_draws(matches_df)
+        draw_stats = self._find_king_of_draws(team_table)
         
         # Crazy Match (match with most total goals)
         crazy_match = self._find_crazy_match(matches_df)
         
         # Biggest win % (team with highest win percentage)
-        biggest_win_percentage = self._find_biggest_win_percentage(matches_df)
+        biggest_win_percentage = self._find_biggest_win_percentage(team_table)
         
         # Biggest lose % (team with highest loss percentage)
-        biggest_lose_percentage = self._find_biggest_lose_percentage(matches_df)
+        biggest_lose_percentage = self._find_biggest_lose_percentage(team_table)
         
         # Most boring team (lowest average goals per match)
-        most_boring_team = self._find_most_boring_team(matches_df)
+        most_boring_team = self._find_most_boring_team(team_table)
         
         # Most crazy team (highest average goals per match)
-        most_crazy_team = self._find_most_crazy_team(matches_df)
+        most_crazy_team = self._find_most_crazy_team(team_table)
         
         # Most watched location
         most_watched_location = self._find_most_watched_location(matches_df, locations_df)
@@ -114,10 +122,11 @@ class GeneralStatsAPIView(APIView):
         # Most watched stadium location
         most_watched_stadium = self._find_most_watched_stadium(matches_df, locations_df)
 
-        # Player stats from events and lineups
-        top_goalscorer = self._find_top_goalscorer(matches_df)
-        top_assist_provider = self._find_top_assist_provider(matches_df)
-        most_watched_player = self._find_most_watched_player(matches_df)
+        # Player stats from events and lineups, fetched and counted in one pass
+        player_totals = PlayerInsights.for_fixtures(matches_df['fixture_id'].tolist()).totals()
+        top_goalscorer = self._find_top_goalscorer(player_totals)
+        top_assist_provider = self._find_top_assist_provider(player_totals)
+        most_watched_player = self._find_most_watched_player(player_totals)
 
         return {
             'king_of_draws': draw_stats,
@@ -133,54 +142,25 @@ class GeneralStatsAPIView(APIView):
             'most_watched_player': most_watched_player
         }
 
-    def _find_king_of_draws(self, matches_df):
+    def _teams_with_min_matches(self, team_table):
+        """Teams with at least MIN_TEAM_MATCHES watched matches"""
+        return team_table[team_table['matches'] >= MIN_TEAM_MATCHES]
+
+    def _find_king_of_draws(self, team_table):
         """Find the team with highest draw percentage"""
-        team_stats = {}
-        
-        for _, match in matches_df.iterrows():
-            home_team_id = match['teams']['home']['id']
-            away_team_id = match['teams']['away']['id']
-            home_team_name = match['teams']['home']['name']
-            away_team_name = match['teams']['away']['name']
-            
-            # Initialize team stats if not exists
-            if home_team_id not in team_stats:
-                team_stats[home_team_id] = {'name': home_team_name, 'draws': 0, 'total': 0}
-            if away_team_id not in team_stats:
-                team_stats[away_team_id] = {'name': away_team_name, 'draws': 0, 'total': 0}
-            
-            # Count matches and draws
-            team_stats[home_team_id]['total'] += 1
-            team_stats[away_team_id]['total'] += 1
-            
-            if match['goals']['home'] == match['goals']['away']:
-                team_stats[home_team_id]['draws'] += 1
-                team_stats[away_team_id]['draws'] += 1
-        
-        if not team_stats:
-            return None
-            
-        # Calculate draw percentages and filter teams with at least 3 matches
-        valid_teams = {}
-        for team_id, stats in team_stats.items():
-            if stats['total'] >= 3:  # Minimum 3 matches requirement
-                if stats['total'] > 0:
-                    stats['draw_percentage'] = round((stats['draws'] / stats['total']) * 100)
-                else:
-                    stats['draw_percentage'] = 0
-                valid_teams[team_id] = stats
-        
-        if not valid_teams:
+        valid_teams = self._teams_with_min_matches(team_table)
+        if valid_teams.empty:
             return None
-            
-        # Find team with highest draw percentage
-        max_draw_team = max(valid_teams.values(), key=lambda x: x['draw_percentage'])
+
+        draw_percentage = (valid_teams['draws'] / valid_teams['matches'] * 100).map(round)
+        team_id = draw_percentage.idxmax()
+        team = valid_teams.loc[team_id]
         return {
-            'team_id': next(k for k, v in valid_teams.items() if v == max_draw_team),
-            'team_name': max_draw_team['name'],
-            'draw_percentage': max_draw_team['draw_percentage'],
-            'draws_count': max_draw_team['draws'],
-            'total_matches': max_draw_team['total']
+            'team_id': int(team_id),
+            'team_name': team['team_name'],
+            'draw_percentage': int(draw_percentage[team_id]),
+            'draws_count': int(team['draws']),
+            'total_matches': int(team['matches'])
         }
 
     def _find_crazy_match(self, matches_df):
@@ -189,206 +169,77 @@ class GeneralStatsAPIView(APIView):
             return None
             
         crazy_match_row = matches_df.loc[matches_df['total_goals'].idxmax()]
-        return self._format_match_for_response(crazy_match_row)
+        return match_row_to_response(crazy_match_row)
 
-    def _find_biggest_win_percentage(self, matches_df):
+    def _find_biggest_win_percentage(self, team_table):
         """Find team with highest win percentage"""
-        team_stats = {}
-        
-        for _, match in matches_df.iterrows():
-            home_team_id = match['teams']['home']['id']
-            away_team_id = match['teams']['away']['id']
-            home_team_name = match['teams']['home']['name']
-            away_team_name = match['teams']['away']['name']
-            
-            # Initialize team stats if not exists
-            if home_team_id not in team_stats:
-                team_stats[home_team_id] = {'name': home_team_name, 'wins': 0, 'total': 0}
-            if away_team_id not in team_stats:
-                team_stats[away_team_id] = {'name': away_team_name, 'wins': 0, 'total': 0}
-            
-            # Count matches and wins
-            team_stats[home_team_id]['total'] += 1
-            team_stats[away_team_id]['total'] += 1
-            
-            if match['goals']['home'] > match['goals']['away']:
-                team_stats[home_team_id]['wins'] += 1
-            elif match['goals']['away'] > match['goals']['home']:
-                team_stats[away_team_id]['wins'] += 1
-        
-        if not team_stats:
+        valid_teams = self._teams_with_min_matches(team_table)
+        if valid_teams.empty:
             return None
-            
-        # Calculate win percentages and filter teams with at least 3 matches
-        valid_teams = {}
-        for team_id, stats in team_stats.items():
-            if stats['total'] >= 3:  # Minimum 3 matches requirement
-                if stats['total'] > 0:
-                    stats['win_percentage'] = round((stats['wins'] / stats['total']) * 100)
-                else:
-                    stats['win_percentage'] = 0
-                valid_teams[team_id] = stats
-        
-        if not valid_teams:
-            return None
-            
-        # Find team with highest win percentage
-        max_win_team = max(valid_teams.values(), key=lambda x: x['win_percentage'])
+
+        win_percentage = (valid_teams['wins'] / valid_teams['matches'] * 100).map(round)
+        team_id = win_percentage.idxmax()
+        team = valid_teams.loc[team_id]
         return {
-            'team_id': next(k for k, v in valid_teams.items() if v == max_win_team),
-            'team_name': max_win_team['name'],
-            'win_percentage': max_win_team['win_percentage'],
-            'wins': max_win_team['wins'],
-            'total_matches': max_win_team['total']
+            'team_id': int(team_id),
+            'team_name': team['team_name'],
+            'win_percentage': int(win_percentage[team_id]),
+            'wins': int(team['wins']),
+            'total_matches': int(team['matches'])
         }
 
-    def _find_biggest_lose_percentage(self, matches_df):
+    def _find_biggest_lose_percentage(self, team_table):
         """Find team with highest loss percentage"""
-        team_stats = {}
-        
-        for _, match in matches_df.iterrows():
-            home_team_id = match['teams']['home']['id']
-            away_team_id = match['teams']['away']['id']
-            home_team_name = match['teams']['home']['name']
-            away_team_name = match['teams']['away']['name']
-            
-            # Initialize team stats if not exists
-            if home_team_id not in team_stats:
-                team_stats[home_team_id] = {'name': home_team_name, 'losses': 0, 'total': 0}
-            if away_team_id not in team_stats:
-                team_stats[away_team_id] = {'name': away_team_name, 'losses': 0, 'total': 0}
-            
-            # Count matches and losses
-            team_stats[home_team_id]['total'] += 1
-            team_stats[away_team_id]['total'] += 1
-            
-            if match['goals']['home'] < match['goals']['away']:
-                team_stats[home_team_id]['losses'] += 1
-            elif match['goals']['away'] < match['goals']['home']:
-                team_stats[away_team_id]['losses'] += 1
-        
-        if not team_stats:
+        valid_teams = self._teams_with_min_matches(team_table)
+        if valid_teams.empty:
             return None
-            
-        # Calculate loss percentages and filter teams with at least 3 matches
-        valid_teams = {}
-        for team_id, stats in team_stats.items():
-            if stats['total'] >= 3:  # Minimum 3 matches requirement
-                if stats['total'] > 0:
-                    stats['loss_percentage'] = round((stats['losses'] / stats['total']) * 100)
-                else:
-                    stats['loss_percentage'] = 0
-                valid_teams[team_id] = stats
-        
-        if not valid_teams:
-            return None
-            
-        # Find team with highest loss percentage
-        max_loss_team = max(valid_teams.values(), key=lambda x: x['loss_percentage'])
+
+        loss_percentage = (valid_teams['losses'] / valid_teams['matches'] * 100).map(round)
+        team_id = loss_percentage.idxmax()
+        team = valid_teams.loc[team_id]
         return {
-            'team_id': next(k for k, v in valid_teams.items() if v == max_loss_team),
-            'team_name': max_loss_team['name'],
-            'loss_percentage': max_loss_team['loss_percentage'],
-            'losses': max_loss_team['losses'],
-            'total_matches': max_loss_team['total']
+            'team_id': int(team_id),
+            'team_name': team['team_name'],
+            'loss_percentage': int(loss_percentage[team_id]),
+            'losses': int(team['losses']),
+            'total_matches': int(team['matches'])
         }
 
-    def _find_most_boring_team(self, matches_df):
+    def _average_goals(self, valid_teams):
+        """Goals per match (both sides) of each team, rounded to one decimal"""
+        total_goals = valid_teams['goals_for'] + valid_teams['goals_against']
+        return total_goals, (total_goals / valid_teams['matches']).map(lambda avg: round(avg, 1))
+
+    def _find_most_boring_team(self, team_table):
         """Find team with lowest average goals per match"""
-        team_goals = {}
-        
-        for _, match in matches_df.iterrows():
-            home_team_id = match['teams']['home']['id']
-            away_team_id = match['teams']['away']['id']
-            home_team_name = match['teams']['home']['name']
-            away_team_name = match['teams']['away']['name']
-            
-            # Initialize team stats if not exists
-            if home_team_id not in team_goals:
-                team_goals[home_team_id] = {'name': home_team_name, 'total_goals': 0, 'matches': 0}
-            if away_team_id not in team_goals:
-                team_goals[away_team_id] = {'name': away_team_name, 'total_goals': 0, 'matches': 0}
-            
-            # Add goals for this match
-            match_goals = match['goals']['home'] + match['goals']['away']
-            team_goals[home_team_id]['total_goals'] += match_goals
-            team_goals[away_team_id]['total_goals'] += match_goals
-            team_goals[home_team_id]['matches'] += 1
-            team_goals[away_team_id]['matches'] += 1
-        
-        if not team_goals:
-            return None
-            
-        # Calculate average goals per match and filter teams with at least 3 matches
-        valid_teams = {}
-        for team_id, stats in team_goals.items():
-            if stats['matches'] >= 3:  # Minimum 3 matches requirement
-                if stats['matches'] > 0:
-                    stats['avg_goals'] = round(stats['total_goals'] / stats['matches'], 1)
-                else:
-                    stats['avg_goals'] = 0
-                valid_teams[team_id] = stats
-        
-        if not valid_teams:
+        valid_teams = self._teams_with_min_matches(team_table)
+        if valid_teams.empty:
             return None
-            
-        # Find team with lowest average goals
-        min_goals_team = min(valid_teams.values(), key=lambda x: x['avg_goals'])
+
+        total_goals, avg_goals = self._average_goals(valid_teams)
+        team_id = avg_goals.idxmin()
         return {
-            'team_id': next(k for k, v in valid_teams.items() if v == min_goals_team),
-            'team_name': min_goals_team['name'],
-            'avg_goals_per_match': min_goals_team['avg_goals'],
-            'total_goals': min_goals_team['total_goals'],
-            'matches': min_goals_team['matches']
+            'team_id': int(team_id),
+            'team_name': valid_teams.loc[team_id, 'team_name'],
+            'avg_goals_per_match': float(avg_goals[team_id]),
+            'total_goals': int(total_goals[team_id]),
+            'matches': int(valid_teams.loc[team_id, 'matches'])
         }
 
-    def _find_most_crazy_team(self, matches_df):
+    def _find_most_crazy_team(self, team_table):
         """Find team with highest average goals per match"""
-        team_goals = {}
-        
-        for _, match in matches_df.iterrows():
-            home_team_id = match['teams']['home']['id']
-            away_team_id = match['teams']['away']['id']
-            home_team_name = match['teams']['home']['name']
-            away_team_name = match['teams']['away']['name']
-            
-            # Initialize team stats if not exists
-            if home_team_id not in team_goals:
-                team_goals[home_team_id] = {'name': home_team_name, 'total_goals': 0, 'matches': 0}
-            if away_team_id not in team_goals:
-                team_goals[away_team_id] = {'name': away_team_name, 'total_goals': 0, 'matches': 0}
-            
-            # Add goals for this match
-            match_goals = match['goals']['home'] + match['goals']['away']
-            team_goals[home_team_id]['total_goals'] += match_goals
-            team_goals[away_team_id]['total_goals'] += match_goals
-            team_goals[home_team_id]['matches'] += 1
-            team_goals[away_team_id]['matches'] += 1
-        
-        if not team_goals:
-            return None
-            
-        # Calculate average goals per match and filter teams with at least 3 matches
-        valid_teams = {}
-        for team_id, stats in team_goals.items():
-            if stats['matches'] >= 3:  # Minimum 3 matches requirement
-                if stats['matches'] > 0:
-                    stats['avg_goals'] = round(stats['total_goals'] / stats['matches'], 1)
-                else:
-                    stats['avg_goals'] = 0
-                valid_teams[team_id] = stats
-        
-        if not valid_teams:
+        valid_teams = self._teams_with_min_matches(team_table)
+        if valid_teams.empty:
             return None
-            
-        # Find team with highest average goals
-        max_goals_team = max(valid_teams.values(), key=lambda x: x['avg_goals'])
+
+        total_goals, avg_goals = self._average_goals(valid_teams)
+        team_id = avg_goals.idxmax()
         return {
-            'team_id': next(k for k, v in valid_teams.items() if v == max_goals_team),
-            'team_name': max_goals_team['name'],
-            'avg_goals_per_match': max_goals_team['avg_goals'],
-            'total_goals': max_goals_team['total_goals'],
-            'matches': max_goals_team['matches']
+            'team_id': int(team_id),
+            'team_name': valid_teams.loc[team_id, 'team_name'],
+            'avg_goals_per_match': float(avg_goals[team_id]),
+            'total_goals': int(total_goals[team_id]),
+            'matches': int(valid_teams.loc[team_id, 'matches'])
         }
 
     def _find_most_watched_location(self, matches_df, locations_df):
@@ -450,146 +301,12 @@ class GeneralStatsAPIView(APIView):
             'views_count': stadium_counts[most_watched_stadium]
         }
 
-    def _format_match_for_response(self, match_row):
-        """Format a match row for API response"""
-        return {
-            '_id': str(match_row.get('_id', '')),
-            'fixture': {
-                'id': match_row['fixture']['id'],
-                'timestamp': match_row['fixture']['timestamp']
-            },
-            'league': {
-                'id': match_row['league']['id'],
-                'name': match_row['league']['name'],
-                'round': match_row['league']['round'],
-                'season': match_row['league']['season']
-            },
-            'teams': {
-                'home': {
-                    'id': match_row['teams']['home']['id'],
-                    'name': match_row['teams']['home']['name']
-                },
-                'away': {
-                    'id': match_row['teams']['away']['id'],
-                    'name': match_row['teams']['away']['name']
-                }
-            },
-            'goals': {
-                'home': match_row['goals']['home'],
-                'away': match_row['goals']['away']
-            },
-            'location': match_row.get('location', ''),
-            'status': match_row.get('status', '')
-        }
-
-    def _find_top_goalscorer(self, matches_df):
-        """Find player with most goals across all watched matches - OPTIMIZED"""
-        collection_real_matches = settings.MONGO_DB['real_matches']
-        player_goals = {}
-        
-        # OPTIMIZATION 1: Batch fetch all real_matches - need lineups + all events for match counting, and goal events for goal counting
-        fixture_ids = matches_df['fixture'].apply(lambda x: x['id']).tolist()
-        if not fixture_ids:
-            return None
-        
-        # Fetch lineups (startXI only) and substitution events (for counting total matches) + goal events (for counting goals)
-        pipeline = [
-            {'$match': {'fixture.id': {'$in': fixture_ids}}},
-            {'$project': {
-                'fixture.id': 1,
-                'lineups': 1,  # All lineups for match counting
-                'events': {
-                    '$filter': {
-                        'input': {'$ifNull': ['$events', []]},
-                        'as': 'event',
-                        'cond': {
-                            '$and': [
-                                {'$eq': [{'$toLower': '$$event.type'}, 'subst']},
-                                {'$ne': ['$$event.assist', None]}
-                            ]
-                        }
-                    }
-                },
-                'goal_events': {
-                    '$filter': {
-                        'input': {'$ifNull': ['$events', []]},
-                        'as': 'event',
-                        'cond': {'$eq': [{'$toLower': '$$event.type'}, 'goal']}
-                    }
-                }
-            }}
-        ]
-        
-        real_matches_dict = {
-            rm['fixture']['id']: rm 
-            for rm in collection_real_matches.aggregate(pipeline)
-        }
-        
-        # OPTIMIZATION 2: Process lineups and events to count total matches, and goal_events to count goals
-        for fixture_id, real_match in real_matches_dict.items():
-            # Track which players appeared in this match (from startXI or substitution events)
-            players_in_match = set()
-            
-            # Count players from startXI only (not substitutes from lineup)
-            if 'lineups' in real_match and real_match['lineups']:
-                for lineup in real_match['lineups']:
-                    # Count startXI players
-                    if 'startXI' in lineup:
-                        for player_info in lineup['startXI']:
-                            player_id = player_info.get('player', {}).get('id')
-                            player_name = player_info.get('player', {}).get('name')
-                            if player_id and player_name:
-                                if player_id not in player_goals:
-                                    player_goals[player_id] = {
-                                        'name': player_name,
-                                        'goals': 0,
-                                        'matches': 0
-                                    }
-                                players_in_match.add(player_id)
-            
-            # Count players from substitution events (event.type == "subst")
-            # The player that enters is in event.assist
-            if 'events' in real_match and real_match['events']:
-                for event in real_match['events']:
-                    # Only process substitution events
-                    if (event.get('type') or '').lower() == 'subst':
-                        assist = event.get('assist')  # Player entering the game
-                        if assist and assist.get('id') and assist.get('name'):
-                            player_id = assist['id']
-                            player_name = assist['name']
-                            if player_id not in player_goals:
-                                player_goals[player_id] = {
-                                    'name': player_name,
-                                    'goals': 0,
-                                    'matches': 0
-                                }
-                            players_in_match.add(player_id)
-            
-            # Count goals from goal_events
-            if 'goal_events' in real_match and real_match['goal_events']:
-                for event in real_match['goal_events']:
-                    player_id = event.get('player', {}).get('id')
-                    player_name = event.get('player', {}).get('name')
-                    if player_id and player_name:
-                        if player_id not in player_goals:
-                            player_goals[player_id] = {
-                                'name': player_name,
-                                'goals': 0,
-                                'matches': 0
-                            }
-                        player_goals[player_id]['goals'] += 1
-            
-            # Increment match count for all players that appeared in this match
-            for player_id in players_in_match:
-                player_goals[player_id]['matches'] += 1
-        
-        if not player_goals:
+    def _find_top_goalscorer(self, player_totals):
+        """Find player with most goals across all watched matches"""
+        if not player_totals:
             return None
-        
-        # Find top goalscorer
-        top_scorer = max(player_goals.values(), key=lambda x: x['goals'])
-        top_scorer_id = next(k for k, v in player_goals.items() if v == top_scorer)
-        
+
+        top_scorer_id, top_scorer = max(player_totals.items(), key=lambda item: item[1]['goals'])
         return {
             'player_id': top_scorer_id,
             'player_name': top_scorer['name'],
@@ -597,120 +314,12 @@ class GeneralStatsAPIView(APIView):
             'matches': top_scorer['matches']
         }
 
-    def _find_top_assist_provider(self, matches_df):
-        """Find player with most assists across all watched matches - OPTIMIZED"""
-        collection_real_matches = settings.MONGO_DB['real_matches']
-        player_assists = {}
-        
-        # OPTIMIZATION 1: Batch fetch all real_matches - need lineups + all events for match counting, and assist events for assist counting
-        fixture_ids = matches_df['fixture'].apply(lambda x: x['id']).tolist()
-        if not fixture_ids:
+    def _find_top_assist_provider(self, player_totals):
+        """Find player with most assists across all watched matches"""
+        if not player_totals:
             return None
-        
-        # Fetch lineups (startXI only) and substitution events (for counting total matches) + goal events with assists (for counting assists)
-        pipeline = [
-            {'$match': {'fixture.id': {'$in': fixture_ids}}},
-            {'$project': {
-                'fixture.id': 1,
-                'lineups': 1,  # All lineups for match counting
-                'events': {
-                    '$filter': {
-                        'input': {'$ifNull': ['$events', []]},
-                        'as': 'event',
-                        'cond': {
-                            '$and': [
-                                {'$eq': [{'$toLower': '$$event.type'}, 'subst']},
-                                {'$ne': ['$$event.assist', None]}
-                            ]
-                        }
-                    }
-                },
-                'assist_events': {
-                    '$filter': {
-                        'input': {'$ifNull': ['$events', []]},
-                        'as': 'event',
-                        'cond': {
-                            '$and': [
-                                {'$eq': [{'$toLower': '$$event.type'}, 'goal']},
-                                {'$ne': ['$$event.assist', None]}
-                            ]
-                        }
-                    }
-                }
-            }}
-        ]
-        
-        real_matches_dict = {
-            rm['fixture']['id']: rm 
-            for rm in collection_real_matches.aggregate(pipeline)
-        }
-        
-        # OPTIMIZATION 2: Process lineups and events to count total matches, and assist_events to count assists
-        for fixture_id, real_match in real_matches_dict.items():
-            # Track which players appeared in this match (from startXI or substitution events)
-            players_in_match = set()
-            
-            # Count players from startXI only (not substitutes from lineup)
-            if 'lineups' in real_match and real_match['lineups']:
-                for lineup in real_match['lineups']:
-                    # Count startXI players
-                    if 'startXI' in lineup:
-                        for player_info in lineup['startXI']:
-                            player_id = player_info.get('player', {}).get('id')
-                            player_name = player_info.get('player', {}).get('name')
-                            if player_id and player_name:
-                                if player_id not in player_assists:
-                                    player_assists[player_id] = {
-                                        'name': player_name,
-                                        'assists': 0,
-                                        'matches': 0
-                                    }
-                                players_in_match.add(player_id)
-            
-            # Count players from substitution events (event.type == "subst")
-            # The player that enters is in event.assist
-            if 'events' in real_match and real_match['events']:
-                for event in real_match['events']:
-                    # Only process substitution events
-                    if (event.get('type') or '').lower() == 'subst':
-                        assist = event.get('assist')  # Player entering the game
-                        if assist and assist.get('id') and assist.get('name'):
-                            player_id = assist['id']
-                            player_name = assist['name']
-                            if player_id not in player_assists:
-                                player_assists[player_id] = {
-                                    'name': player_name,
-                                    'assists': 0,
-                                    'matches': 0
-                                }
-                            players_in_match.add(player_id)
-            
-            # Count assists from assist_events
-            if 'assist_events' in real_match and real_match['assist_events']:
-                for event in real_match['assist_events']:
-                    assist = event.get('assist')
-                    if assist and assist.get('id') and assist.get('name'):
-                        player_id = assist['id']
-                        player_name = assist['name']
-                        if player_id not in player_assists:
-                            player_assists[player_id] = {
-                                'name': player_name,
-                                'assists': 0,
-                                'matches': 0
-                            }
-                        player_assists[player_id]['assists'] += 1
-            
-            # Increment match count for all players that appeared in this match
-            for player_id in players_in_match:
-                player_assists[player_id]['matches'] += 1
-        
-        if not player_assists:
-            return None
-        
-        # Find top assist provider
-        top_assist = max(player_assists.values(), key=lambda x: x['assists'])
-        top_assist_id = next(k for k, v in player_assists.items() if v == top_assist)
-        
+
+        top_assist_id, top_assist = max(player_totals.items(), key=lambda item: item[1]['assists'])
         return {
             'player_id': top_assist_id,
             'player_name': top_assist['name'],
@@ -718,103 +327,16 @@ class GeneralStatsAPIView(APIView):
             'matches': top_assist['matches']
         }
 
-    def _find_most_watched_player(self, matches_df):
-        """Find player appearing in most matches (via lineups or events)"""
-        collection_real_matches = settings.MONGO_DB['real_matches']
-        player_matches = {}
-
-        # OPTIMIZATION 1: Batch fetch all real_matches with aggregation - filter by favourite team_id directly in MongoDB
-        fixture_ids = matches_df['fixture'].apply(lambda x: x['id']).tolist()
-        if not fixture_ids:
+    def _find_most_watched_player(self, player_totals):
+        """Find player appearing in most matches (via lineups or substitutions)"""
+        watched_players = [(player_id, stats) for player_id, stats in player_totals.items() if stats['matches'] > 0]
+        if not watched_players:
             return None
-        
-        # Single batch aggregation query - filter lineups and substitution events
-        pipeline = [
-            {'$match': {'fixture.id': {'$in': fixture_ids}}},
-            {'$project': {
-                'fixture.id': 1,
-                'lineups': 1,
-                'events': {
-                    '$filter': {
-                        'input': {'$ifNull': ['$events', []]},
-                        'as': 'event',
-                        'cond': {
-                            '$and': [
-                                {'$eq': [{'$toLower': '$$event.type'}, 'subst']},
-                                {'$ne': ['$$event.assist', None]}
-                            ]
-                        }
-                    }
-                }
-            }}
-        ]
-
-        real_matches_dict = {
-            rm['fixture']['id']: rm 
-            for rm in collection_real_matches.aggregate(pipeline)
-        }
-        
-        # OPTIMIZATION 2: Process lineups and events (already filtered by team_id in database)
-        for fixture_id, real_match in real_matches_dict.items():
-            # Track which players appeared in this match to count matches
-            players_in_match = set()
-            # Track which players started in startXI
-            players_started = set()
-            
-            # Count players from startXI only (not substitutes from lineup)
-            if 'lineups' in real_match and real_match['lineups']:
-                for lineup in real_match['lineups']:
-                    # Count startXI players
-                    if 'startXI' in lineup:
-                        for player_info in lineup['startXI']:
-                            player_id = player_info.get('player', {}).get('id')
-                            player_name = player_info.get('player', {}).get('name')
-                            if player_id and player_name:
-                                if player_id not in player_matches:
-                                    player_matches[player_id] = {
-                                        'name': player_name,
-                                        'matches': 0,
-                                        'startXI_matches': 0
-                                    }
-                                players_in_match.add(player_id)
-                                players_started.add(player_id)
-            
-            # Count players from substitution events (event.type == "subst")
-            # The player that enters is in event.assist
-            if 'events' in real_match and real_match['events']:
-                for event in real_match['events']:
-                    # Only process substitution events
-                    if (event.get('type') or '').lower() == 'subst':
-                        assist = event.get('assist')  # Player entering the game
-                        if assist and assist.get('id') and assist.get('name'):
-                            player_id = assist['id']
-                            player_name = assist['name']
-                            if player_id not in player_matches:
-                                player_matches[player_id] = {
-                                    'name': player_name,
-                                    'matches': 0,
-                                    'startXI_matches': 0
-                                }
-                            players_in_match.add(player_id)
-            
-            # Increment match count for all players that appeared in this match
-            for player_id in players_in_match:
-                player_matches[player_id]['matches'] += 1
-            
-            # Increment startXI match count for players that started
-            for player_id in players_started:
-                player_matches[player_id]['startXI_matches'] += 1
-        
-        if not player_matches:
-            return None
-        
-        # Find most watched player
-        most_watched = max(player_matches.values(), key=lambda x: x['matches'])
-        most_watched_id = next(k for k, v in player_matches.items() if v == most_watched)
-        
+
+        most_watched_id, most_watched = max(watched_players, key=lambda item: item[1]['matches'])
         return {
             'player_id': most_watched_id,
             'player_name': most_watched['name'],
             'matches': most_watched['matches'],
             'startXI_matches': most_watched['startXI_matches']
-        } 
\ No newline at end of file
+        }
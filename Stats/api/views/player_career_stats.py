@@ -5,16 +5,14 @@ from rest_framework import status
 import os
 
 from api.player_participation import (
-    find_player_team,
-    count_player_match_events,
-    player_participation_match_clause,
+    find_player_appearances,
     empty_team_bucket,
 )
 
 
 class PlayerCareerStatsAPIView(APIView):
     """
-    Career (all appearances) aggregates per season/team from real_matches,
+    Career (all appearances) aggregates per season/team from player_appearances,
     scoped by the player's stored career teams. Also reports matches_viewed
     for the authenticated user.
     Does not return match lists (use player-team-season-matches for that).
@@ -66,62 +64,25 @@ class PlayerCareerStatsAPIView(APIView):
                 for tid in team_ids
             }
 
-        real_matches = settings.MONGO_DB['real_matches']
-        for season, team_ids in seasons_teams.items():
-            team_id_list = list(team_ids)
-            pipeline = [
-                {
-                    '$match': {
-                        'league.season': season,
-                        '$and': [
-                            {
-                                '$or': [
-                                    {'teams.home.id': {'$in': team_id_list}},
-                                    {'teams.away.id': {'$in': team_id_list}},
-                                ]
-                            },
-                            player_participation_match_clause(player_id),
-                        ],
-                    }
-                },
-                {
-                    '$project': {
-                        'fixture.id': 1,
-                        'fixture.timestamp': 1,
-                        'league': 1,
-                        'teams': 1,
-                        'goals': 1,
-                        'lineups': 1,
-                        'events': {'$ifNull': ['$events', []]},
-                    }
-                },
-            ]
-
-            for real_match in real_matches.aggregate(pipeline):
-                team_id, _started, participated = find_player_team(real_match, player_id)
-                if not participated or team_id not in seasons_data[season]:
-                    continue
+        appearances = find_player_appearances(
+            {'player_id': player_id, 'season': {'$in': list(seasons_teams.keys())}}
+        )
+        for appearance in appearances:
+            bucket = seasons_data[appearance['season']].get(appearance.get('team_id'))
+            if bucket is None:
+                continue
 
-                fixture_id = (real_match.get('fixture') or {}).get('id')
-                goals, assists, yellow, red = count_player_match_events(real_match, player_id)
-                bucket = seasons_data[season][team_id]
-                bucket['matches_played'] += 1
-                bucket['goals'] += goals
-                bucket['assists'] += assists
-                bucket['yellow_cards'] += yellow
-                bucket['red_cards'] += red
-                if fixture_id is not None and fixture_id in watched_fixture_ids:
-                    bucket['matches_viewed'] += 1
-
-                # Prefer live name from match if career name missing
-                if not team_names.get(team_id):
-                    teams = real_match.get('teams') or {}
-                    home = teams.get('home') or {}
-                    away = teams.get('away') or {}
-                    if home.get('id') == team_id:
-                        bucket['team_name'] = home.get('name') or bucket['team_name']
-                    elif away.get('id') == team_id:
-                        bucket['team_name'] = away.get('name') or bucket['team_name']
+            bucket['matches_played'] += 1
+            bucket['goals'] += appearance.get('goals', 0)
+            bucket['assists'] += appearance.get('assists', 0)
+            bucket['yellow_cards'] += appearance.get('yellow_cards', 0)
+            bucket['red_cards'] += appearance.get('red_cards', 0)
+            if appearance['fixture_id'] in watched_fixture_ids:
+                bucket['matches_viewed'] += 1
+
+            # Prefer live name from match if career name missing
+            if not team_names.get(appearance['team_id']) and appearance.get('team_name'):
+                bucket['team_name'] = appearance['team_name']
 
         seasons_list = []
         for season in sorted(seasons_data.keys(), reverse=True):
@@ -2,12 +2,13 @@ from collections import Counter
 from datetime import datetime, timedelta
 import os
 
-import pandas as pd
 from django.conf import settings
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from api.player_participation import find_player_appearances
+
 
 class PlayerGeneralStatsAPIView(APIView):
     """
@@ -35,62 +36,27 @@ class PlayerGeneralStatsAPIView(APIView):
             return Response({"error": "player_id must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
 
         matches_collection = settings.MONGO_DB['matches']
-        user_matches = list(matches_collection.find({'user.username': username}))
+        user_matches = list(matches_collection.find(
+            {'user.username': username},
+            {'fixture.id': 1, 'fixture.timestamp': 1, 'league.id': 1, 'league.name': 1, 'league.season': 1}
+        ))
 
         if not user_matches:
             return Response(self._empty_response(), status=status.HTTP_200_OK)
 
-        matches_df = pd.DataFrame(user_matches)
-
-        if matches_df.empty:
-            return Response(self._empty_response(), status=status.HTTP_200_OK)
-
-        fixture_ids = matches_df['fixture'].apply(lambda x: x.get('id')).dropna().astype(int).tolist()
+        fixture_ids = [
+            int(match['fixture']['id']) for match in user_matches
+            if (match.get('fixture') or {}).get('id') is not None
+        ]
         if not fixture_ids:
             return Response(self._empty_response(), status=status.HTTP_200_OK)
 
-        real_matches_collection = settings.MONGO_DB['real_matches']
-        pipeline = [
-            {
-                '$match': {
-                    'fixture.id': {'$in': fixture_ids},
-                    '$or': [
-                        {'lineups.startXI.player.id': player_id},
-                        {
-                            'events.type': {'$regex': 'subst', '$options': 'i'},
-                            '$or': [
-                                {'events.player.id': player_id},
-                                {'events.assist.id': player_id}
-                            ]
-                        },
-                        {
-                            'events.type': {'$regex': 'goal', '$options': 'i'},
-                            '$or': [
-                                {'events.player.id': player_id},
-                                {'events.assist.id': player_id}
-                            ]
-                        }
-                    ]
-                }
-            },
-            {
-                '$project': {
-                    'fixture.id': 1,
-                    'lineups': 1,
-                    'events': {'$ifNull': ['$events', []]},
-                    'teams': 1,
-                    'league': 1,
-                    'goals': 1
-                }
-            }
-        ]
-
-        real_matches_dict = {
-            match['fixture']['id']: match
-            for match in real_matches_collection.aggregate(pipeline)
+        appearances = {
+            appearance['fixture_id']: appearance
+            for appearance in find_player_appearances({'player_id': player_id, 'fixture_id': {'$in': fixture_ids}})
         }
 
-        if not real_matches_dict:
+        if not appearances:
             return Response(self._empty_response(), status=status.HTTP_200_OK)
 
         total_matches = 0
@@ -107,18 +73,14 @@ class PlayerGeneralStatsAPIView(APIView):
 
         year_ago = datetime.now() - timedelta(days=365)
 
-        for _, match_row in matches_df.iterrows():
+        for match_row in user_matches:
             fixture = match_row.get('fixture', {})
             fixture_id = fixture.get('id')
             if fixture_id is None:
                 continue
 
-            real_match = real_matches_dict.get(fixture_id)
-            if not real_match:
-                continue
-
-            player_team_id, player_participated = self._find_player_team(real_match, player_id)
-            if not player_participated:
+            appearance = appearances.get(fixture_id)
+            if not appearance:
                 continue
 
             league_info = match_row.get('league', {}) if isinstance(match_row.get('league'), dict) else {}
@@ -129,40 +91,10 @@ class PlayerGeneralStatsAPIView(APIView):
             fixture_timestamp = fixture.get('timestamp')
             match_datetime = datetime.fromtimestamp(fixture_timestamp) if fixture_timestamp else None
 
-            opponent_id = None
-            opponent_name = None
-            is_home = None
-            teams_info = real_match.get('teams', {}) if isinstance(real_match.get('teams'), dict) else {}
-            home_team = teams_info.get('home', {}) if isinstance(teams_info.get('home'), dict) else {}
-            away_team = teams_info.get('away', {}) if isinstance(teams_info.get('away'), dict) else {}
-
-            if player_team_id is not None:
-                if player_team_id == home_team.get('id'):
-                    opponent_id = away_team.get('id')
-                    opponent_name = away_team.get('name')
-                    is_home = True
-                elif player_team_id == away_team.get('id'):
-                    opponent_id = home_team.get('id')
-                    opponent_name = home_team.get('name')
-                    is_home = False
-
-            match_goals = 0
-            match_assists = 0
-
-            for event in real_match.get('events', []):
-                event_type = (event.get('type') or '').lower()
-                event_detail = (event.get('detail') or '').lower()
-
-                if event_type == 'goal' and event_detail != 'own goal' and event_detail != 'missed penalty':
-                    scorer_id = event.get('player', {}).get('id')
-                    assist = event.get('assist')
-                    assist_id = assist.get('id') if isinstance(assist, dict) else None
-
-                    if scorer_id == player_id:
-                        match_goals += 1
-
-                    if assist_id == player_id:
-                        match_assists += 1
+            opponent_id = appearance.get('opponent_id')
+            opponent_name = appearance.get('opponent_name')
+            match_goals = appearance.get('goals', 0)
+            match_assists = appearance.get('assists', 0)
 
             total_matches += 1
             total_goals += match_goals
@@ -252,32 +184,6 @@ class PlayerGeneralStatsAPIView(APIView):
 
         return Response(response_payload, status=status.HTTP_200_OK)
 
-    @staticmethod
-    def _find_player_team(real_match: dict, player_id: int):
-        """
-        Determine if the player participated in the match and return the team ID.
-        """
-        lineups = real_match.get('lineups', []) or []
-
-        for lineup in lineups:
-            team = lineup.get('team', {}) if isinstance(lineup.get('team'), dict) else {}
-            team_id = team.get('id')
-
-            for player_info in lineup.get('startXI', []) or []:
-                player_info_data = player_info.get('player', {}) if isinstance(player_info.get('player'), dict) else {}
-                if player_info_data.get('id') == player_id:
-                    return team_id, True
-
-        for event in real_match.get('events', []) or []:
-            event_type = (event.get('type') or '').lower()
-            if event_type == 'subst':
-                assist = event.get('assist', {}) if isinstance(event.get('assist'), dict) else {}
-                if assist.get('id') == player_id:
-                    team = event.get('team', {}) if isinstance(event.get('team'), dict) else {}
-                    return team.get('id'), True
-
-        return None, False
-
     @staticmethod
     def _empty_response():
         return {
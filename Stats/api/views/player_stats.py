@@ -3,10 +3,25 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from datetime import datetime
-import pandas as pd
 import numpy as np
 import os
 
+from api.player_participation import find_player_appearances, appearance_player_stats
+
+# Fields of the user's matches returned in the per-season match lists
+USER_MATCH_PROJECTION = {
+    'fixture.id': 1,
+    'fixture.timestamp': 1,
+    'league': 1,
+    'teams.home.id': 1,
+    'teams.home.name': 1,
+    'teams.away.id': 1,
+    'teams.away.name': 1,
+    'goals': 1,
+    'location': 1,
+    'status': 1,
+}
+
 class PlayerStatsAPIView(APIView):
     def _sanitize_value(self, value):
         """Convert NaN, Infinity, and other non-JSON-compliant values to None or 0"""
@@ -48,13 +63,13 @@ class PlayerStatsAPIView(APIView):
         # Get all matches watched by the user
         collection_matches = settings.MONGO_DB['matches']
         user_matches_query = {'user.username': username}
-        user_matches = pd.DataFrame(list(collection_matches.find(user_matches_query)))
+        user_matches = list(collection_matches.find(user_matches_query, USER_MATCH_PROJECTION))
 
         if len(user_matches) == 0:
             return Response(None, status=status.HTTP_200_OK)
 
         # Get fixture IDs from user matches
-        fixture_ids = user_matches['fixture'].apply(lambda x: x['id']).tolist()
+        fixture_ids = [match['fixture']['id'] for match in user_matches]
 
         # Calculate player stats
         player_stats = self._calculate_player_stats(fixture_ids, player_id, user_matches)
@@ -64,7 +79,7 @@ class PlayerStatsAPIView(APIView):
         
         return Response(player_stats, status=status.HTTP_200_OK)
 
-    def _calculate_player_stats(self, fixture_ids, player_id, matches_df):
+    def _calculate_player_stats(self, fixture_ids, player_id, user_matches):
         """Calculate comprehensive stats for a specific player"""
         collection_real_matches = settings.MONGO_DB['real_matches']
         
@@ -83,75 +98,36 @@ class PlayerStatsAPIView(APIView):
         # Initialize season stats
         seasons_data = {}
         
-        # Get all real matches for these fixtures with player data
-        # OPTIMIZATION: Filter matches where player appears in the pipeline
-        pipeline = [
-            {'$match': {
-                'fixture.id': {'$in': fixture_ids},
-                '$or': [
-                    {'lineups.startXI.player.id': player_id},
-                    {
-                        'events.type': {'$regex': 'subst', '$options': 'i'},
-                        'events.assist.id': player_id
-                    }
-                ]
-            }},
-            {'$project': {
-                'fixture.id': 1,
-                'lineups': 1,
-                'events': {'$ifNull': ['$events', []]},
-                'goals': 1,
-                'teams': 1
-            }}
-        ]
-        
-        real_matches_dict = {
-            rm['fixture']['id']: rm 
-            for rm in collection_real_matches.aggregate(pipeline)
+        # Appearances of the player in the watched fixtures, and the final score of those fixtures
+        appearances = {
+            appearance['fixture_id']: appearance
+            for appearance in find_player_appearances({'player_id': player_id, 'fixture_id': {'$in': fixture_ids}})
+        }
+        scores = {
+            real_match['fixture']['id']: real_match.get('goals') or {}
+            for real_match in collection_real_matches.find(
+                {'fixture.id': {'$in': list(appearances.keys())}},
+                {'fixture.id': 1, 'goals': 1}
+            )
         }
         
-        # Process each match (matches are already filtered to only include player)
-        for _, match_row in matches_df.iterrows():
+        for match_row in user_matches:
             fixture_id = match_row['fixture']['id']
-            real_match = real_matches_dict.get(fixture_id)
+            appearance = appearances.get(fixture_id)
             
-            if not real_match:
+            if not appearance:
                 continue
             
-            # Determine if player started and which team they played for
-            player_started = False
-            team_id = None
+            team_id = appearance.get('team_id')
+            teams_watched.add(team_id)
             
-            # Check lineups
-            if 'lineups' in real_match and real_match['lineups']:
-                for lineup in real_match['lineups']:
-                    # Check startXI
-                    if 'startXI' in lineup:
-                        for player_info in lineup['startXI']:
-                            p_id = player_info.get('player', {}).get('id')
-                            if p_id == player_id:
-                                player_started = True
-                                team_id = lineup.get('team', {}).get('id')
-                                teams_watched.add(team_id)
-                                break
-                    
-            # Check substitution events for team info
-            if not player_started and 'events' in real_match:
-                for event in real_match['events']:
-                    if ((event.get('type') or '').lower() == 'subst' and 
-                        event.get('assist', {}).get('id') == player_id):
-                        team_id = event.get('team', {}).get('id')
-                        teams_watched.add(team_id)
-                        break
-            
-            # Player was in match (guaranteed by pipeline), count stats
             matches_viewed += 1
-            if player_started:
+            if appearance.get('started'):
                 matches_startXI += 1
             
             # Get season from match data
             season = None
-            if 'league' in match_row and isinstance(match_row['league'], dict):
+            if isinstance(match_row.get('league'), dict):
                 season = match_row['league'].get('season')
             
             if season is None:
@@ -163,72 +139,26 @@ class PlayerStatsAPIView(APIView):
                     'teams': {}  # team_id -> { team_name, matches: [], matches_viewed, goals, assists, yellow_cards, red_cards }
                 }
             
-            # Calculate match result for win/draw/loss
-            goals_home = real_match.get('goals', {}).get('home', 0)
-            goals_away = real_match.get('goals', {}).get('away', 0)
-            
             # Calculate win/draw/loss and initialize team if we have team_id
             if team_id:
-                is_home = real_match.get('teams', {}).get('home', {}).get('id') == team_id
-                
-                if is_home:
-                    if goals_home > goals_away:
-                        wins += 1
-                    elif goals_home < goals_away:
-                        losses += 1
-                    else:
-                        draws += 1
+                goals_for = scores.get(fixture_id, {}).get('home' if appearance.get('is_home') else 'away') or 0
+                goals_against = scores.get(fixture_id, {}).get('away' if appearance.get('is_home') else 'home') or 0
+                if goals_for > goals_against:
+                    wins += 1
+                elif goals_for < goals_against:
+                    losses += 1
                 else:
-                    if goals_away > goals_home:
-                        wins += 1
-                    elif goals_away < goals_home:
-                        losses += 1
-                    else:
-                        draws += 1
+                    draws += 1
                 
-                # Count goals, assists, and cards
-                season_goals = 0
-                season_assists = 0
-                season_yellow = 0
-                season_red = 0
-                
-                if 'events' in real_match:
-                    for event in real_match['events']:
-                        event_player_id = event.get('player', {}).get('id')
-                        event_type = (event.get('type') or '').lower()
-                        event_detail = (event.get('detail') or '').lower()
-                        
-                        # Count goals
-                        if event_type == 'goal' and event_player_id == player_id and event_detail != 'own goal' and event_detail != 'missed penalty':
-                            total_goals += 1
-                            season_goals += 1
-                        
-                        # Count assists
-                        if event_type == 'goal':
-                            assist = event.get('assist')
-                            if assist and assist.get('id') == player_id:
-                                total_assists += 1
-                                season_assists += 1
-                        
-                        # Count cards
-                        if event_type == 'card' and event_player_id == player_id:
-                            detail = (event.get('detail') or '').lower()
-                            if 'yellow' in detail:
-                                yellow_cards += 1
-                                season_yellow += 1
-                            elif 'red' in detail:
-                                red_cards += 1
-                                season_red += 1
+                player_stats = appearance_player_stats(appearance)
+                total_goals += player_stats['goals']
+                total_assists += player_stats['assists']
+                yellow_cards += player_stats['yellow_cards']
+                red_cards += player_stats['red_cards']
                 
                 # Initialize team in season if needed
                 if team_id not in seasons_data[season]['teams']:
-                    # Get team name
-                    team_name = None
-                    if is_home:
-                        team_name = real_match.get('teams', {}).get('home', {}).get('name')
-                    else:
-                        team_name = real_match.get('teams', {}).get('away', {}).get('name')
-                    
+                    team_name = appearance.get('team_name')
                     seasons_data[season]['teams'][team_id] = {
                         'team_id': team_id,
                         'team_name': team_name or f'Team {team_id}',
@@ -241,11 +171,12 @@ class PlayerStatsAPIView(APIView):
                     }
                 
                 # Add stats to team in season
-                seasons_data[season]['teams'][team_id]['matches_viewed'] += 1
-                seasons_data[season]['teams'][team_id]['goals'] += season_goals
-                seasons_data[season]['teams'][team_id]['assists'] += season_assists
-                seasons_data[season]['teams'][team_id]['yellow_cards'] += season_yellow
-                seasons_data[season]['teams'][team_id]['red_cards'] += season_red
+                team_stats = seasons_data[season]['teams'][team_id]
+                team_stats['matches_viewed'] += 1
+                team_stats['goals'] += player_stats['goals']
+                team_stats['assists'] += player_stats['assists']
+                team_stats['yellow_cards'] += player_stats['yellow_cards']
+                team_stats['red_cards'] += player_stats['red_cards']
                 
                 # Add match to team in this season
                 match_info = {
@@ -275,15 +206,9 @@ class PlayerStatsAPIView(APIView):
                     },
                     'location': match_row.get('location', ''),
                     'status': match_row.get('status', ''),
-                    'player_stats': {
-                        'started': player_started,
-                        'goals': season_goals,
-                        'assists': season_assists,
-                        'yellow_cards': season_yellow,
-                        'red_cards': season_red
-                    }
+                    'player_stats': player_stats
                 }
-                seasons_data[season]['teams'][team_id]['matches'].append(match_info)
+                team_stats['matches'].append(match_info)
         
         # Calculate percentages
         total_matches = wins + draws + losses
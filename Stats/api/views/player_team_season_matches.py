@@ -5,8 +5,7 @@ from rest_framework import status
 import os
 
 from api.player_participation import (
-    find_player_team,
-    player_participation_match_clause,
+    find_player_appearances,
     build_match_row,
 )
 
@@ -14,7 +13,8 @@ from api.player_participation import (
 class PlayerTeamSeasonMatchesAPIView(APIView):
     """
     Lazy match list: all real_matches where the player appeared for a given
-    team + season, with watched=true when the user has that fixture in matches.
+    team + season (from player_appearances), with watched=true when the user
+    has that fixture in matches.
     """
 
     def get(self, request, *args, **kwargs):
@@ -39,49 +39,33 @@ class PlayerTeamSeasonMatchesAPIView(APIView):
 
         watched_map = self._watched_fixture_map(username)
 
-        pipeline = [
-            {
-                '$match': {
-                    'league.season': season,
-                    '$and': [
-                        {
-                            '$or': [
-                                {'teams.home.id': team_id},
-                                {'teams.away.id': team_id},
-                            ]
-                        },
-                        player_participation_match_clause(player_id),
-                    ],
-                }
-            },
-            {
-                '$project': {
-                    'fixture': 1,
-                    'league': 1,
-                    'teams': 1,
-                    'goals': 1,
-                    'lineups': 1,
-                    'events': {'$ifNull': ['$events', []]},
-                    'status': 1,
-                }
-            },
-            {'$sort': {'fixture.timestamp': -1}},
-        ]
+        appearances = find_player_appearances(
+            {'player_id': player_id, 'season': season, 'team_id': team_id},
+            sort=[('timestamp', -1)],
+        )
 
-        matches = []
         real_matches = settings.MONGO_DB['real_matches']
-        for real_match in real_matches.aggregate(pipeline):
-            played_team_id, started, participated = find_player_team(real_match, player_id)
-            if not participated or played_team_id != team_id:
+        real_matches_by_fixture = {
+            real_match['fixture']['id']: real_match
+            for real_match in real_matches.find(
+                {'fixture.id': {'$in': [appearance['fixture_id'] for appearance in appearances]}},
+                {'fixture': 1, 'league': 1, 'teams': 1, 'goals': 1, 'status': 1},
+            )
+        }
+
+        matches = []
+        for appearance in appearances:
+            fixture_id = appearance['fixture_id']
+            real_match = real_matches_by_fixture.get(fixture_id)
+            if real_match is None:
                 continue
 
-            fixture_id = (real_match.get('fixture') or {}).get('id')
-            watched_info = watched_map.get(fixture_id) if fixture_id is not None else None
+            watched_info = watched_map.get(fixture_id)
             watched = watched_info is not None
             location = (watched_info or {}).get('location', '')
 
             matches.append(
-                build_match_row(real_match, player_id, started, watched, location=location)
+                build_match_row(real_match, appearance, watched, location=location)
             )
 
         return Response(
@@ -92,145 +92,59 @@ class PlayersViewedAPIView(APIView):
         self._enrich_nationalities(players)
         return Response(players, status=status.HTTP_200_OK)
 
-    def _ensure_player_entry(self, player_matches, player_id, player_name):
-        if player_id not in player_matches:
-            player_matches[player_id] = {
-                'name': player_name,
+    def _rank_players_by_appearances(self, fixture_ids):
+        """Appearances, G/A, and player's watched clubs (not opponents)."""
+        collection_appearances = settings.MONGO_DB['player_appearances']
+        per_team = collection_appearances.aggregate([
+            {'$match': {'fixture_id': {'$in': fixture_ids}}},
+            {'$group': {
+                '_id': {'player_id': '$player_id', 'team_id': '$team_id'},
+                'player_name': {'$first': '$player_name'},
+                'team_name': {'$first': '$team_name'},
+                'matches': {'$sum': 1},
+                'startXI_matches': {'$sum': {'$cond': ['$started', 1, 0]}},
+                'goals': {'$sum': '$goals'},
+                'assists': {'$sum': '$assists'},
+            }},
+        ])
+
+        # player_id -> totals over the player's teams plus the per-team appearances
+        player_totals = {}
+        for row in per_team:
+            player_id = row['_id']['player_id']
+            team_id = row['_id']['team_id']
+            if not row['player_name']:
+                continue
+            stats = player_totals.setdefault(player_id, {
+                'name': row['player_name'],
                 'matches': 0,
                 'startXI_matches': 0,
                 'goals': 0,
                 'assists': 0,
-                'teams': {},
-            }
-        return player_matches[player_id]
-
-    def _record_team_appearance(self, entry, team_id, team_name):
-        if team_id is None:
-            return
-        teams = entry['teams']
-        if team_id not in teams:
-            teams[team_id] = {
+                'teams': [],
+            })
+            for key in ('matches', 'startXI_matches', 'goals', 'assists'):
+                stats[key] += row[key]
+            stats['teams'].append({
                 'team_id': team_id,
-                'team_name': team_name or f'Team {team_id}',
-                'matches': 0,
-            }
-        elif team_name and teams[team_id]['team_name'].startswith('Team '):
-            teams[team_id]['team_name'] = team_name
-        teams[team_id]['matches'] += 1
-
-    def _rank_players_by_appearances(self, fixture_ids):
-        """Appearances, G/A, and player's watched clubs (not opponents)."""
-        collection_real_matches = settings.MONGO_DB['real_matches']
-        pipeline = [
-            {'$match': {'fixture.id': {'$in': fixture_ids}}},
-            {
-                '$project': {
-                    'fixture.id': 1,
-                    'lineups': 1,
-                    'events': {
-                        '$filter': {
-                            'input': {'$ifNull': ['$events', []]},
-                            'as': 'event',
-                            'cond': {
-                                '$or': [
-                                    {
-                                        '$eq': [
-                                            {'$toLower': '$$event.type'},
-                                            'subst',
-                                        ]
-                                    },
-                                    {
-                                        '$eq': [
-                                            {'$toLower': '$$event.type'},
-                                            'goal',
-                                        ]
-                                    },
-                                ]
-                            },
-                        }
-                    },
-                }
-            },
-        ]
-
-        real_matches_dict = {
-            rm['fixture']['id']: rm for rm in collection_real_matches.aggregate(pipeline)
-        }
-
-        player_matches = {}
-
-        for _fixture_id, real_match in real_matches_dict.items():
-            # player_id -> (team_id, team_name, started)
-            appearance = {}
-
-            for lineup in real_match.get('lineups') or []:
-                team = lineup.get('team') or {}
-                team_id = team.get('id')
-                team_name = team.get('name')
-                for player_info in lineup.get('startXI') or []:
-                    player = player_info.get('player') or {}
-                    player_id = player.get('id')
-                    player_name = player.get('name')
-                    if player_id and player_name:
-                        self._ensure_player_entry(player_matches, player_id, player_name)
-                        appearance[player_id] = (team_id, team_name, True)
-
-            for event in real_match.get('events') or []:
-                event_type = (event.get('type') or '').lower()
-                if event_type != 'subst':
-                    continue
-                assist = event.get('assist') or {}
-                player_id = assist.get('id')
-                player_name = assist.get('name')
-                if not (player_id and player_name):
-                    continue
-                self._ensure_player_entry(player_matches, player_id, player_name)
-                if player_id not in appearance:
-                    team = event.get('team') or {}
-                    appearance[player_id] = (team.get('id'), team.get('name'), False)
-
-            for player_id, (team_id, team_name, started) in appearance.items():
-                entry = player_matches[player_id]
-                entry['matches'] += 1
-                if started:
-                    entry['startXI_matches'] += 1
-                self._record_team_appearance(entry, team_id, team_name)
-
-            for event in real_match.get('events') or []:
-                event_type = (event.get('type') or '').lower()
-                if event_type != 'goal':
-                    continue
-                detail = (event.get('detail') or '').lower()
-                scorer = event.get('player') or {}
-                scorer_id = scorer.get('id')
-                scorer_name = scorer.get('name')
-                if (
-                    scorer_id
-                    and scorer_name
-                    and scorer_id in appearance
-                    and detail != 'own goal'
-                    and detail != 'missed penalty'
-                ):
-                    entry = self._ensure_player_entry(
-                        player_matches, scorer_id, scorer_name
-                    )
-                    entry['goals'] += 1
-
-                assist = event.get('assist') or {}
-                assist_id = assist.get('id')
-                assist_name = assist.get('name')
-                if assist_id and assist_name and assist_id in appearance:
-                    entry = self._ensure_player_entry(
-                        player_matches, assist_id, assist_name
-                    )
-                    entry['assists'] += 1
+                'team_name': row['team_name'] or f'Team {team_id}',
+                'matches': row['matches'],
+            })
 
         ranked = []
-        for player_id, stats in player_matches.items():
+        for player_id, stats in player_totals.items():
             if stats['matches'] <= 0:
                 continue
             teams = sorted(
-                stats['teams'].values(),
+                (
+                    {
+                        'team_id': team['team_id'],
+                        'team_name': team['team_name'],
+                        'matches': team['matches'],
+                    }
+                    for team in stats['teams']
+                    if team['matches'] > 0 and team['team_id'] is not None
+                ),
                 key=lambda t: (-t['matches'], t['team_name']),
             )[:TOP_TEAMS_LIMIT]
             ranked.append(
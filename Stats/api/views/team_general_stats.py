@@ -2,12 +2,15 @@ from datetime import datetime, timedelta
 from collections import Counter
 import os
 
+import numpy as np
 import pandas as pd
 from django.conf import settings
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from ..match_frames import load_matches_frame
+
 
 class TeamGeneralStatsAPIView(APIView):
     def get(self, request, *args, **kwargs):
@@ -45,17 +48,16 @@ class TeamGeneralStatsAPIView(APIView):
             ]
         }
 
-        matches = list(collection_matches.find(query))
+        df = load_matches_frame(collection_matches, query)
 
-        if not matches:
+        if df.empty:
             return Response(self._empty_response(), status=status.HTTP_200_OK)
 
-        df = pd.DataFrame(matches).copy()
-
-        df['is_home'] = df['teams'].apply(lambda teams: teams['home']['id'] == team_id)
-        df['team_goals'] = df.apply(lambda row: row['goals']['home'] if row['is_home'] else row['goals']['away'], axis=1)
-        df['opponent_id'] = df.apply(lambda row: row['teams']['away']['id'] if row['is_home'] else row['teams']['home']['id'], axis=1)
-        df['opponent_name'] = df.apply(lambda row: row['teams']['away']['name'] if row['is_home'] else row['teams']['home']['name'], axis=1)
+        is_home = (df['home_id'] == team_id).to_numpy()
+        df['is_home'] = is_home
+        df['team_goals'] = np.where(is_home, df['home_goals'], df['away_goals'])
+        df['opponent_id'] = np.where(is_home, df['away_id'], df['home_id'])
+        df['opponent_name'] = np.where(is_home, df['away_name'], df['home_name'])
 
         total_matches = int(len(df))
         total_goals = int(df['team_goals'].sum())
@@ -97,7 +99,7 @@ class TeamGeneralStatsAPIView(APIView):
         if df.empty:
             return []
 
-        seasons = df['league'].apply(lambda league: league['season'])
+        seasons = df['season']
         season_counts = seasons.value_counts().sort_index(ascending=False)
 
         matches_by_season = []
@@ -114,7 +116,7 @@ class TeamGeneralStatsAPIView(APIView):
             return []
 
         df = df.copy()
-        df['match_date'] = pd.to_datetime(df['fixture'].apply(lambda fixture: fixture['timestamp']), unit='s')
+        df['match_date'] = pd.to_datetime(df['timestamp'], unit='s')
 
         year_ago = datetime.now() - timedelta(days=365)
         recent_matches = df[df['match_date'] >= year_ago]
@@ -138,7 +140,7 @@ class TeamGeneralStatsAPIView(APIView):
         if df.empty:
             return []
 
-        opponents = list(zip(df['opponent_id'], df['opponent_name']))
+        opponents = list(zip(df['opponent_id'].tolist(), df['opponent_name']))
         opponent_counts = Counter(opponents)
 
         if not opponent_counts:
@@ -160,7 +162,7 @@ class TeamGeneralStatsAPIView(APIView):
         if df.empty:
             return []
 
-        leagues = df['league'].apply(lambda league: (league['id'], league['name']))
+        leagues = zip(df['league_id'].tolist(), df['league_name'])
         league_counts = Counter(leagues)
 
         if not league_counts:
@@ -204,7 +206,7 @@ class TeamGeneralStatsAPIView(APIView):
         if df.empty:
             return None
 
-        latest_timestamp = df['fixture'].apply(lambda fixture: fixture['timestamp']).max()
+        latest_timestamp = int(df['timestamp'].max())
         latest_date = datetime.fromtimestamp(latest_timestamp).strftime('%Y-%m-%d')
         return latest_date
 
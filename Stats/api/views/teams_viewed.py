@@ -2,9 +2,11 @@ from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+import numpy as np
 import pandas as pd
 import os
 
+from ..match_frames import load_matches_frame
 from ..teams_query_filters import parse_teams_query_params, add_teams_mongo_filters
 
 class TeamsViewedAPIView(APIView):
@@ -68,18 +70,15 @@ class TeamsViewedAPIView(APIView):
 
     # Use the MongoDB connection from settings
     collection_matches = settings.MONGO_DB['matches']
-    df = pd.DataFrame(list(collection_matches.find(query)))
+    df = load_matches_frame(collection_matches, query)
 
     if len(df) > 0:
-      # Extract the home and away team IDs and goals
-      home_teams = df.apply(lambda x: (x['teams']['home']['id'], x['teams']['home']['name'], x['goals']['home']), axis=1)
-      away_teams = df.apply(lambda x: (x['teams']['away']['id'], x['teams']['away']['name'], x['goals']['away']), axis=1)
-
-      # Combine both into a single DataFrame
-      all_teams = pd.concat([home_teams, away_teams], ignore_index=True)
-
-      # Convert to a DataFrame for a cleaner presentation
-      all_teams_df = pd.DataFrame(all_teams.tolist(), columns=['team_id', 'team_name', 'goals'])
+      # Stack the home and away sides into one row per team and match
+      all_teams_df = pd.DataFrame({
+        'team_id': np.concatenate([df['home_id'].to_numpy(), df['away_id'].to_numpy()]),
+        'team_name': df['home_name'].tolist() + df['away_name'].tolist(),
+        'goals': np.concatenate([df['home_goals'].to_numpy(), df['away_goals'].to_numpy()])
+      })
 
       # Count occurrences of each team and sum the goals
       team_stats_df = all_teams_df.groupby(['team_id', 'team_name']).agg({'team_id': 'count', 'goals': 'sum'}).rename(columns={'team_id': 'count'}).reset_index()
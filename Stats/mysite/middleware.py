@@ -1,13 +1,98 @@
 """
 Middleware file
 """
-import requests
+import base64
+import hashlib
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
 from django.http import HttpResponseForbidden
 
+# Seconds a validated token is trusted without asking the authentication server again
+AUTH_CACHE_TTL_SECONDS = float(os.getenv('AUTH_CACHE_TTL_SECONDS', '60'))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_CACHE_MAX_ENTRIES', '1024'))
+AUTH_POOL_SIZE = int(os.getenv('AUTH_POOL_SIZE', '10'))
+AUTH_CONNECT_TIMEOUT = float(os.getenv('AUTH_CONNECT_TIMEOUT', '3'))
+AUTH_READ_TIMEOUT = float(os.getenv('AUTH_READ_TIMEOUT', '5'))
+
+
+class ValidationCache:
+  """Bounded LRU of access token -> validateData entries that expire after a TTL.
+
+  Tokens are stored hashed. An entry never outlives the `exp` claim of the token, when the
+  token is a JWT carrying one (the claim is only read, the signature is checked by the
+  authentication server).
+  """
+
+  def __init__(self, ttl_seconds, max_entries):
+    self.ttl_seconds = ttl_seconds
+    self.max_entries = max_entries
+    self.entries = OrderedDict()
+    self.lock = threading.Lock()
+
+  @staticmethod
+  def _key(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+  @staticmethod
+  def _token_expiry(token):
+    try:
+      payload = token.split('.')[1]
+      payload += '=' * (-len(payload) % 4)
+      exp = json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+      return float(exp) if exp is not None else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+      return None
+
+  def get(self, token):
+    key = self._key(token)
+    with self.lock:
+      entry = self.entries.get(key)
+      if entry is None:
+        return None
+      expires_at, data = entry
+      if expires_at <= time.monotonic():
+        del self.entries[key]
+        return None
+      self.entries.move_to_end(key)
+      return data
+
+  def set(self, token, data):
+    if self.ttl_seconds <= 0 or self.max_entries <= 0:
+      return
+    ttl = self.ttl_seconds
+    token_expiry = self._token_expiry(token)
+    if token_expiry is not None:
+      ttl = min(ttl, token_expiry - time.time())
+      if ttl <= 0:
+        return
+    key = self._key(token)
+    with self.lock:
+      self.entries[key] = (time.monotonic() + ttl, data)
+      self.entries.move_to_end(key)
+      while len(self.entries) > self.max_entries:
+        self.entries.popitem(last=False)
+
+
+def _create_session():
+  """Session with keep-alive connections to the authentication server"""
+  session = requests.Session()
+  adapter = HTTPAdapter(pool_connections=1, pool_maxsize=AUTH_POOL_SIZE)
+  session.mount('http://', adapter)
+  session.mount('https://', adapter)
+  return session
+
+
 class CustomAuthenticationMiddleware:
   def __init__(self, get_response):
     self.get_response = get_response
+    self.session = _create_session()
+    self.validation_cache = ValidationCache(AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_ENTRIES)
 
   def __call__(self, request):
     # Check if the request is over HTTPS
@@ -24,30 +109,39 @@ class CustomAuthenticationMiddleware:
 
     # Get the cookie from the request
     cookie_value = request.COOKIES.get('access_token')
-    
+
     if not cookie_value:
       return HttpResponseForbidden('Can\'t validate token')
 
-    # Make a request to the authentication server
-    auth_server_url = os.getenv('VALIDATE_URI')
-    if not auth_server_url:
-      return HttpResponseForbidden('VALIDATE_URI not configured')
-    
-    headers = {
-      'Cookie': f'access_token={cookie_value}'
-    }
-    try:
-      auth_response = requests.get(auth_server_url, headers=headers)
-    except requests.exceptions.RequestException as e:
-      return HttpResponseForbidden(f'Authentication server request failed: {str(e)}')
+    # Reuse a recent validation of the same token
+    data = self.validation_cache.get(cookie_value)
+    if data is None:
+      # Make a request to the authentication server
+      auth_server_url = os.getenv('VALIDATE_URI')
+      if not auth_server_url:
+        return HttpResponseForbidden('VALIDATE_URI not configured')
+
+      headers = {
+        'Cookie': f'access_token={cookie_value}'
+      }
+      try:
+        auth_response = self.session.get(
+          auth_server_url,
+          headers=headers,
+          timeout=(AUTH_CONNECT_TIMEOUT, AUTH_READ_TIMEOUT)
+        )
+      except requests.exceptions.RequestException as e:
+        return HttpResponseForbidden(f'Authentication server request failed: {str(e)}')
+
+      # Check if the authentication was successful
+      if auth_response.status_code != 200:
+        return HttpResponseForbidden('Invalid authentication token')
 
-    # Check if the authentication was successful
-    if auth_response.status_code != 200:
-      return HttpResponseForbidden('Invalid authentication token')
+      data = auth_response.json()
+      self.validation_cache.set(cookie_value, data)
 
     # Add the validate data to the request
-    data = auth_response.json()
     request.validateData = data
     response = self.get_response(request)
 
-    return response
\ No newline at end of file
+    return response
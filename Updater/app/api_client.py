@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+import httpx
+from .config import Config
+from .rate_limiter import create_rate_limiter
+from .response_cache import ResponseCache
+
+class ApiFootballClient:
+    """Shared API-Football client with keep-alive connection pooling, response cache and retry logic"""
+
+    def __init__(self, host=None, headers=None, pool_size=None, connect_timeout=None, read_timeout=None, rate_limiter=None, response_cache=None):
+        self.host = host or Config.RAPIDAPI_HOST
+        self.headers = headers or Config.get_api_headers()
+        pool_size = pool_size or Config.API_POOL_SIZE
+        timeout = httpx.Timeout(
+            read_timeout or Config.API_READ_TIMEOUT,
+            connect=connect_timeout or Config.API_CONNECT_TIMEOUT
+        )
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.client = httpx.Client(
+            base_url=f"https://{self.host}",
+            headers={key: value for key, value in self.headers.items() if value is not None},
+            timeout=timeout,
+            limits=limits
+        )
+        self.rate_limiter = rate_limiter or create_rate_limiter()
+        if response_cache is None and Config.API_CACHE_ENABLED:
+            response_cache = ResponseCache()
+        self.response_cache = response_cache
+
+    def _send(self, endpoint):
+        """Wait for the rate limiter, send a GET request over a pooled connection and return the response"""
+        self.rate_limiter.acquire()
+        response = self.client.get(endpoint)
+        self.rate_limiter.update_from_headers(response.headers)
+        if response.status_code == 429:
+            self.rate_limiter.on_rate_limited()
+        return response
+
+    def request(self, endpoint, max_retries=5, retry_delay=5, use_cache=True):
+        """Make an API request with rate limit retry logic, served from the response cache when possible
+
+        Args:
+            endpoint: The API endpoint to call
+            max_retries: Maximum number of retries (default: 5)
+            retry_delay: Delay in seconds between retries (default: 5)
+            use_cache: Read and write the response cache (default: True)
+
+        Returns:
+            dict: The JSON response from the API
+
+        Raises:
+            Exception: If all retries are exhausted or if there's a non-rate-limit error
+        """
+        cache = self.response_cache if use_cache else None
+        if cache is not None:
+            cached_response = cache.get(endpoint)
+            if cached_response is not None:
+                return cached_response
+
+        for attempt in range(max_retries):
+            try:
+                response = self._send(endpoint)
+                response_data = response.content
+
+                # Parse JSON response
+                try:
+                    json_response = json.loads(response_data)
+                except json.JSONDecodeError:
+                    # If JSON parsing fails, check if it's a rate limit error in the raw response
+                    response_text = response_data.decode('utf-8', errors='ignore')
+                    if response.status_code == 429 or "rateLimit" in response_text or "Too many requests" in response_text:
+                        if attempt < max_retries - 1:
+                            print(f"Rate limit detected (attempt {attempt + 1}/{max_retries}). Waiting {retry_delay} seconds before retry...")
+                            time.sleep(retry_delay)
+                            continue
+                        else:
+                            raise Exception(f"Rate limit exceeded after {max_retries} attempts")
+                    else:
+                        raise Exception(f"Invalid JSON response: {response_text[:200]}")
+
+                # Check for errors in the JSON response
+                if "errors" in json_response:
+                    errors = json_response.get("errors", {})
+
+                    # Check if it's a rate limit error (retry)
+                    if "rateLimit" in errors:
+                        self.rate_limiter.on_rate_limited()
+                        if attempt < max_retries - 1:
+                            rate_limit_msg = errors.get("rateLimit", "Rate limit exceeded")
+                            print(f"Rate limit detected: {rate_limit_msg} (attempt {attempt + 1}/{max_retries}). Waiting {retry_delay} seconds before retry...")
+                            time.sleep(retry_delay)
+                            continue
+                        else:
+                            raise Exception(f"Rate limit exceeded after {max_retries} attempts: {errors.get('rateLimit', 'Unknown error')}")
+
+                    # Check if there are any other errors (don't retry, raise immediately)
+                    if errors:
+                        error_messages = []
+                        for key, value in errors.items():
+                            if isinstance(value, str):
+                                error_messages.append(f"{key}: {value}")
+                            else:
+                                error_messages.append(f"{key}: {json.dumps(value)}")
+
+                        error_str = "; ".join(error_messages)
+                        print(f"API error detected: {error_str}")
+                        raise Exception(f"API returned errors: {error_str}")
+
+                # Success - cache and return the response
+                if cache is not None:
+                    cache.store(endpoint, json_response)
+                return json_response
+
+            except Exception as e:
+                # If it's the last attempt, raise the exception
+                if attempt == max_retries - 1:
+                    raise
+                # For other errors, wait and retry
+                print(f"API request failed (attempt {attempt + 1}/{max_retries}): {str(e)}. Waiting {retry_delay} seconds before retry...")
+                time.sleep(retry_delay)
+
+        # This should never be reached, but just in case
+        raise Exception(f"Failed to make API request after {max_retries} attempts")
+
+    def close(self):
+        """Close all pooled connections"""
+        self.client.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_api_client():
+    """Get the process-wide API-Football client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ApiFootballClient()
+    return _client
@@ -0,0 +1,4 @@
+"""Player appearances updater package"""
+from .updater import AppearancesUpdater, fixture_appearances
+
+__all__ = ['AppearancesUpdater', 'fixture_appearances']
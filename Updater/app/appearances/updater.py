@@ -0,0 +1,158 @@
+from pymongo import DeleteMany, ReplaceOne
+from ..config import Config
+
+# Goal event details that do not count as a goal for the scorer
+NON_SCORING_GOAL_DETAILS = ("own goal", "missed penalty")
+
+# Fields of real_matches needed to build the appearances of a fixture
+APPEARANCE_SOURCE_PROJECTION = {
+    "fixture.id": 1,
+    "fixture.timestamp": 1,
+    "league.id": 1,
+    "league.season": 1,
+    "teams.home.id": 1,
+    "teams.home.name": 1,
+    "teams.away.id": 1,
+    "teams.away.name": 1,
+    "lineups.team": 1,
+    "lineups.startXI.player.id": 1,
+    "lineups.startXI.player.name": 1,
+    "events": 1,
+}
+
+REBUILD_BATCH_SIZE = 500
+
+
+def fixture_appearances(real_match):
+    """One row per player who appeared in the fixture (startXI, or came on as sub: the player
+    coming on is in the subst event's assist), with the player's goals, assists and cards"""
+    fixture = real_match.get("fixture") or {}
+    league = real_match.get("league") or {}
+    teams = real_match.get("teams") or {}
+    home = teams.get("home") or {}
+    away = teams.get("away") or {}
+    events = real_match.get("events") or []
+
+    rows = {}
+
+    def add(player, team, started):
+        if not player.get("id") or player["id"] in rows:
+            return
+        team_id = team.get("id")
+        is_home = team_id is not None and team_id == home.get("id")
+        side = home if is_home else away if team_id == away.get("id") else {}
+        opponent = away if is_home else home if side else {}
+        rows[player["id"]] = {
+            "fixture_id": fixture.get("id"),
+            "player_id": player["id"],
+            "player_name": player.get("name"),
+            "team_id": team_id,
+            "team_name": team.get("name") or side.get("name"),
+            "is_home": is_home,
+            "opponent_id": opponent.get("id"),
+            "opponent_name": opponent.get("name"),
+            "league_id": league.get("id"),
+            "season": league.get("season"),
+            "timestamp": fixture.get("timestamp"),
+            "started": started,
+            "goals": 0,
+            "assists": 0,
+            "yellow_cards": 0,
+            "red_cards": 0,
+        }
+
+    for lineup in real_match.get("lineups") or []:
+        for player_info in lineup.get("startXI") or []:
+            add(player_info.get("player") or {}, lineup.get("team") or {}, True)
+
+    for event in events:
+        if (event.get("type") or "").lower() == "subst":
+            add(event.get("assist") or {}, event.get("team") or {}, False)
+
+    for event in events:
+        event_type = (event.get("type") or "").lower()
+        detail = (event.get("detail") or "").lower()
+        player_row = rows.get((event.get("player") or {}).get("id"))
+        if event_type == "goal":
+            if player_row is not None and detail not in NON_SCORING_GOAL_DETAILS:
+                player_row["goals"] += 1
+            assist_row = rows.get((event.get("assist") or {}).get("id"))
+            if assist_row is not None:
+                assist_row["assists"] += 1
+        elif event_type == "card" and player_row is not None:
+            if "yellow" in detail:
+                player_row["yellow_cards"] += 1
+            elif "red" in detail:
+                player_row["red_cards"] += 1
+
+    return list(rows.values())
+
+
+class AppearancesUpdater:
+    """Keeps the player_appearances collection (one row per fixture and player who appeared)
+    in sync with the lineups and events stored in real_matches.
+
+    Called by the lineups, events and hydration updaters after they write a fixture, so the
+    Stats player endpoints can look appearances up by player instead of scanning real_matches.
+    """
+
+    def __init__(self):
+        self.db = Config.get_database()
+        self.collection_real_matches = self.db['real_matches']
+        self.collection_appearances = self.db['player_appearances']
+
+    def _sync_operations(self, real_match):
+        rows = fixture_appearances(real_match)
+        fixture_id = real_match["fixture"]["id"]
+        # Drop players no longer in the fixture (e.g. a corrected lineup), then upsert the rest
+        operations = [DeleteMany({"fixture_id": fixture_id, "player_id": {"$nin": [row["player_id"] for row in rows]}})]
+        operations.extend(
+            ReplaceOne({"fixture_id": fixture_id, "player_id": row["player_id"]}, row, upsert=True)
+            for row in rows
+        )
+        return operations
+
+    def sync_fixtures(self, fixture_ids):
+        """Rebuild the appearances of the given fixtures from real_matches. Returns the number of rows written"""
+        fixture_ids = [int(fixture_id) for fixture_id in fixture_ids]
+        if not fixture_ids:
+            return 0
+        operations = []
+        for real_match in self.collection_real_matches.find({"fixture.id": {"$in": fixture_ids}}, APPEARANCE_SOURCE_PROJECTION):
+            operations.extend(self._sync_operations(real_match))
+        if not operations:
+            return 0
+        result = self.collection_appearances.bulk_write(operations, ordered=True)
+        return result.upserted_count + result.modified_count
+
+    def rebuild(self, league_id=None, season=None, progress=None):
+        """Rebuild the appearances of every fixture with lineups or events, optionally of one
+        league and season, in batches of REBUILD_BATCH_SIZE fixtures"""
+        query = {"$or": [{"lineups.0": {"$exists": True}}, {"events.0": {"$exists": True}}]}
+        if league_id is not None:
+            query["league.id"] = int(league_id)
+        if season is not None:
+            query["league.season"] = int(season)
+
+        fixtures_total = self.collection_real_matches.count_documents(query)
+        fixtures_done = 0
+        rows_written = 0
+        operations = []
+        batch_fixtures = 0
+        for real_match in self.collection_real_matches.find(query, APPEARANCE_SOURCE_PROJECTION):
+            operations.extend(self._sync_operations(real_match))
+            batch_fixtures += 1
+            if batch_fixtures == REBUILD_BATCH_SIZE:
+                result = self.collection_appearances.bulk_write(operations, ordered=True)
+                rows_written += result.upserted_count + result.modified_count
+                fixtures_done += batch_fixtures
+                operations, batch_fixtures = [], 0
+                if progress is not None:
+                    progress(fixtures_done=fixtures_done, fixtures_total=fixtures_total)
+        if operations:
+            result = self.collection_appearances.bulk_write(operations, ordered=True)
+            rows_written += result.upserted_count + result.modified_count
+            fixtures_done += batch_fixtures
+
+        print(f"Rebuilt player appearances of {fixtures_done} fixtures ({rows_written} rows written)")
+        return {"fixtures": fixtures_done, "rows_written": rows_written}
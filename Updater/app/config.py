@@ -1,4 +1,5 @@
 import os
+import threading
 from dotenv import load_dotenv
 from pymongo import MongoClient
 
@@ -11,6 +12,41 @@ class Config:
     # API Configuration
     RAPIDAPI_KEY = os.getenv('RAPIDAPI_KEY')
     RAPIDAPI_HOST = os.getenv('RAPIDAPI_HOST')
+    API_POOL_SIZE = int(os.getenv('API_POOL_SIZE', '10'))
+    API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', '10'))
+    API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', '30'))
+    API_RATE_LIMIT_PER_MINUTE = int(os.getenv('API_RATE_LIMIT_PER_MINUTE', '300'))
+    API_RATE_LIMIT_SAFETY = float(os.getenv('API_RATE_LIMIT_SAFETY', '0.9'))
+    API_RATE_LIMIT_BURST_SECONDS = float(os.getenv('API_RATE_LIMIT_BURST_SECONDS', '2'))
+    # Updater processes calling the API (supervisord runs the scheduler and the API server). With
+    # more than one the Mongo bucket is shared by default; local buckets each get 1/API_PROCESSES
+    API_PROCESSES = int(os.getenv('API_PROCESSES', '2'))
+    API_RATE_LIMIT_BACKEND = os.getenv('API_RATE_LIMIT_BACKEND', 'mongo' if API_PROCESSES > 1 else 'local')
+    # API response cache (Mongo collection api_response_cache), see app.response_cache
+    API_CACHE_ENABLED = os.getenv('API_CACHE_ENABLED', 'true').lower() == 'true'
+    API_CACHE_LIVE_TTL = int(os.getenv('API_CACHE_LIVE_TTL', '15'))
+    API_CACHE_FIXTURES_TTL = int(os.getenv('API_CACHE_FIXTURES_TTL', '600'))
+    API_CACHE_SETTLED_AFTER_SECONDS = int(os.getenv('API_CACHE_SETTLED_AFTER_SECONDS', '10800'))
+    # Fixtures fetched in parallel by the statistics/lineups/events updaters (1 = sequential)
+    DETAIL_WORKERS = int(os.getenv('DETAIL_WORKERS', '8'))
+    # Leagues whose standings are fetched in parallel by the standings crons
+    STANDINGS_WORKERS = int(os.getenv('STANDINGS_WORKERS', '8'))
+    # Player pages fetched in parallel by the player syncs
+    PLAYER_PAGE_WORKERS = int(os.getenv('PLAYER_PAGE_WORKERS', '4'))
+    # Fetch statistics/lineups/events through /fixtures?ids= (20 fixtures per call) instead of per fixture
+    FIXTURE_HYDRATION = os.getenv('FIXTURE_HYDRATION', 'true').lower() == 'true'
+    # Background job workers behind the long-running admin endpoints
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '2'))
+    JOB_STALE_SECONDS = float(os.getenv('JOB_STALE_SECONDS', '300'))
+    # Claims of a job before one that keeps losing its worker is failed instead of requeued
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+    BACKFILL_CHECKPOINT_TTL_DAYS = float(os.getenv('BACKFILL_CHECKPOINT_TTL_DAYS', '7'))
+    # Adaptive live polling (app.cron.live_poller) instead of the 5-minute league sweep
+    LIVE_POLLING = os.getenv('LIVE_POLLING', 'true').lower() == 'true'
+    LIVE_POLL_INTERVAL_SECONDS = float(os.getenv('LIVE_POLL_INTERVAL_SECONDS', '60'))
+    LIVE_DETAILS_INTERVAL_SECONDS = float(os.getenv('LIVE_DETAILS_INTERVAL_SECONDS', '180'))
+    FINISHED_DETAILS_INTERVAL_SECONDS = float(os.getenv('FINISHED_DETAILS_INTERVAL_SECONDS', '900'))
     
     # Database Configuration
     MONGODB_HOST = os.getenv('MONGODB_HOST')
@@ -18,6 +54,13 @@ class Config:
     MONGODB_USERNAME = os.getenv('MONGODB_USERNAME')
     MONGODB_PASSWORD = os.getenv('MONGODB_PASSWORD')
     MONGODB_DATABASE = os.getenv('MONGODB_DATABASE')
+    # Connection pool of the process-wide MongoClient shared by every updater
+    MONGODB_MAX_POOL_SIZE = int(os.getenv('MONGODB_MAX_POOL_SIZE', '50'))
+    MONGODB_MIN_POOL_SIZE = int(os.getenv('MONGODB_MIN_POOL_SIZE', '0'))
+    MONGODB_MAX_IDLE_TIME_MS = int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', '300000'))
+
+    _mongodb_client = None
+    _mongodb_client_lock = threading.Lock()
     
     @classmethod
     def get_api_headers(cls):
@@ -29,16 +72,35 @@ class Config:
     
     @classmethod
     def get_mongodb_client(cls):
-        """Get MongoDB client connection"""
-        print(f"Connecting to MongoDB: {cls.MONGODB_HOST}:{cls.MONGODB_PORT}")
-        print(f"Username: {cls.MONGODB_USERNAME}")
-        print(f"Database: {cls.MONGODB_DATABASE}")
-        return MongoClient(
-            cls.MONGODB_HOST, 
-            cls.MONGODB_PORT, 
-            username=cls.MONGODB_USERNAME,
-            password=cls.MONGODB_PASSWORD
-        )
+        """Get the process-wide MongoDB client, connecting on first use.
+
+        MongoClient is thread-safe and pools its connections, so every updater shares one
+        instance instead of paying for a new pool, monitor threads and auth handshake.
+        """
+        if cls._mongodb_client is None:
+            with cls._mongodb_client_lock:
+                if cls._mongodb_client is None:
+                    print(f"Connecting to MongoDB: {cls.MONGODB_HOST}:{cls.MONGODB_PORT}")
+                    print(f"Username: {cls.MONGODB_USERNAME}")
+                    print(f"Database: {cls.MONGODB_DATABASE}")
+                    cls._mongodb_client = MongoClient(
+                        cls.MONGODB_HOST,
+                        cls.MONGODB_PORT,
+                        username=cls.MONGODB_USERNAME,
+                        password=cls.MONGODB_PASSWORD,
+                        maxPoolSize=cls.MONGODB_MAX_POOL_SIZE,
+                        minPoolSize=cls.MONGODB_MIN_POOL_SIZE,
+                        maxIdleTimeMS=cls.MONGODB_MAX_IDLE_TIME_MS
+                    )
+        return cls._mongodb_client
+
+    @classmethod
+    def close_mongodb_client(cls):
+        """Close the shared MongoDB client; the next get_database() reconnects"""
+        with cls._mongodb_client_lock:
+            if cls._mongodb_client is not None:
+                cls._mongodb_client.close()
+                cls._mongodb_client = None
     
     @classmethod
     def get_database(cls):
@@ -51,4 +113,10 @@ class Config:
         """Get array of match statuses that indicate a finished match"""
         return ["FT", "AET", "PEN", "PST", "CANC"]
 
+    @staticmethod
+    def get_settled_match_status_array():
+        """Get array of match statuses whose fixture data can no longer change (postponed and
+        cancelled fixtures can still be rescheduled)"""
+        return ["FT", "AET", "PEN"]
+
     
\ No newline at end of file
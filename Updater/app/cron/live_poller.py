@@ -0,0 +1,168 @@
+"""
+Adaptive live polling, run every minute by the scheduler in place of the 5-minute sweep of
+matches_updater_daily (see Config.LIVE_POLLING).
+
+Each run reads from real_matches which fixtures of the daily-update leagues kicked off in the
+last DETAIL_UPDATE_HOURS_AFTER_KICKOFF hours. Leagues with nothing kicked off cost no API call.
+Otherwise:
+- /fixtures?live=all (one call for every live match) refreshes score and status of the
+  in-play fixtures, at most every LIVE_POLL_INTERVAL_SECONDS;
+- fixtures that were in play and dropped out of the live feed are refreshed through
+  /fixtures?ids= straight away, which picks up their final status and details;
+- details of in-play fixtures are refreshed every LIVE_DETAILS_INTERVAL_SECONDS, and of
+  finished ones every FINISHED_DETAILS_INTERVAL_SECONDS until the detail window closes.
+"""
+import datetime
+import math
+import threading
+import time
+
+from ..config import Config
+from ..utils import MatchUpdater
+from ..hydration.updater import HydrationUpdater, FIXTURES_IDS_BATCH_SIZE
+from .matches_updater_daily import DETAIL_UPDATE_WINDOW_SECONDS
+
+# API-Football statuses of a fixture that is being played
+IN_PLAY_STATUSES = ["1H", "HT", "2H", "ET", "BT", "P", "SUSP", "INT", "LIVE"]
+
+# Runs start a little less than a minute apart (scheduler wake-up and thread start-up jitter), so
+# intervals are compared with this slack; otherwise a 60s interval would skip every other run
+INTERVAL_TOLERANCE_SECONDS = 5
+
+
+class LivePoller:
+    """Keeps per-fixture refresh times between runs, so it must live as long as the scheduler"""
+
+    def __init__(self):
+        self.match_updater = MatchUpdater()
+        self.hydration_updater = HydrationUpdater()
+        self.last_live_poll = None
+        self.last_refreshed = {}
+
+    def _due(self, fixture_id, interval, now):
+        last = self.last_refreshed.get(fixture_id)
+        return last is None or now - last >= interval - INTERVAL_TOLERANCE_SECONDS
+
+    def fetch_daily_leagues(self):
+        """Map league_id -> current season of the active leagues with daily updates"""
+        settings = self.match_updater.collection_settings.find(
+            {"is_active": True, "daily_update": True},
+            {"league_id": 1, "season": 1}
+        )
+        return {int(setting["league_id"]): setting.get("season") for setting in settings if setting.get("league_id") is not None}
+
+    def fetch_kicked_off_fixtures(self, league_ids, now_ts):
+        """Fixtures of the given leagues that kicked off within the detail window"""
+        return list(self.match_updater.collection_real_matches.find(
+            {
+                "league.id": {"$in": list(league_ids)},
+                "fixture.timestamp": {"$gte": now_ts - DETAIL_UPDATE_WINDOW_SECONDS, "$lte": now_ts}
+            },
+            {"fixture.id": 1, "fixture.status.short": 1, "league.id": 1, "league.season": 1}
+        ))
+
+    def get_live_fixtures_from_api(self):
+        print("Getting live fixtures from API")
+        return self.match_updater._make_api_request_with_retry("/fixtures?live=all").get("response", [])
+
+    def poll(self):
+        """Run one polling round and return a summary of what was refreshed"""
+        now = time.monotonic()
+        now_ts = datetime.datetime.today().timestamp()
+        summary = {"in_play": 0, "live": 0, "refreshed": 0, "api_calls": 0}
+
+        leagues = self.fetch_daily_leagues()
+        fixtures = self.fetch_kicked_off_fixtures(leagues.keys(), now_ts) if leagues else []
+        finished_statuses = Config.get_finished_match_status_array()
+        in_play = {}
+        finished = {}
+        for fixture in fixtures:
+            status = fixture["fixture"].get("status", {}).get("short")
+            target = finished if status in finished_statuses else in_play
+            target[fixture["fixture"]["id"]] = fixture
+        summary["in_play"] = len(in_play)
+
+        # Forget fixtures that left the detail window
+        self.last_refreshed = {
+            fixture_id: refreshed_at for fixture_id, refreshed_at in self.last_refreshed.items()
+            if fixture_id in in_play or fixture_id in finished
+        }
+
+        if not in_play and not finished:
+            print("No fixtures kicked off in the daily leagues; nothing to poll")
+            return summary
+
+        to_refresh = []
+        live_poll_due = self.last_live_poll is None or now - self.last_live_poll >= Config.LIVE_POLL_INTERVAL_SECONDS - INTERVAL_TOLERANCE_SECONDS
+        if in_play and live_poll_due:
+            self.last_live_poll = now
+            live_fixtures = [
+                fixture for fixture in self.get_live_fixtures_from_api()
+                if fixture["league"]["id"] in leagues
+            ]
+            summary["api_calls"] += 1
+            summary["live"] = len(live_fixtures)
+            changed_ids = set(self.match_updater.add_real_matches({"response": live_fixtures}))
+            live_ids = {fixture["fixture"]["id"] for fixture in live_fixtures}
+
+            for fixture_id, fixture in in_play.items():
+                if fixture_id in live_ids:
+                    if fixture_id not in changed_ids:
+                        # Same fingerprint as the last poll: nothing happened, details cannot have changed
+                        continue
+                    interval = Config.LIVE_DETAILS_INTERVAL_SECONDS
+                elif fixture["fixture"]["status"]["short"] in IN_PLAY_STATUSES:
+                    # Was in play and left the live feed: it just ended
+                    interval = 0
+                else:
+                    # Kickoff time passed but not started (delayed or postponed)
+                    interval = Config.FINISHED_DETAILS_INTERVAL_SECONDS
+                if self._due(fixture_id, interval, now):
+                    to_refresh.append(fixture_id)
+
+        for fixture_id in finished:
+            if self._due(fixture_id, Config.FINISHED_DETAILS_INTERVAL_SECONDS, now):
+                to_refresh.append(fixture_id)
+
+        if to_refresh:
+            # Daily update: details are not marked as checked, the full update still rechecks them
+            summary["refreshed"] = self.hydration_updater.hydrate_fixtures(
+                to_refresh, full_update=False, refresh_fixtures=True
+            )
+            summary["api_calls"] += math.ceil(len(to_refresh) / FIXTURES_IDS_BATCH_SIZE)
+            for fixture_id in to_refresh:
+                self.last_refreshed[fixture_id] = now
+
+            refreshed_ids = set(to_refresh)
+            touched_leagues = {
+                (fixture["league"]["id"], fixture["league"]["season"])
+                for fixture_id, fixture in {**in_play, **finished}.items() if fixture_id in refreshed_ids
+            }
+            for league_id, season in touched_leagues:
+                self.hydration_updater._update_available_seasons(league_id, season)
+                self.match_updater.update_league_daily_update(league_id)
+
+        return summary
+
+
+_live_poller = None
+_live_poller_lock = threading.Lock()
+
+
+def perform_live_update():
+    """Perform one live polling round with the process-wide LivePoller"""
+    global _live_poller
+    with _live_poller_lock:
+        if _live_poller is None:
+            _live_poller = LivePoller()
+    started = time.monotonic()
+    summary = _live_poller.poll()
+    print(
+        f"Live update: {summary['in_play']} fixtures in play, {summary['live']} in the live feed, "
+        f"{summary['refreshed']} refreshed with {summary['api_calls']} API calls in {time.monotonic() - started:.1f}s"
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    perform_live_update()
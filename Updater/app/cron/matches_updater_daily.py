@@ -3,6 +3,7 @@ from ..utils import MatchUpdater
 from ..events.updater import EventsUpdater
 from ..statistics.updater import StatisticsUpdater
 from ..lineups.updater import LineupsUpdater
+from ..hydration.updater import HydrationUpdater
 from ..config import Config
 
 # Keep refreshing events/statistics/lineups for finished matches until this long after kickoff.
@@ -81,6 +82,7 @@ def perform_daily_update():
     events_updater = EventsUpdater()
     statistics_updater = StatisticsUpdater()
     lineups_updater = LineupsUpdater()
+    hydration_updater = HydrationUpdater()
     leagues = fetch_leagues_to_update_daily(updater)
     
     for league in leagues:
@@ -93,19 +95,32 @@ def perform_daily_update():
                 date=(today - datetime.timedelta(days=1)).strftime('%Y-%m-%d'),
                 date_to=today.strftime('%Y-%m-%d')
             )
-            updater.add_real_matches(matches)
+            changed_ids = set(updater.add_real_matches(matches))
             # Pass matches["response"] since the updaters expect a list of match dictionaries
             matches_list = matches.get("response", [])
             now_ts = datetime.datetime.today().timestamp()
+            finished_statuses = Config.get_finished_match_status_array()
 
+            # Live matches whose fixture fingerprint did not change (no goal, no minute ticked)
+            # cannot have new details; finished ones keep refreshing within the detail window
             matches_for_details = [
                 match for match in matches_list
                 if should_update_match_details(match, now_ts)
+                and (match["fixture"]["id"] in changed_ids or match["fixture"]["status"]["short"] in finished_statuses)
             ]
 
-            events_updater.update_events_by_matches(matches_for_details, league_id, season)
-            statistics_updater.update_statistics_by_matches(matches_for_details, league_id, season)
-            lineups_updater.update_lineups_by_matches(matches_for_details, league_id, season)
+            if Config.FIXTURE_HYDRATION:
+                hydration_updater.hydrate_by_matches(matches_for_details, league_id, season)
+            else:
+                events_updater.update_events_by_matches(matches_for_details, league_id, season)
+                statistics_updater.update_statistics_by_matches(matches_for_details, league_id, season)
+                final_lineups = lineups_updater.fixtures_with_final_lineups(
+                    [match["fixture"]["id"] for match in matches_for_details]
+                )
+                lineups_updater.update_lineups_by_matches(
+                    [match for match in matches_for_details if match["fixture"]["id"] not in final_lineups],
+                    league_id, season
+                )
 
             updater.update_league_daily_update(league_id)
             print("OK")
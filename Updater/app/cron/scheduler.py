@@ -0,0 +1,153 @@
+"""
+Long-running scheduler that replaces the crontab (matches_updater_cron).
+
+Runs the perform_* functions of the cron package on cron-style schedules inside one process,
+so the Mongo client, API client and rate limiter stay warm between runs. A job that is still
+running when its next slot comes is skipped instead of starting a second copy.
+
+Usage (started by supervisord next to uvicorn):
+    python -m app.cron.scheduler
+"""
+import datetime
+import threading
+import time
+import traceback
+
+from ..config import Config
+from .leagues_updater import perform_leagues_update
+from .live_poller import perform_live_update
+from .matches_updater_daily import perform_daily_update
+from .matches_updater_full import perform_full_update
+from .standings_updater_daily import perform_standings_daily_update
+from .standings_updater_matchday_hourly import perform_matchday_standings_update
+from .user_stats_rebuild import perform_user_stats_rebuild
+
+
+class CronSchedule:
+    """Standard 5-field cron expression (minute hour day-of-month month day-of-week).
+
+    Each field accepts *, */n, a, a-b, a-b/n and comma separated lists of those.
+    """
+
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid cron expression '{expression}': expected 5 fields")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.FIELD_RANGES)
+        ]
+
+    @staticmethod
+    def _parse_field(field, low, high):
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step = part.split("/")
+                step = int(step)
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = (int(value) for value in part.split("-"))
+            else:
+                start = int(part)
+                end = start if step == 1 else high
+            if start < low or end > high:
+                raise ValueError(f"Cron field '{field}' out of range {low}-{high}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def matches(self, moment):
+        # cron counts weekdays from Sunday = 0, Python from Monday = 0
+        return (
+            moment.minute in self.minutes
+            and moment.hour in self.hours
+            and moment.day in self.days
+            and moment.month in self.months
+            and (moment.weekday() + 1) % 7 in self.weekdays
+        )
+
+
+class ScheduledJob:
+    """A function run on a cron schedule, never more than one run at a time"""
+
+    def __init__(self, name, schedule, func):
+        self.name = name
+        self.schedule = CronSchedule(schedule)
+        self.func = func
+        self.lock = threading.Lock()
+        self.last_started_at = None
+        self.last_duration = None
+
+    def run_if_idle(self):
+        """Start the job in a thread unless the previous run is still going"""
+        if not self.lock.acquire(blocking=False):
+            print(f"Scheduler: skipping {self.name}, previous run started at {self.last_started_at} is still running")
+            return False
+        threading.Thread(target=self._run, name=f"scheduler-{self.name}", daemon=True).start()
+        return True
+
+    def _run(self):
+        started = time.monotonic()
+        self.last_started_at = datetime.datetime.today().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            self.func()
+        except Exception as e:
+            traceback.print_exc()
+            print(f"Scheduler: {self.name} failed: {str(e)}")
+        finally:
+            self.last_duration = time.monotonic() - started
+            print(f"Scheduler: {self.name} finished in {self.last_duration:.1f}s")
+            self.lock.release()
+
+
+# Same schedules as the former matches_updater_cron (container local time, UTC)
+SCHEDULED_JOBS = [
+    ScheduledJob("matches_updater_full", "0 0 * * *", perform_full_update),
+    # The live poller decides every minute what is worth an API call
+    ScheduledJob("live_poller", "* * * * *", perform_live_update) if Config.LIVE_POLLING
+    else ScheduledJob("matches_updater_daily", "*/5 * * * *", perform_daily_update),
+    ScheduledJob("leagues_updater", "0 1 * * *", perform_leagues_update),
+    ScheduledJob("standings_updater_daily", "30 23 * * *", perform_standings_daily_update),
+    ScheduledJob("standings_updater_matchday_hourly", "15 * * * *", perform_matchday_standings_update),
+    ScheduledJob("user_stats_rebuild", "30 3 * * *", perform_user_stats_rebuild),
+]
+
+
+class Scheduler:
+    """Wake up at every minute boundary and start the jobs whose schedule matches"""
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.stop_event = threading.Event()
+
+    def run(self):
+        print(f"Scheduler started with jobs: {', '.join(f'{job.name} ({job.schedule.expression})' for job in self.jobs)}")
+        next_minute = self._next_minute(datetime.datetime.today())
+        while not self.stop_event.is_set():
+            wait_seconds = (next_minute - datetime.datetime.today()).total_seconds()
+            if wait_seconds < -60:
+                # Fell behind (suspended process, clock change): resume from now instead of replaying
+                print(f"Scheduler: skipped {int(-wait_seconds // 60)} minute(s)")
+                next_minute = self._next_minute(datetime.datetime.today())
+                continue
+            if wait_seconds > 0 and self.stop_event.wait(wait_seconds):
+                break
+            for job in self.jobs:
+                if job.schedule.matches(next_minute):
+                    job.run_if_idle()
+            next_minute += datetime.timedelta(minutes=1)
+
+    def stop(self):
+        self.stop_event.set()
+
+    @staticmethod
+    def _next_minute(moment):
+        return moment.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+
+
+if __name__ == "__main__":
+    Scheduler(SCHEDULED_JOBS).run()
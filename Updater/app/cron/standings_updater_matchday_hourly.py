@@ -37,24 +37,27 @@ def perform_matchday_standings_update():
     )
 
     standings_updater = StandingsUpdater()
-    settings_coll = match_updater.collection_settings
-    updated = 0
+    seasons_by_league = {
+        setting["league_id"]: setting.get("season")
+        for setting in match_updater.collection_settings.find(
+            {"league_id": {"$in": league_ids}},
+            {"league_id": 1, "season": 1}
+        )
+    }
+    league_seasons = []
     for league_id in league_ids:
-        setting = settings_coll.find_one({"league_id": league_id})
-        if not setting:
+        if league_id not in seasons_by_league:
             print(f"Skip league {league_id}: not in league_settings")
             continue
-        season = setting.get("season")
+        season = seasons_by_league[league_id]
         if season is None:
             print(f"Skip league {league_id}: no current season in league_settings")
             continue
-        try:
-            standings_updater.update_standings_by_league_and_season(league_id, season)
-            updated += 1
-        except Exception as e:
-            print(f"Standings update failed league={league_id} season={season}: {e}")
+        league_seasons.append((league_id, season))
 
-    print(f"Matchday hourly standings finished; updated {updated} league(s).")
+    summary = standings_updater.update_standings_for_leagues(league_seasons)
+    StandingsUpdater.print_run_summary("Matchday hourly standings", summary)
+    return summary
 
 
 if __name__ == "__main__":
@@ -0,0 +1,16 @@
+import datetime
+from ..user_stats import UserStatsRebuilder
+
+
+def perform_user_stats_rebuild():
+    """
+    Recompute every user_stats document from the users' matches, reconciling increments that
+    were lost (see app.user_stats). Schedule: 3:30 daily (see app.cron.scheduler).
+    """
+    print("Starting user_stats_rebuild.py")
+    print(datetime.datetime.today().strftime('%Y-%m-%d %H:%M:%S'))
+    return UserStatsRebuilder().rebuild()
+
+
+if __name__ == "__main__":
+    perform_user_stats_rebuild()
@@ -0,0 +1,20 @@
+"""Content fingerprints of API payloads, stored on real_matches under `fingerprints`.
+
+`fingerprints.fixture` hashes the FIXTURE_API_FIELDS of the fixture payload and
+`fingerprints.<statistics|lineups|events>` the detail payloads, so updaters can skip writes
+(and follow-up detail fetches) when the API returned the same content as last time.
+"""
+import hashlib
+import json
+
+FINGERPRINTS_FIELD = "fingerprints"
+
+
+def payload_fingerprint(payload):
+    """Stable hash of a JSON payload, independent of key order"""
+    serialized = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(serialized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def fingerprint_field(name):
+    return f"{FINGERPRINTS_FIELD}.{name}"
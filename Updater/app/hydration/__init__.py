@@ -0,0 +1,4 @@
+"""Fixture hydration updater package"""
+from .updater import HydrationUpdater
+
+__all__ = ['HydrationUpdater']
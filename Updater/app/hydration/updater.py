@@ -0,0 +1,180 @@
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import UpdateOne
+from ..config import Config
+from ..api_client import get_api_client
+from ..fingerprint import FINGERPRINTS_FIELD, fingerprint_field, payload_fingerprint
+from ..utils import MatchUpdater
+from ..appearances import AppearancesUpdater
+
+# /fixtures?ids= accepts at most this many fixture ids per call
+FIXTURES_IDS_BATCH_SIZE = 20
+
+class HydrationUpdater:
+    """Fill statistics, lineups and events of many fixtures at once through /fixtures?ids=
+
+    One call returns up to 20 fixtures with their events, lineups and statistics embedded,
+    replacing the three per-fixture calls of StatisticsUpdater, LineupsUpdater and EventsUpdater.
+    """
+
+    DATA_FIELDS = ("statistics", "lineups", "events")
+
+    def __init__(self):
+        self.db = Config.get_database()
+        self.collection_real_matches = self.db['real_matches']
+        self.collection_settings = self.db['league_settings']
+        self.api_client = get_api_client()
+
+    def _make_api_request_with_retry(self, endpoint, max_retries=5, retry_delay=5):
+        """Make an API request through the shared pooled client (see ApiFootballClient.request)"""
+        return self.api_client.request(endpoint, max_retries=max_retries, retry_delay=retry_delay)
+
+    def get_fixtures_from_api_by_ids(self, fixture_ids):
+        """Fetch up to FIXTURES_IDS_BATCH_SIZE fixtures with embedded details from external API"""
+        ids = "-".join(str(fixture_id) for fixture_id in fixture_ids)
+        print(f"Getting {len(fixture_ids)} fixtures from API by ids")
+        return self._make_api_request_with_retry(f"/fixtures?ids={ids}")
+
+    def _hydrate_batch(self, fixture_ids, full_update=True, refresh_fixtures=False):
+        """Fetch one batch of fixtures and write their changed details in a single bulk_write.
+        With refresh_fixtures, score and status from the same response are written too.
+        Returns the number of fixtures of the batch found in real_matches."""
+        try:
+            data_json = self.get_fixtures_from_api_by_ids(fixture_ids)
+        except Exception as e:
+            print(f"Error hydrating fixtures {fixture_ids}: {str(e)}")
+            return 0
+
+        if refresh_fixtures:
+            MatchUpdater().add_real_matches(data_json)
+
+        fixtures = data_json.get("response", [])
+        stored = {
+            real_match["fixture"]["id"]: real_match
+            for real_match in self.collection_real_matches.find(
+                {"fixture.id": {"$in": [fixture["fixture"]["id"] for fixture in fixtures]}},
+                {"fixture.id": 1, FINGERPRINTS_FIELD: 1, **{f"{field}_checked": 1 for field in self.DATA_FIELDS}}
+            )
+        }
+
+        # Only write the detail types whose content (or, on full updates, checked flag) changed
+        operations = []
+        appearance_fixture_ids = []
+        for fixture in fixtures:
+            real_match = stored.get(fixture["fixture"]["id"])
+            if real_match is None:
+                continue
+            stored_fingerprints = real_match.get(FINGERPRINTS_FIELD, {})
+            update_fields = {}
+            for field in self.DATA_FIELDS:
+                data = fixture.get(field) or []
+                fingerprint = payload_fingerprint(data)
+                checked_field = f"{field}_checked"
+                if stored_fingerprints.get(field) == fingerprint and (not full_update or real_match.get(checked_field) is True):
+                    continue
+                update_fields[field] = data
+                update_fields[checked_field] = full_update
+                update_fields[fingerprint_field(field)] = fingerprint
+            if update_fields:
+                operations.append(UpdateOne({"fixture.id": fixture["fixture"]["id"]}, {"$set": update_fields}))
+                if "lineups" in update_fields or "events" in update_fields:
+                    appearance_fixture_ids.append(fixture["fixture"]["id"])
+
+        if operations:
+            self.collection_real_matches.bulk_write(operations, ordered=False)
+        if appearance_fixture_ids:
+            AppearancesUpdater().sync_fixtures(appearance_fixture_ids)
+        return len(stored)
+
+    def hydrate_fixtures(self, fixture_ids, full_update=True, workers=None, checkpoint=None, refresh_fixtures=False):
+        """Hydrate the given fixtures in batches of FIXTURES_IDS_BATCH_SIZE. Returns the number of
+        real_matches updated. With a backfill checkpoint, completed fixtures are skipped and each
+        written batch is recorded."""
+        fixture_ids = [int(fixture_id) for fixture_id in fixture_ids]
+        if checkpoint is not None:
+            fixture_ids = checkpoint.pending(fixture_ids)
+        batches = [
+            fixture_ids[i:i + FIXTURES_IDS_BATCH_SIZE]
+            for i in range(0, len(fixture_ids), FIXTURES_IDS_BATCH_SIZE)
+        ]
+        workers = min(workers or Config.DETAIL_WORKERS, len(batches))
+
+        def hydrate(batch):
+            updated = self._hydrate_batch(batch, full_update, refresh_fixtures)
+            if updated and checkpoint is not None:
+                checkpoint.mark_done(batch)
+            return updated
+
+        if workers <= 1:
+            return sum(hydrate(batch) for batch in batches)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return sum(executor.map(hydrate, batches))
+
+    def _count_matches_with_data(self, league_id, season, data_field):
+        """Count finished matches that have data_field data"""
+        finished_statuses = Config.get_finished_match_status_array()
+        return self.collection_real_matches.count_documents({
+            "league.id": int(league_id),
+            "league.season": int(season),
+            "fixture.status.short": {"$in": finished_statuses},
+            data_field: {"$exists": True, "$nin": [None, []]}
+        })
+
+    def _update_available_seasons(self, league_id, season):
+        """Update available_seasons for a league with statistics, lineups and events counts"""
+        for field in self.DATA_FIELDS:
+            count = self._count_matches_with_data(league_id, season, field)
+            MatchUpdater.update_available_season(self.collection_settings, league_id, season, field, count)
+
+    def hydrate_by_league_and_season_full(self, league_id, season, workers=None, checkpoint=None):
+        """Hydrate all finished matches in a league and season"""
+        print(f"Hydrating fixtures (full) for league {league_id}, season {season}")
+
+        finished_statuses = Config.get_finished_match_status_array()
+        fixture_ids = self.collection_real_matches.distinct("fixture.id", {
+            "league.id": int(league_id),
+            "league.season": int(season),
+            "fixture.status.short": {"$in": finished_statuses}
+        })
+
+        updated_count = self.hydrate_fixtures(fixture_ids, full_update=True, workers=workers, checkpoint=checkpoint)
+        print(f"Hydrated {updated_count} fixtures for league {league_id}, season {season}")
+
+        self._update_available_seasons(league_id, season)
+        return updated_count
+
+    def hydrate_by_league_and_season_missing(self, league_id, season, workers=None, checkpoint=None):
+        """Hydrate finished matches missing statistics, lineups or events that were never checked"""
+        print(f"Hydrating fixtures (missing only) for league {league_id}, season {season}")
+
+        finished_statuses = Config.get_finished_match_status_array()
+        missing_conditions = [
+            {
+                "$and": [
+                    {"$or": [{field: {"$exists": False}}, {field: None}, {field: []}]},
+                    {"$or": [{f"{field}_checked": {"$exists": False}}, {f"{field}_checked": False}]}
+                ]
+            }
+            for field in self.DATA_FIELDS
+        ]
+        fixture_ids = self.collection_real_matches.distinct("fixture.id", {
+            "league.id": int(league_id),
+            "league.season": int(season),
+            "fixture.status.short": {"$in": finished_statuses},
+            "$or": missing_conditions
+        })
+
+        updated_count = self.hydrate_fixtures(fixture_ids, full_update=True, workers=workers, checkpoint=checkpoint)
+        print(f"Hydrated {updated_count} fixtures (missing only) for league {league_id}, season {season}")
+
+        self._update_available_seasons(league_id, season)
+        return updated_count
+
+    def hydrate_by_matches(self, matches_list, league_id, season):
+        """Hydrate a list of matches (daily update: details are not marked as checked)"""
+        fixture_ids = [match["fixture"]["id"] for match in matches_list]
+        updated_count = self.hydrate_fixtures(fixture_ids, full_update=False)
+        print(f"Hydrated {updated_count} fixtures (daily update) for league {league_id}")
+
+        self._update_available_seasons(league_id, season)
+        return updated_count
@@ -0,0 +1,232 @@
+"""Index management for the MegaGoal Mongo collections.
+
+Creates the compound and multikey indexes behind the hot queries of the Updater and Stats
+services, and verifies with explain() that none of those queries still runs a COLLSCAN.
+
+Usage:
+    python -m app.indexes            # create missing indexes, then verify
+    python -m app.indexes --verify   # only verify
+"""
+
+import argparse
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from .config import Config
+
+# collection -> list of (keys, options)
+INDEX_SPECS = {
+    "real_matches": [
+        # Unique: the live poller, hydration pools and job workers upsert on fixture.id concurrently
+        ([("fixture.id", ASCENDING)], {"unique": True}),
+        ([("league.id", ASCENDING), ("league.season", ASCENDING), ("fixture.status.short", ASCENDING)], {}),
+        ([("league.id", ASCENDING), ("fixture.timestamp", ASCENDING)], {}),
+        ([("fixture.timestamp", ASCENDING)], {}),
+        ([("teams.home.id", ASCENDING), ("league.season", ASCENDING)], {}),
+        ([("teams.away.id", ASCENDING), ("league.season", ASCENDING)], {}),
+        ([("lineups.startXI.player.id", ASCENDING)], {"sparse": True}),
+        ([("events.assist.id", ASCENDING)], {"sparse": True}),
+        ([("events.player.id", ASCENDING)], {"sparse": True}),
+    ],
+    "player_appearances": [
+        ([("fixture_id", ASCENDING), ("player_id", ASCENDING)], {"unique": True}),
+        ([("player_id", ASCENDING), ("season", ASCENDING), ("team_id", ASCENDING), ("timestamp", ASCENDING)], {}),
+    ],
+    "matches": [
+        ([("user.username", ASCENDING), ("league.id", ASCENDING), ("league.season", ASCENDING)], {}),
+        ([("fixture.id", ASCENDING), ("user.username", ASCENDING)], {}),
+        ([("user.username", ASCENDING), ("teams.home.id", ASCENDING)], {}),
+        ([("user.username", ASCENDING), ("teams.away.id", ASCENDING)], {}),
+    ],
+    "teams": [
+        ([("team.id", ASCENDING)], {}),
+        ([("seasons.league", ASCENDING), ("seasons.season", ASCENDING)], {}),
+    ],
+    "players": [
+        ([("player.id", ASCENDING)], {"unique": True}),
+        ([("teams.team.id", ASCENDING)], {}),
+    ],
+    "leagues": [
+        ([("league.id", ASCENDING)], {}),
+    ],
+    "league_settings": [
+        ([("league_id", ASCENDING)], {}),
+        ([("is_active", ASCENDING), ("daily_update", ASCENDING), ("next_match", ASCENDING)], {}),
+        ([("position", ASCENDING)], {}),
+    ],
+    "league_standings": [
+        ([("league_id", ASCENDING)], {}),
+    ],
+    "locations": [
+        ([("user.username", ASCENDING)], {}),
+    ],
+    "countries": [
+        ([("name", ASCENDING)], {"unique": True}),
+        ([("code", ASCENDING)], {"sparse": True}),
+    ],
+    "backfill_checkpoints": [
+        ([("league_id", ASCENDING), ("season", ASCENDING), ("data_type", ASCENDING), ("fixture_id", ASCENDING)], {}),
+        ([("completed_at", ASCENDING)], {"expireAfterSeconds": int(Config.BACKFILL_CHECKPOINT_TTL_DAYS * 86400)}),
+    ],
+    # user_stats is only read by _id, served by the default _id index (see HOT_QUERIES)
+    "jobs": [
+        ([("status", ASCENDING), ("created_at", ASCENDING)], {}),
+        ([("type", ASCENDING), ("status", ASCENDING), ("created_at", ASCENDING)], {}),
+        ([("status", ASCENDING), ("heartbeat_at", ASCENDING)], {}),
+    ],
+}
+
+# (description, collection, filter, sort) of the hot queries that must be served by an index
+HOT_QUERIES = [
+    ("real_matches by fixture", "real_matches", {"fixture.id": 0}, None),
+    ("finished real_matches by league and season", "real_matches",
+     {"league.id": 0, "league.season": 0, "fixture.status.short": {"$in": Config.get_finished_match_status_array()}}, None),
+    ("real_matches of a league today", "real_matches", {"league.id": 0, "fixture.timestamp": {"$gte": 0}}, None),
+    ("next match of a league", "real_matches", {"league.id": 0, "fixture.timestamp": {"$gte": 0}},
+     [("fixture.date", ASCENDING)]),
+    ("real_matches kicking off today", "real_matches", {"fixture.timestamp": {"$gte": 0, "$lt": 1}}, None),
+    ("real_matches of a team in a season", "real_matches",
+     {"league.season": 0, "$or": [{"teams.home.id": {"$in": [0]}}, {"teams.away.id": {"$in": [0]}}]}, None),
+    ("real_matches a player started", "real_matches", {"lineups.startXI.player.id": 0}, None),
+    ("real_matches a player came on", "real_matches", {"events.assist.id": 0}, None),
+    ("appearances of fixtures", "player_appearances", {"fixture_id": {"$in": [0]}}, None),
+    ("appearances of a player in fixtures", "player_appearances", {"player_id": 0, "fixture_id": {"$in": [0]}}, None),
+    ("appearances of a player in seasons", "player_appearances", {"player_id": 0, "season": {"$in": [0]}}, None),
+    ("appearances of a player for a team in a season", "player_appearances",
+     {"player_id": 0, "season": 0, "team_id": 0}, [("timestamp", DESCENDING)]),
+    ("matches of a user", "matches", {"user.username": ""}, None),
+    ("matches of a user in a league and season", "matches",
+     {"user.username": "", "league.id": 0, "league.season": 0}, None),
+    ("matches of a fixture", "matches", {"fixture.id": 0}, None),
+    ("matches of a user and team", "matches",
+     {"user.username": "", "$or": [{"teams.home.id": 0}, {"teams.away.id": 0}]}, None),
+    ("team by id", "teams", {"team.id": 0}, None),
+    ("teams of a league and season", "teams",
+     {"seasons": {"$elemMatch": {"league": "0", "season": "0"}}}, None),
+    ("player by id", "players", {"player.id": 0}, None),
+    ("league by id", "leagues", {"league.id": 0}, None),
+    ("league settings by league", "league_settings", {"league_id": 0}, None),
+    ("leagues to update daily", "league_settings",
+     {"is_active": True, "daily_update": True, "next_match": {"$gte": 0}}, None),
+    ("standings by league", "league_standings", {"league_id": 0}, None),
+    ("locations of a user", "locations", {"user.username": ""}, None),
+    ("scored matches of a user", "matches",
+     {"user.username": "", "goals.home": {"$exists": True, "$ne": None}, "goals.away": {"$exists": True, "$ne": None}}, None),
+    ("user_stats of a user", "user_stats", {"_id": ""}, None),
+    ("checkpointed step", "backfill_checkpoints", {"league_id": 0, "season": 0, "data_type": "", "fixture_id": None}, None),
+    ("checkpointed fixtures of a step", "backfill_checkpoints",
+     {"league_id": 0, "season": 0, "data_type": "", "fixture_id": {"$in": [0]}}, None),
+    ("next queued job", "jobs", {"status": "queued"}, [("created_at", ASCENDING)]),
+    ("active job of a type", "jobs",
+     {"type": "", "status": {"$in": ["queued", "running"]}}, [("created_at", ASCENDING)]),
+    ("stale running jobs", "jobs", {"status": "running", "heartbeat_at": {"$lt": 0}}, None),
+]
+
+
+# Detail fields of a real_match; the duplicate holding most of them is the one kept
+REAL_MATCH_DETAIL_FIELDS = ("statistics", "lineups", "events")
+
+
+def remove_duplicate_real_matches(db=None):
+    """Keep one real_matches document per fixture.id so the unique index can be built: the one
+    with most detail fields, then the most recently inserted. Returns the number removed."""
+    db = db if db is not None else Config.get_database()
+    collection = db["real_matches"]
+    removed = 0
+    for group in collection.aggregate([
+        {"$group": {"_id": "$fixture.id", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ], allowDiskUse=True):
+        documents = list(collection.aggregate([
+            {"$match": {"_id": {"$in": group["ids"]}}},
+            {"$project": {
+                field: {"$cond": [{"$isArray": f"${field}"}, {"$gt": [{"$size": f"${field}"}, 0]}, False]}
+                for field in REAL_MATCH_DETAIL_FIELDS
+            }},
+        ]))
+        kept = max(documents, key=lambda document: (sum(bool(document.get(field)) for field in REAL_MATCH_DETAIL_FIELDS), document["_id"]))
+        removed += collection.delete_many({"_id": {"$in": [document["_id"] for document in documents if document["_id"] != kept["_id"]]}}).deleted_count
+    if removed:
+        print(f"Removed {removed} duplicate real_matches documents")
+    return removed
+
+
+def _drop_non_unique_index(collection, keys):
+    """Drop an index on keys created without unique, so the unique version can replace it"""
+    for name, index in collection.index_information().items():
+        if index["key"] == keys and not index.get("unique"):
+            print(f"Dropping non-unique index {collection.name}.{name} to rebuild it unique")
+            collection.drop_index(name)
+
+
+def ensure_indexes(db=None):
+    """Create every index in INDEX_SPECS that does not exist yet. Idempotent.
+
+    Duplicate real_matches fixtures are removed first, and non-unique indexes whose spec became
+    unique are rebuilt. Returns {"created": {collection: [index names]}, "errors": [...],
+    "duplicates_removed": n}; errors lists the specs that conflict with an existing index or
+    cannot be built (e.g. duplicates under a unique key).
+    """
+    db = db if db is not None else Config.get_database()
+    report = {"created": {}, "errors": [], "duplicates_removed": remove_duplicate_real_matches(db)}
+    for collection_name, specs in INDEX_SPECS.items():
+        collection = db[collection_name]
+        names = []
+        for keys, options in specs:
+            try:
+                if options.get("unique"):
+                    _drop_non_unique_index(collection, keys)
+                names.extend(collection.create_indexes([IndexModel(keys, **options)]))
+            except OperationFailure as e:
+                # 85/86: an index on the same keys exists with other options; 11000: duplicates under a unique key
+                print(f"Index {collection_name}.{keys} not created: {e}")
+                report["errors"].append({"collection": collection_name, "keys": keys, "error": str(e)})
+        report["created"][collection_name] = names
+        print(f"Indexes ensured on {collection_name}: {names}")
+    return report
+
+
+def _plan_stages(plan):
+    """Yield every stage name of an explain() query plan tree"""
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+def verify_indexes(db=None):
+    """Explain every HOT_QUERIES entry and report the ones whose winning plan is a COLLSCAN"""
+    db = db if db is not None else Config.get_database()
+    results = []
+    for description, collection_name, query_filter, sort in HOT_QUERIES:
+        cursor = db[collection_name].find(query_filter)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning_plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        stages = list(_plan_stages(winning_plan))
+        collscan = "COLLSCAN" in stages
+        results.append({
+            "query": description,
+            "collection": collection_name,
+            "stages": stages,
+            "collscan": collscan,
+        })
+        print(f"{'COLLSCAN' if collscan else 'ok':8} {collection_name}: {description} ({' <- '.join(stages)})")
+
+    collscans = [result for result in results if result["collscan"]]
+    print(f"{len(collscans)} of {len(results)} hot queries still do a COLLSCAN")
+    return {"queries": results, "collscans": collscans}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create and verify MegaGoal Mongo indexes")
+    parser.add_argument("--verify", action="store_true", help="only verify, do not create indexes")
+    args = parser.parse_args()
+
+    if not args.verify:
+        ensure_indexes()
+    verify_indexes()
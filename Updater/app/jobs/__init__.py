@@ -0,0 +1,5 @@
+"""Background jobs package"""
+from .job_queue import JobQueue, JobWorkerPool
+from .handlers import JOB_HANDLERS
+
+__all__ = ['JobQueue', 'JobWorkerPool', 'JOB_HANDLERS']
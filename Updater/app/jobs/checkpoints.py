@@ -0,0 +1,150 @@
+import datetime
+import threading
+import time
+from pymongo import UpdateOne
+from ..config import Config
+
+
+class BackfillCheckpoints:
+    """Completion records of a backfill, one per (league, season, data type, fixture).
+
+    Season-level steps (matches, teams, players, standings) and finished fixture-level steps
+    are recorded with fixture_id None. Records expire after Config.BACKFILL_CHECKPOINT_TTL_DAYS
+    and are cleared when a backfill completes, so only interrupted runs are resumed.
+    """
+
+    def __init__(self, league_id, progress=None):
+        self.db = Config.get_database()
+        self.collection_checkpoints = self.db['backfill_checkpoints']
+        self.collection_checkpoints.create_index(
+            [("league_id", 1), ("season", 1), ("data_type", 1), ("fixture_id", 1)],
+            background=True
+        )
+        self.collection_checkpoints.create_index(
+            "completed_at",
+            expireAfterSeconds=int(Config.BACKFILL_CHECKPOINT_TTL_DAYS * 86400),
+            background=True
+        )
+        self.league_id = int(league_id)
+        self.progress = progress
+
+    def _key(self, season, data_type, fixture_id=None):
+        return {"league_id": self.league_id, "season": int(season), "data_type": data_type, "fixture_id": fixture_id}
+
+    def is_step_done(self, season, data_type):
+        return self.collection_checkpoints.count_documents(self._key(season, data_type), limit=1) > 0
+
+    def mark_step_done(self, season, data_type):
+        self.collection_checkpoints.update_one(
+            self._key(season, data_type),
+            {"$set": {"completed_at": datetime.datetime.now(datetime.timezone.utc)}},
+            upsert=True
+        )
+
+    def scope(self, season, data_type):
+        """Checkpoint handle passed to the fixture-level updaters for one season and data type"""
+        return FixtureCheckpoint(self, int(season), data_type)
+
+    def clear(self, seasons, data_types):
+        """Drop the checkpoints of a completed backfill"""
+        result = self.collection_checkpoints.delete_many({
+            "league_id": self.league_id,
+            "season": {"$in": [int(season) for season in seasons]},
+            "data_type": {"$in": list(data_types)}
+        })
+        return result.deleted_count
+
+
+class FixtureCheckpoint:
+    """Per-fixture checkpoints of one (league, season, data type) step"""
+
+    def __init__(self, checkpoints, season, data_type):
+        self.checkpoints = checkpoints
+        self.season = season
+        self.data_type = data_type
+        # Every fixture the step was asked to process, to tell afterwards whether some failed
+        self.fixture_ids = []
+
+    def _done(self, fixture_ids):
+        key = self.checkpoints._key(self.season, self.data_type)
+        key["fixture_id"] = {"$in": list(fixture_ids)}
+        return set(self.checkpoints.collection_checkpoints.distinct("fixture_id", key))
+
+    def pending(self, fixture_ids):
+        """Return the fixture ids not completed yet, preserving order"""
+        self.fixture_ids.extend(fixture_ids)
+        done = self._done(fixture_ids)
+        pending = [fixture_id for fixture_id in fixture_ids if fixture_id not in done]
+        if done:
+            print(f"Skipping {len(done)} fixtures already checkpointed for {self.data_type}, season {self.season}")
+        if self.checkpoints.progress is not None:
+            self.checkpoints.progress.advance(len(fixture_ids) - len(pending), skipped=True)
+        return pending
+
+    def remaining(self):
+        """Fixture ids of the step still not completed (they failed) once it has run"""
+        done = self._done(self.fixture_ids)
+        return [fixture_id for fixture_id in self.fixture_ids if fixture_id not in done]
+
+    def mark_done(self, fixture_ids):
+        if not fixture_ids:
+            return
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.checkpoints.collection_checkpoints.bulk_write([
+            UpdateOne(
+                self.checkpoints._key(self.season, self.data_type, fixture_id),
+                {"$set": {"completed_at": now}},
+                upsert=True
+            )
+            for fixture_id in fixture_ids
+        ], ordered=False)
+        if self.checkpoints.progress is not None:
+            self.checkpoints.progress.advance(len(fixture_ids))
+
+
+class BackfillProgress:
+    """Progress and ETA of a backfill measured in work units (one per fixture, or per
+    season-level step). Units skipped through checkpoints count as done but not towards the
+    processing rate, so the ETA stays accurate on resumed runs."""
+
+    REPORT_INTERVAL_SECONDS = 5
+
+    def __init__(self, report, units_total):
+        self.report = report
+        self.units_total = units_total
+        self.units_done = 0
+        self.units_processed = 0
+        self.started_at = time.monotonic()
+        self.last_report_at = 0
+        self.lock = threading.Lock()
+
+    def add_units(self, units):
+        """Grow the total when a step turns out larger than estimated"""
+        with self.lock:
+            self.units_total += units
+
+    def advance(self, units, skipped=False):
+        with self.lock:
+            self.units_done += units
+            if not skipped:
+                self.units_processed += units
+        self.publish()
+
+    def eta_seconds(self):
+        elapsed = time.monotonic() - self.started_at
+        if self.units_processed == 0:
+            return None
+        remaining = max(0, self.units_total - self.units_done)
+        return round(remaining * elapsed / self.units_processed)
+
+    def publish(self, force=False, **fields):
+        now = time.monotonic()
+        if not force and now - self.last_report_at < self.REPORT_INTERVAL_SECONDS:
+            return
+        self.last_report_at = now
+        self.report(
+            units_total=self.units_total,
+            units_done=min(self.units_done, self.units_total),
+            eta_seconds=self.eta_seconds(),
+            **fields
+        )
@@ -0,0 +1,231 @@
+"""Job handlers: each takes the job params and a progress(**fields) callback and returns the job result"""
+
+from ..config import Config
+from ..utils import MatchUpdater
+from ..players import PlayersUpdater
+from ..lineups import LineupsUpdater
+from ..events import EventsUpdater
+from ..statistics import StatisticsUpdater
+from ..standings import StandingsUpdater
+from ..hydration import HydrationUpdater
+from ..appearances import AppearancesUpdater
+from ..user_stats import UserStatsRebuilder
+from .checkpoints import BackfillCheckpoints, BackfillProgress
+
+
+def update_matches(params, progress):
+    updater = MatchUpdater()
+    updater.update_league_matches(params["league_id"], params["season"], full=False)
+    return {"message": f"Updated matches for league {params['league_id']} in season {params['season']}"}
+
+
+def update_leagues(params, progress):
+    updater = MatchUpdater()
+    updater.add_leagues()
+    return {"message": "Leagues updated"}
+
+
+def check_available_seasons(params, progress):
+    updater = MatchUpdater()
+    updater.check_and_update_available_seasons()
+    return {"message": "Available seasons checked and updated for all leagues"}
+
+
+def update_league_players(params, progress):
+    updater = PlayersUpdater()
+    player_count = updater.update_players_by_league_and_season(params["league_id"], params["season"])
+    return {"players_count": player_count}
+
+
+def crawl_player_profiles(params, progress):
+    updater = PlayersUpdater()
+    return updater.crawl_player_profiles(
+        workers=params.get("workers"),
+        max_pages=params.get("max_pages"),
+        progress=progress
+    )
+
+
+def rebuild_player_appearances(params, progress):
+    updater = AppearancesUpdater()
+    return updater.rebuild(league_id=params.get("league_id"), season=params.get("season"), progress=progress)
+
+
+def rebuild_user_stats(params, progress):
+    return UserStatsRebuilder().rebuild(username=params.get("username"), progress=progress)
+
+
+def _league_data_handler(updater_class, method_name, result_key):
+    """Build a handler that runs a league/season method accepting a workers override"""
+    def handler(params, progress):
+        updater = updater_class()
+        method = getattr(updater, method_name)
+        count = method(params["league_id"], params["season"], workers=params.get("workers"))
+        return {result_key: count}
+    return handler
+
+
+MULTI_SEASON_UPDATE_TYPES = [
+    "matches", "teams", "players",
+    "statistics", "statistics_missing",
+    "lineups", "lineups_missing",
+    "events", "events_missing",
+    "details", "details_missing",
+    "standings",
+]
+
+
+# Update types that work fixture by fixture and are checkpointed per fixture
+FIXTURE_UPDATE_TYPES = {
+    "statistics", "statistics_missing",
+    "lineups", "lineups_missing",
+    "events", "events_missing",
+    "details", "details_missing",
+}
+
+
+def _run_season_update(update_type, league_id, season, checkpoint=None):
+    """Run one update type of a multi-season update for one season"""
+    if update_type == "matches":
+        MatchUpdater().update_league_matches(league_id, season, full=False)
+    elif update_type == "teams":
+        MatchUpdater().update_teams_by_league_and_season(league_id, season)
+    elif update_type == "players":
+        PlayersUpdater().update_players_by_league_and_season(league_id, season)
+    elif update_type == "statistics":
+        StatisticsUpdater().update_statistics_by_league_and_season_full(league_id, season, checkpoint=checkpoint)
+    elif update_type == "statistics_missing":
+        StatisticsUpdater().update_statistics_by_league_and_season_missing(league_id, season, checkpoint=checkpoint)
+    elif update_type == "lineups":
+        LineupsUpdater().update_lineups_by_league_and_season_full(league_id, season, checkpoint=checkpoint)
+    elif update_type == "lineups_missing":
+        LineupsUpdater().update_lineups_by_league_and_season_missing(league_id, season, checkpoint=checkpoint)
+    elif update_type == "events":
+        EventsUpdater().update_events_by_league_and_season_full(league_id, season, checkpoint=checkpoint)
+    elif update_type == "events_missing":
+        EventsUpdater().update_events_by_league_and_season_missing(league_id, season, checkpoint=checkpoint)
+    elif update_type == "details":
+        HydrationUpdater().hydrate_by_league_and_season_full(league_id, season, checkpoint=checkpoint)
+    elif update_type == "details_missing":
+        HydrationUpdater().hydrate_by_league_and_season_missing(league_id, season, checkpoint=checkpoint)
+    elif update_type == "standings":
+        StandingsUpdater().update_standings_by_league_and_season(league_id, season)
+
+
+def _count_finished_fixtures(league_id, season):
+    """Number of finished fixtures of a league and season, used to estimate fixture-level work"""
+    return Config.get_database()['real_matches'].count_documents({
+        "league.id": int(league_id),
+        "league.season": int(season),
+        "fixture.status.short": {"$in": Config.get_finished_match_status_array()}
+    })
+
+
+def multi_season_update(params, progress):
+    """Run the selected update types for every season from season_from to season_to.
+
+    Every completed step and fixture is checkpointed in backfill_checkpoints, so rerunning an
+    interrupted backfill (or the job being requeued after a crash) skips the work already paid
+    for. A fixture-level step with failed fixtures is not marked done, so a rerun retries them. Pass restart=True to ignore existing checkpoints. Progress reports units done/total
+    and an ETA based on the rate of the work actually processed in this run.
+    """
+    league_id = params["league_id"]
+    season_from = params["season_from"]
+    season_to = params["season_to"]
+    update_types = [update_type for update_type in MULTI_SEASON_UPDATE_TYPES if params.get(f"update_{update_type}")]
+
+    results = {
+        "league_id": league_id,
+        "season_from": season_from,
+        "season_to": season_to,
+        "seasons_processed": [],
+        "total_updates": {update_type: 0 for update_type in MULTI_SEASON_UPDATE_TYPES},
+        "failed_fixtures": 0
+    }
+    seasons = list(range(season_from, season_to + 1))
+
+    checkpoints = BackfillCheckpoints(league_id)
+    if params.get("restart"):
+        cleared = checkpoints.clear(seasons, update_types)
+        print(f"Cleared {cleared} checkpoints for league {league_id}")
+
+    # One unit per season-level step, one per finished fixture for fixture-level steps
+    step_units = {}
+    for season in seasons:
+        fixtures_count = _count_finished_fixtures(league_id, season)
+        for update_type in update_types:
+            step_units[(season, update_type)] = fixtures_count if update_type in FIXTURE_UPDATE_TYPES else 1
+    tracker = BackfillProgress(progress, sum(step_units.values()))
+    checkpoints.progress = tracker
+    tracker.publish(force=True, seasons_total=len(seasons), seasons_done=0)
+
+    for index, season in enumerate(seasons):
+        season_result = {"season": season, "updates": {}}
+        for update_type in update_types:
+            estimated_units = step_units[(season, update_type)]
+            if checkpoints.is_step_done(season, update_type):
+                tracker.advance(estimated_units, skipped=True)
+                season_result["updates"][update_type] = "skipped (checkpoint)"
+                continue
+
+            tracker.publish(force=True, current_season=season, current_update=update_type)
+            units_before = tracker.units_done
+            failed_fixtures = []
+            if update_type in FIXTURE_UPDATE_TYPES:
+                checkpoint = checkpoints.scope(season, update_type)
+                _run_season_update(update_type, league_id, season, checkpoint=checkpoint)
+                failed_fixtures = checkpoint.remaining()
+            else:
+                _run_season_update(update_type, league_id, season)
+                tracker.advance(1)
+
+            # Reconcile the estimate with the fixtures the step actually had
+            step_done_units = tracker.units_done - units_before
+            if step_done_units < estimated_units:
+                tracker.advance(estimated_units - step_done_units, skipped=True)
+            elif step_done_units > estimated_units:
+                tracker.add_units(step_done_units - estimated_units)
+
+            if failed_fixtures:
+                # Leave the step open so a rerun retries only the fixtures that failed
+                season_result["updates"][update_type] = f"incomplete ({len(failed_fixtures)} fixtures failed)"
+                results["failed_fixtures"] += len(failed_fixtures)
+                continue
+            checkpoints.mark_step_done(season, update_type)
+            season_result["updates"][update_type] = "completed"
+            results["total_updates"][update_type] += 1
+
+        results["seasons_processed"].append(season_result)
+        tracker.publish(force=True, seasons_done=index + 1)
+        print(f"Season {season} processing completed for league {league_id}")
+
+    if results["failed_fixtures"]:
+        # Keep the checkpoints: rerunning the backfill resumes with the failed fixtures only
+        print(f"Multi-season update finished for league {league_id} with {results['failed_fixtures']} failed fixtures; rerun it to retry them")
+        print(f"Total updates performed: {results['total_updates']}")
+        return results
+
+    checkpoints.clear(seasons, update_types)
+    print(f"Multi-season update completed successfully for league {league_id}")
+    print(f"Total updates performed: {results['total_updates']}")
+    return results
+
+
+JOB_HANDLERS = {
+    "update_matches": update_matches,
+    "update_leagues": update_leagues,
+    "check_available_seasons": check_available_seasons,
+    "update_league_players": update_league_players,
+    "crawl_player_profiles": crawl_player_profiles,
+    "update_league_lineups": _league_data_handler(LineupsUpdater, "update_lineups_by_league_and_season_full", "lineups_count"),
+    "update_league_lineups_missing": _league_data_handler(LineupsUpdater, "update_lineups_by_league_and_season_missing", "lineups_count"),
+    "update_league_events": _league_data_handler(EventsUpdater, "update_events_by_league_and_season_full", "events_count"),
+    "update_league_events_missing": _league_data_handler(EventsUpdater, "update_events_by_league_and_season_missing", "events_count"),
+    "update_league_statistics": _league_data_handler(StatisticsUpdater, "update_statistics_by_league_and_season_full", "statistics_count"),
+    "update_league_statistics_missing": _league_data_handler(StatisticsUpdater, "update_statistics_by_league_and_season_missing", "statistics_count"),
+    "update_league_details": _league_data_handler(HydrationUpdater, "hydrate_by_league_and_season_full", "fixtures_count"),
+    "update_league_details_missing": _league_data_handler(HydrationUpdater, "hydrate_by_league_and_season_missing", "fixtures_count"),
+    "multi_season_update": multi_season_update,
+    "rebuild_player_appearances": rebuild_player_appearances,
+    "rebuild_user_stats": rebuild_user_stats,
+}
@@ -0,0 +1,206 @@
+import datetime
+import threading
+import traceback
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from ..config import Config
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+class JobQueue:
+    """Mongo-backed job queue stored in the `jobs` collection"""
+
+    def __init__(self):
+        self.db = Config.get_database()
+        self.collection_jobs = self.db['jobs']
+
+    def enqueue(self, job_type, params):
+        """Insert a queued job and return its id as a string"""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        result = self.collection_jobs.insert_one({
+            "type": job_type,
+            "params": params,
+            "status": JOB_QUEUED,
+            "progress": {},
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "heartbeat_at": None,
+            "attempts": 0,
+        })
+        print(f"Queued job {result.inserted_id} ({job_type}) with params {params}")
+        return str(result.inserted_id)
+
+    def get(self, job_id):
+        """Return a job document with a string id, or None if it does not exist"""
+        try:
+            job = self.collection_jobs.find_one({"_id": ObjectId(job_id)})
+        except InvalidId:
+            return None
+        if job:
+            job["_id"] = str(job["_id"])
+        return job
+
+    def find_active(self, job_type):
+        """Return the queued or running job of a type, or None"""
+        job = self.collection_jobs.find_one(
+            {"type": job_type, "status": {"$in": [JOB_QUEUED, JOB_RUNNING]}},
+            sort=[("created_at", 1)]
+        )
+        if job:
+            job["_id"] = str(job["_id"])
+        return job
+
+    def claim_next(self, worker_name):
+        """Atomically move the oldest queued job to running, counting the attempt, and return it"""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return self.collection_jobs.find_one_and_update(
+            {"status": JOB_QUEUED},
+            {
+                "$set": {"status": JOB_RUNNING, "worker": worker_name, "started_at": now, "heartbeat_at": now},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def update_progress(self, job_id, progress):
+        """Merge progress fields into the job and refresh its heartbeat"""
+        update_fields = {f"progress.{key}": value for key, value in progress.items()}
+        update_fields["heartbeat_at"] = datetime.datetime.now(datetime.timezone.utc)
+        self.collection_jobs.update_one({"_id": job_id}, {"$set": update_fields})
+
+    def heartbeat(self, job_ids):
+        """Mark running jobs as alive"""
+        if job_ids:
+            self.collection_jobs.update_many(
+                {"_id": {"$in": list(job_ids)}, "status": JOB_RUNNING},
+                {"$set": {"heartbeat_at": datetime.datetime.now(datetime.timezone.utc)}}
+            )
+
+    def complete(self, job_id, result):
+        self.collection_jobs.update_one({"_id": job_id}, {"$set": {
+            "status": JOB_COMPLETED,
+            "result": result,
+            "finished_at": datetime.datetime.now(datetime.timezone.utc),
+        }})
+
+    def fail(self, job_id, error):
+        self.collection_jobs.update_one({"_id": job_id}, {"$set": {
+            "status": JOB_FAILED,
+            "error": error,
+            "finished_at": datetime.datetime.now(datetime.timezone.utc),
+        }})
+
+    def requeue_stale(self, stale_seconds, max_attempts):
+        """Put back in the queue running jobs whose worker stopped sending heartbeats. Jobs that
+        were already claimed max_attempts times are failed instead, so a job that crashes or hangs
+        its worker does not loop forever"""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cutoff = now - datetime.timedelta(seconds=stale_seconds)
+        failed = self.collection_jobs.update_many(
+            {"status": JOB_RUNNING, "heartbeat_at": {"$lt": cutoff}, "attempts": {"$gte": max_attempts}},
+            {"$set": {
+                "status": JOB_FAILED,
+                "worker": None,
+                "error": f"Worker stopped sending heartbeats on each of {max_attempts} attempts",
+                "finished_at": now,
+            }}
+        )
+        if failed.modified_count:
+            print(f"Failed {failed.modified_count} stale jobs after {max_attempts} attempts")
+        result = self.collection_jobs.update_many(
+            {"status": JOB_RUNNING, "heartbeat_at": {"$lt": cutoff}},
+            {"$set": {"status": JOB_QUEUED, "worker": None}}
+        )
+        if result.modified_count:
+            print(f"Requeued {result.modified_count} stale jobs")
+        return result.modified_count
+
+
+class JobWorkerPool:
+    """Pool of worker threads that run queued jobs with the registered handlers"""
+
+    def __init__(self, handlers, workers=None, poll_interval=None, stale_seconds=None, max_attempts=None):
+        self.handlers = handlers
+        self.workers = workers or Config.JOB_WORKERS
+        self.poll_interval = poll_interval or Config.JOB_POLL_INTERVAL
+        self.stale_seconds = stale_seconds or Config.JOB_STALE_SECONDS
+        self.max_attempts = max_attempts or Config.JOB_MAX_ATTEMPTS
+        self.queue = JobQueue()
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.running_jobs = set()
+        self.running_jobs_lock = threading.Lock()
+
+    def start(self):
+        """Requeue jobs abandoned by a previous process and start the worker threads"""
+        self.queue.requeue_stale(self.stale_seconds, self.max_attempts)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, args=(f"worker-{i}",), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        heartbeat_thread = threading.Thread(target=self._heartbeat, daemon=True)
+        heartbeat_thread.start()
+        self.threads.append(heartbeat_thread)
+        print(f"Started job worker pool with {self.workers} workers")
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _heartbeat(self):
+        """Keep this pool's running jobs alive, and requeue jobs whose worker went away since.
+        A restart within stale_seconds leaves the old jobs with a fresh heartbeat, so checking
+        only at start would miss them."""
+        while not self.stop_event.wait(self.stale_seconds / 4):
+            with self.running_jobs_lock:
+                job_ids = set(self.running_jobs)
+            try:
+                self.queue.heartbeat(job_ids)
+            except Exception as e:
+                print(f"Job heartbeat failed: {str(e)}")
+            try:
+                self.queue.requeue_stale(self.stale_seconds, self.max_attempts)
+            except Exception as e:
+                print(f"Stale jobs check failed: {str(e)}")
+
+    def _work(self, worker_name):
+        while not self.stop_event.is_set():
+            try:
+                job = self.queue.claim_next(worker_name)
+            except Exception as e:
+                print(f"{worker_name} could not claim a job: {str(e)}")
+                job = None
+            if job is None:
+                self.stop_event.wait(self.poll_interval)
+                continue
+            self._run(job)
+
+    def _run(self, job):
+        job_id = job["_id"]
+        handler = self.handlers.get(job["type"])
+        if handler is None:
+            self.queue.fail(job_id, f"Unknown job type {job['type']}")
+            return
+
+        print(f"Running job {job_id} ({job['type']})")
+        with self.running_jobs_lock:
+            self.running_jobs.add(job_id)
+        try:
+            result = handler(job["params"], lambda **progress: self.queue.update_progress(job_id, progress))
+            self.queue.complete(job_id, result)
+            print(f"Job {job_id} ({job['type']}) completed")
+        except Exception as e:
+            traceback.print_exc()
+            self.queue.fail(job_id, str(e))
+            print(f"Job {job_id} ({job['type']}) failed: {str(e)}")
+        finally:
+            with self.running_jobs_lock:
+                self.running_jobs.discard(job_id)
@@ -1,10 +1,52 @@
-import http.client
-import json
 import datetime
-import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import UpdateOne
 from ..config import Config
+from ..api_client import get_api_client
 from ..utils import MatchUpdater
 
+def add_page_to_ranges(ranges, page):
+    """Return the sorted, merged [first, last] page ranges with `page` added"""
+    merged = []
+    for first, last in sorted([list(page_range) for page_range in ranges] + [[page, page]]):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return merged
+
+
+def page_in_ranges(ranges, page):
+    return any(first <= page <= last for first, last in ranges)
+
+
+def pages_in_ranges(ranges):
+    return sum(last - first + 1 for first, last in ranges)
+
+
+def prefetch(fetch, pages, workers):
+    """Yield fetch(page) for each page in order, with at most `workers` fetches in flight.
+
+    When the caller stops early (break on an empty page, or an exception) the queued fetches are
+    cancelled and only the ones already running are waited for, so no quota is spent on pages
+    past the stop."""
+    pages = iter(pages)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    window = deque(executor.submit(fetch, page) for _, page in zip(range(workers), pages))
+    try:
+        while window:
+            future = window.popleft()
+            next_page = next(pages, None)
+            if next_page is not None:
+                window.append(executor.submit(fetch, next_page))
+            yield future.result()
+    finally:
+        for future in window:
+            future.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
 class PlayersUpdater:
     """Utilities for player updating operations"""
     
@@ -13,86 +55,11 @@ class PlayersUpdater:
         self.collection_players = self.db['players']
         self.collection_settings = self.db['settings']
         self.collection_league_settings = self.db['league_settings']
-        self.headers = Config.get_api_headers()
-        self.url = Config.RAPIDAPI_HOST
+        self.api_client = get_api_client()
 
     def _make_api_request_with_retry(self, endpoint, max_retries=5, retry_delay=5):
-        """Make an API request with rate limit retry logic
-        
-        Args:
-            endpoint: The API endpoint to call
-            max_retries: Maximum number of retries (default: 5)
-            retry_delay: Delay in seconds between retries (default: 5)
-        
-        Returns:
-            dict: The JSON response from the API
-        
-        Raises:
-            Exception: If all retries are exhausted or if there's a non-rate-limit error
-        """
-        for attempt in range(max_retries):
-            try:
-                conn = http.client.HTTPSConnection(self.url)
-                conn.request("GET", endpoint, headers=self.headers)
-                response = conn.getresponse()
-                response_data = response.read()
-                
-                # Parse JSON response
-                try:
-                    json_response = json.loads(response_data)
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, check if it's a rate limit error in the raw response
-                    response_text = response_data.decode('utf-8', errors='ignore')
-                    if "rateLimit" in response_text or "Too many requests" in response_text:
-                        if attempt < max_retries - 1:
-                            print(f"Rate limit detected (attempt {attempt + 1}/{max_retries}). Waiting {retry_delay} seconds before retry...")
-                            time.sleep(retry_delay)
-                            continue
-                        else:
-                            raise Exception(f"Rate limit exceeded after {max_retries} attempts")
-                    else:
-                        raise Exception(f"Invalid JSON response: {response_text[:200]}")
-                
-                # Check for errors in the JSON response
-                if "errors" in json_response:
-                    errors = json_response.get("errors", {})
-                    
-                    # Check if it's a rate limit error (retry)
-                    if "rateLimit" in errors:
-                        if attempt < max_retries - 1:
-                            rate_limit_msg = errors.get("rateLimit", "Rate limit exceeded")
-                            print(f"Rate limit detected: {rate_limit_msg} (attempt {attempt + 1}/{max_retries}). Waiting {retry_delay} seconds before retry...")
-                            time.sleep(retry_delay)
-                            continue
-                        else:
-                            raise Exception(f"Rate limit exceeded after {max_retries} attempts: {errors.get('rateLimit', 'Unknown error')}")
-                    
-                    # Check if there are any other errors (don't retry, raise immediately)
-                    if errors:
-                        error_messages = []
-                        for key, value in errors.items():
-                            if isinstance(value, str):
-                                error_messages.append(f"{key}: {value}")
-                            else:
-                                error_messages.append(f"{key}: {json.dumps(value)}")
-                        
-                        error_str = "; ".join(error_messages)
-                        print(f"API error detected: {error_str}")
-                        raise Exception(f"API returned errors: {error_str}")
-                
-                # Success - return the response
-                return json_response
-                
-            except Exception as e:
-                # If it's the last attempt, raise the exception
-                if attempt == max_retries - 1:
-                    raise
-                # For other errors, wait and retry
-                print(f"API request failed (attempt {attempt + 1}/{max_retries}): {str(e)}. Waiting {retry_delay} seconds before retry...")
-                time.sleep(retry_delay)
-        
-        # This should never be reached, but just in case
-        raise Exception(f"Failed to make API request after {max_retries} attempts")
+        """Make an API request through the shared pooled client (see ApiFootballClient.request)"""
+        return self.api_client.request(endpoint, max_retries=max_retries, retry_delay=retry_delay)
 
     def player_exists(self, player_id):
         """Check if player exists in database"""
@@ -139,55 +106,74 @@ class PlayersUpdater:
         return self._make_api_request_with_retry(endpoint)
 
     def add_players_to_db(self, players_data):
-        """Add or update players in database"""
-        for player in players_data["response"]:
-            player_id = player["player"]["id"]
-            exists, existing_player = self.player_exists(player_id)
-            
-            if exists:
-                # Update existing player
-                query_filter = {"player.id": player_id}
-                self.collection_players.replace_one(query_filter, player)
-                print(f"Updated existing player {player_id}")
-            else:
-                # Insert new player
-                self.collection_players.insert_one(player)
-                print(f"Inserted new player {player_id}")
+        """Add or update the players of a /players/profiles page with one bulk_write. Profile
+        fields are $set, so teams gathered by the league syncs are kept."""
+        operations = [
+            UpdateOne(
+                {"player.id": player["player"]["id"]},
+                {"$set": {field: value for field, value in player.items() if field != "_id"}},
+                upsert=True
+            )
+            for player in players_data.get("response", [])
+        ]
+        if not operations:
+            return 0
+        result = self.collection_players.bulk_write(operations, ordered=False)
+        print(f"Players page written: {result.upserted_count} inserted, {result.matched_count} updated")
+        return len(operations)
 
-    def update_players_api_info(self, current_page, total_pages):
-        """Update or create PLAYERS_API_INFO document in settings collection"""
+    def get_players_api_info(self):
+        """Return PLAYERS_API_INFO with pages kept as pages_searched_ranges. A legacy
+        pages_searched list is converted to ranges the first time it is read."""
         query_filter = {"type": "PLAYERS_API_INFO"}
-        
-        # Get existing document
-        existing_doc = self.collection_settings.find_one(query_filter)
-        
-        if existing_doc:
-            # Update existing document
-            pages_searched = existing_doc.get("pages_searched", [])
-            if current_page not in pages_searched:
-                pages_searched.append(current_page)
-                pages_searched.sort()
-            
-            update_doc = {
-                "$set": {
-                    "pages_searched": pages_searched,
-                    "total_pages": total_pages,
-                    "last_update": datetime.datetime.today()
-                }
-            }
-        else:
-            # Create new document
-            update_doc = {
-                "$set": {
-                    "type": "PLAYERS_API_INFO",
-                    "pages_searched": [current_page],
-                    "total_pages": total_pages,
-                    "last_update": datetime.datetime.today()
+        info = self.collection_settings.find_one(query_filter) or {}
+        if "pages_searched" in info:
+            ranges = info.get("pages_searched_ranges", [])
+            for page in info["pages_searched"]:
+                ranges = add_page_to_ranges(ranges, page)
+            self.collection_settings.update_one(query_filter, {
+                "$set": {"pages_searched_ranges": ranges, "pages_searched_count": pages_in_ranges(ranges)},
+                "$unset": {"pages_searched": ""}
+            })
+            info["pages_searched_ranges"] = ranges
+            info["pages_searched_count"] = pages_in_ranges(ranges)
+            del info["pages_searched"]
+        info.setdefault("pages_searched_ranges", [])
+        info.setdefault("pages_searched_count", 0)
+        info.setdefault("total_pages", 0)
+        return info
+
+    def update_players_api_info(self, current_page, total_pages, max_attempts=5):
+        """Record a searched page in PLAYERS_API_INFO (settings collection). Pages are stored as
+        merged [first, last] ranges, written with a compare-and-set on the previous ranges so
+        concurrent writers (the crawler job and single-page updates) do not drop pages."""
+        query_filter = {"type": "PLAYERS_API_INFO"}
+        for _ in range(max_attempts):
+            info = self.get_players_api_info()
+            ranges = info["pages_searched_ranges"]
+            if page_in_ranges(ranges, current_page) and info["total_pages"] == total_pages:
+                return
+            new_ranges = add_page_to_ranges(ranges, current_page)
+            update_doc = {"$set": {
+                "type": "PLAYERS_API_INFO",
+                "pages_searched_ranges": new_ranges,
+                "pages_searched_count": pages_in_ranges(new_ranges),
+                "total_pages": total_pages,
+                "last_update": datetime.datetime.today()
+            }}
+            if "_id" in info:
+                previous_ranges = {"pages_searched_ranges": ranges} if ranges else {
+                    "$or": [{"pages_searched_ranges": {"$exists": False}}, {"pages_searched_ranges": []}]
                 }
-            }
-        
-        self.collection_settings.update_one(query_filter, update_doc, upsert=True)
-        print(f"Updated PLAYERS_API_INFO: page {current_page} of {total_pages}")
+                result = self.collection_settings.update_one({**query_filter, **previous_ranges}, update_doc)
+                if result.matched_count:
+                    print(f"Updated PLAYERS_API_INFO: page {current_page} of {total_pages}")
+                    return
+            else:
+                self.collection_settings.update_one(query_filter, update_doc, upsert=True)
+                print(f"Updated PLAYERS_API_INFO: page {current_page} of {total_pages}")
+                return
+        print(f"Could not record page {current_page} in PLAYERS_API_INFO after {max_attempts} attempts")
 
     def update_players_by_page(self, page):
         """Update players for a specific page"""
@@ -210,6 +196,61 @@ class PlayersUpdater:
             "total_pages": total_pages
         }
 
+    def crawl_player_profiles(self, workers=None, max_pages=None, progress=None):
+        """Walk every /players/profiles page not searched yet, fetching up to `workers` pages at a
+        time (default Config.PLAYER_PAGE_WORKERS) and writing each page with one bulk_write.
+        Searched pages are recorded as ranges after every page, so an interrupted crawl resumes
+        where it stopped. `max_pages` caps the pages of one run; `progress(**fields)` reports."""
+        info = self.get_players_api_info()
+        total_pages = info["total_pages"]
+        if not total_pages:
+            result = self.update_players_by_page(1)
+            total_pages = result["total_pages"]
+            info = self.get_players_api_info()
+
+        ranges = info["pages_searched_ranges"]
+        pending = [page for page in range(1, total_pages + 1) if not page_in_ranges(ranges, page)]
+        if max_pages is not None:
+            pending = pending[:max_pages]
+        print(f"Crawling {len(pending)} player profile pages ({pages_in_ranges(ranges)} of {total_pages} already searched)")
+
+        page_workers = max(1, min(workers or Config.PLAYER_PAGE_WORKERS, len(pending) or 1))
+        pages_done = 0
+        players_written = 0
+        failed_pages = []
+
+        def fetch(page):
+            try:
+                return page, self.get_players_from_api_by_page(page), None
+            except Exception as e:
+                return page, None, str(e)
+
+        for page, players_data, error in prefetch(fetch, pending, page_workers):
+            if error is not None:
+                print(f"Error crawling player profiles page {page}: {error}")
+                failed_pages.append(page)
+                continue
+            players_written += self.add_players_to_db(players_data)
+            total_pages = players_data.get("paging", {}).get("total", total_pages)
+            self.update_players_api_info(page, total_pages)
+            pages_done += 1
+            if progress is not None:
+                progress(
+                    pages_total=len(pending),
+                    pages_done=pages_done,
+                    pages_failed=len(failed_pages),
+                    players_written=players_written
+                )
+
+        info = self.get_players_api_info()
+        return {
+            "pages_crawled": pages_done,
+            "pages_failed": failed_pages,
+            "players_written": players_written,
+            "pages_searched_count": info["pages_searched_count"],
+            "total_pages": info["total_pages"],
+        }
+
     def get_player_teams_from_api(self, player_id):
         """Get player teams from API"""
         endpoint = f"/players/teams?player={player_id}"
@@ -236,70 +277,81 @@ class PlayersUpdater:
         print(f"Updated teams for player {player_id}")
         return True
 
-    def update_players_by_league_and_season(self, league_id, season):
-        """Update players for a league and season with pagination"""
+    def _player_team_season_operations(self, player, team, season):
+        """Bulk operations adding `season` to the player's entry for `team`, without reading the
+        player: create the player if missing, push the team if missing, then $addToSet the season
+        on the matched team entry (positional $). They must run in order (ordered bulk_write)."""
+        player_id = player["id"]
+        team_id = team["id"]
+        return [
+            UpdateOne(
+                {"player.id": player_id},
+                {"$setOnInsert": {"player": player, "teams": []}},
+                upsert=True
+            ),
+            UpdateOne(
+                {"player.id": player_id, "teams.team.id": {"$ne": team_id}},
+                {"$push": {"teams": {"team": team, "seasons": []}}}
+            ),
+            UpdateOne(
+                {"player.id": player_id, "teams": {"$elemMatch": {"team.id": team_id}}},
+                {"$addToSet": {"teams.$.seasons": season}}
+            ),
+        ]
+
+    def _add_league_players_page(self, players_response, league_id, season):
+        """Write one page of /players?league=&season= with a single bulk_write. Returns the
+        number of players of the page that played for a team in the league."""
+        operations = []
+        for player_data in players_response:
+            # Only the first team the player had in this league counts
+            stat = next(
+                (
+                    stat for stat in player_data.get("statistics", [])
+                    if stat.get("team") and stat.get("league", {}).get("id") == league_id
+                ),
+                None
+            )
+            if stat is not None:
+                operations.extend(self._player_team_season_operations(player_data["player"], stat["team"], season))
+
+        if operations:
+            self.collection_players.bulk_write(operations, ordered=True)
+        return len(operations) // 3
+
+    def update_players_by_league_and_season(self, league_id, season, workers=None):
+        """Update players for a league and season. The first page gives the page count, the
+        remaining pages are prefetched up to `workers` at a time (default Config.PLAYER_PAGE_WORKERS)
+        and each page is written with one bulk_write. The first empty page ends the update and
+        cancels the prefetches queued behind it."""
         print(f"Updating players for league {league_id}, season {season}")
-        
-        page = 1
+        league_id = int(league_id)
+        season = int(season)
+
+        first_page = self.get_players_from_api_by_league_and_season(league_id, season, 1)
+        total_pages = first_page.get("paging", {}).get("total", 1)
+
+        def fetch(page):
+            return self.get_players_from_api_by_league_and_season(league_id, season, page)
+
+        def pages():
+            yield first_page
+            remaining_pages = range(2, total_pages + 1)
+            page_workers = min(workers or Config.PLAYER_PAGE_WORKERS, len(remaining_pages))
+            if page_workers <= 1:
+                yield from map(fetch, remaining_pages)
+                return
+            yield from prefetch(fetch, remaining_pages, page_workers)
+
         total_players = 0
-        
-        while True:
-            # Get players from API for current page
-            players_data = self.get_players_from_api_by_league_and_season(league_id, season, page)
+        for players_data in pages():
             players_response = players_data.get("response", [])
-            
             if not players_response:
                 break
-            
-            # Process each player
-            for player_data in players_response:
-                player_id = player_data["player"]["id"]
-                statistics = player_data.get("statistics", [])
-                
-                # Extract team information from statistics
-                for stat in statistics:
-                    if stat.get("team") and stat.get("league", {}).get("id") == league_id:
-                        team_info = {
-                            "team": stat["team"]
-                        }
-                        
-                        # Check if player exists
-                        exists, existing_player = self.player_exists(player_id)
-                        
-                        if exists:
-                            # Update existing player with team information
-                            print(f"Updating player {player_id} ({player_data['player']['name']}) with team {team_info['team']['name']} for season {season}")
-                            updated_player = self.add_team_to_player(existing_player, team_info, season)
-                            self.collection_players.update_one(
-                                {"player.id": player_id},
-                                {"$set": {"teams": updated_player["teams"]}}
-                            )
-                        else:
-                            # Create new player with team information
-                            new_player = {
-                                "player": player_data["player"],
-                                "teams": [{
-                                    "team": team_info["team"],
-                                    "seasons": [season]
-                                }]
-                            }
-                            self.collection_players.insert_one(new_player)
-                        
-                        total_players += 1
-                        break  # Only process the first matching team for this league
-            
-            # Check if there are more pages
-            paging = players_data.get("paging", {})
-            current_page = paging.get("current", page)
-            total_pages = paging.get("total", 1)
-            
+            total_players += self._add_league_players_page(players_response, league_id, season)
+            current_page = players_data.get("paging", {}).get("current")
             print(f"Page {current_page} of {total_pages} processed for league {league_id}, season {season}. Total players added/updated so far: {total_players}")
-            
-            if current_page >= total_pages:
-                break
-            
-            page += 1
-        
+
         # Update available_seasons with players count
         self.update_available_season_with_players(league_id, season, total_players)
         
@@ -0,0 +1,166 @@
+import threading
+import time
+from pymongo import ReturnDocument
+from .config import Config
+
+# Per-minute quota headers sent by API-Football (direct and through RapidAPI)
+MINUTE_LIMIT_HEADERS = ("x-ratelimit-limit",)
+MINUTE_REMAINING_HEADERS = ("x-ratelimit-remaining",)
+# Daily quota headers
+DAILY_LIMIT_HEADERS = ("x-ratelimit-requests-limit",)
+DAILY_REMAINING_HEADERS = ("x-ratelimit-requests-remaining",)
+
+
+def _header_int(headers, names):
+    """Return the first header in names that parses as an int, or None"""
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class TokenBucketRateLimiter:
+    """Process-wide token bucket that paces API calls just below the per-minute quota.
+
+    The bucket refills continuously at `rate_per_minute * safety_factor * share` tokens per minute,
+    where share is the fraction of the quota this process may use (1 unless several processes
+    pace themselves with local buckets). Quota headers from each response adjust the refill rate
+    to the real plan limit and cap the available tokens to what the API says is left in the
+    current minute.
+    """
+
+    def __init__(self, rate_per_minute=None, safety_factor=None, capacity=None, share=1.0):
+        self.safety_factor = safety_factor or Config.API_RATE_LIMIT_SAFETY
+        self.share = share
+        self.lock = threading.Lock()
+        self.daily_limit = None
+        self.daily_remaining = None
+        self._set_rate(rate_per_minute or Config.API_RATE_LIMIT_PER_MINUTE, capacity)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _set_rate(self, rate_per_minute, capacity=None):
+        self.rate_per_minute = rate_per_minute
+        self.rate_per_second = rate_per_minute * self.safety_factor * self.share / 60.0
+        # Allow a short burst of at most a few seconds worth of calls
+        self.capacity = capacity or max(1.0, self.rate_per_second * Config.API_RATE_LIMIT_BURST_SECONDS)
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_second)
+            self.updated_at = now
+
+    def _try_acquire(self):
+        """Take one token if available. Returns 0 on success, else seconds to wait."""
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate_per_second
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            wait = self._try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def _cap_tokens(self, remaining):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, remaining)
+
+    def update_from_headers(self, headers):
+        """Adjust pacing from the quota headers of an API response"""
+        minute_limit = _header_int(headers, MINUTE_LIMIT_HEADERS)
+        if minute_limit and minute_limit != self.rate_per_minute:
+            with self.lock:
+                print(f"API per-minute limit is {minute_limit}, pacing at {minute_limit * self.safety_factor * self.share:.0f}/min")
+                self._set_rate(minute_limit)
+                self.tokens = min(self.tokens, self.capacity)
+
+        minute_remaining = _header_int(headers, MINUTE_REMAINING_HEADERS)
+        if minute_remaining is not None:
+            # Keep one call in reserve so concurrent workers never hit the 429 path
+            self._cap_tokens(max(0, minute_remaining - 1))
+
+        daily_limit = _header_int(headers, DAILY_LIMIT_HEADERS)
+        daily_remaining = _header_int(headers, DAILY_REMAINING_HEADERS)
+        if daily_limit is not None:
+            self.daily_limit = daily_limit
+        if daily_remaining is not None:
+            self.daily_remaining = daily_remaining
+            if daily_remaining <= 0:
+                print("API daily quota exhausted")
+
+    def on_rate_limited(self):
+        """Drain the bucket after the API reported a rate limit so every worker backs off"""
+        self._cap_tokens(0)
+
+
+class MongoTokenBucketRateLimiter(TokenBucketRateLimiter):
+    """Token bucket shared by every Updater process through a document in `api_rate_limit`.
+
+    Refill and take are done in a single atomic find_one_and_update, so cron jobs and the
+    API server running side by side draw from the same per-minute budget.
+    """
+
+    def __init__(self, rate_per_minute=None, safety_factor=None, capacity=None, key="api-football"):
+        super().__init__(rate_per_minute, safety_factor, capacity)
+        self.collection = Config.get_database()['api_rate_limit']
+        self.key = key
+
+    def _bucket_update(self, take, cap=None):
+        now = time.time()
+        refilled = {
+            "$min": [
+                self.capacity,
+                {"$add": [
+                    {"$ifNull": ["$tokens", self.capacity]},
+                    {"$multiply": [
+                        {"$max": [0, {"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}]},
+                        self.rate_per_second
+                    ]}
+                ]}
+            ]
+        }
+        if cap is not None:
+            refilled = {"$min": [refilled, cap]}
+        pipeline = [
+            {"$set": {"tokens": refilled, "updated_at": now}},
+            {"$set": {"granted": {"$and": [take, {"$gte": ["$tokens", 1]}]}}},
+            {"$set": {"tokens": {"$cond": ["$granted", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+        ]
+        return self.collection.find_one_and_update(
+            {"_id": self.key},
+            pipeline,
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _try_acquire(self):
+        doc = self._bucket_update(take=True)
+        if doc.get("granted"):
+            return 0
+        return (1 - doc.get("tokens", 0)) / self.rate_per_second
+
+    def _cap_tokens(self, remaining):
+        self._bucket_update(take=False, cap=remaining)
+
+
+def create_rate_limiter():
+    """Build the rate limiter selected by API_RATE_LIMIT_BACKEND ('local' or 'mongo').
+
+    A local bucket only sees its own process, so with API_PROCESSES processes each one paces
+    at its share of the quota to keep their sum under the limit."""
+    if Config.API_RATE_LIMIT_BACKEND == "mongo":
+        return MongoTokenBucketRateLimiter()
+    return TokenBucketRateLimiter(share=1.0 / max(1, Config.API_PROCESSES))
@@ -0,0 +1,171 @@
+import datetime
+from urllib.parse import parse_qs, urlsplit
+from pymongo.errors import PyMongoError
+from .config import Config
+
+# Kept forever (until the cache collection is cleared)
+NEVER_EXPIRES = None
+
+# Static endpoints: path -> TTL in seconds. Endpoints not listed here and not handled by
+# ResponseCache.ttl_for are not cached.
+STATIC_ENDPOINT_TTLS = {
+    "/leagues": 24 * 3600,
+    "/countries": 7 * 24 * 3600,
+    "/teams": 24 * 3600,
+    "/players": 24 * 3600,
+    "/players/profiles": 7 * 24 * 3600,
+    "/players/teams": 7 * 24 * 3600,
+}
+
+FIXTURE_DETAIL_PATHS = ("/fixtures/statistics", "/fixtures/lineups", "/fixtures/events")
+
+# Details embedded in /fixtures?ids= responses
+FIXTURE_DETAIL_FIELDS = ("statistics", "lineups", "events")
+
+
+class ResponseCache:
+    """Mongo-backed cache of API-Football responses (collection `api_response_cache`).
+
+    TTLs are chosen per endpoint: static endpoints use STATIC_ENDPOINT_TTLS; fixture lists and
+    fixture details never expire once every fixture involved finished (FT/AET/PEN) more than
+    Config.API_CACHE_SETTLED_AFTER_SECONDS ago and, for /fixtures?ids=, embeds all its details;
+    responses with fixtures in play expire after Config.API_CACHE_LIVE_TTL and other fixture
+    lists after Config.API_CACHE_FIXTURES_TTL. Other endpoints and the live feed are never
+    stored, so they are neither looked up nor counted. Hits, misses and stores are counted per
+    endpoint path in `api_response_cache_stats`.
+    """
+
+    def __init__(self):
+        self.db = Config.get_database()
+        self.collection_cache = self.db['api_response_cache']
+        self.collection_real_matches = self.db['real_matches']
+        # Mongo removes expired entries; entries without expires_at are kept
+        self.collection_cache.create_index("expires_at", expireAfterSeconds=0, background=True)
+        self.collection_stats = self.db['api_response_cache_stats']
+
+    def _count(self, path, key):
+        """Count a hit, miss or store of a path in api_response_cache_stats, shared by the
+        scheduler and API processes"""
+        try:
+            self.collection_stats.update_one({"_id": path}, {"$inc": {key: 1}}, upsert=True)
+        except PyMongoError as e:
+            print(f"Response cache stats update failed for {path}: {str(e)}")
+
+    def get_metrics(self):
+        """Hits, misses and stores per path, counted by every process using the cache"""
+        per_path = {
+            stats["_id"]: {key: stats.get(key, 0) for key in ("hits", "misses", "stores")}
+            for stats in self.collection_stats.find()
+        }
+        hits = sum(counters["hits"] for counters in per_path.values())
+        misses = sum(counters["misses"] for counters in per_path.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else None,
+            "endpoints": per_path,
+        }
+
+    @staticmethod
+    def cacheable(endpoint):
+        """False for endpoints ttl_for never caches, whatever the response"""
+        split = urlsplit(endpoint)
+        if split.path == "/fixtures":
+            # The live feed is polled once per interval and must always be fresh
+            return "live" not in parse_qs(split.query)
+        return split.path in FIXTURE_DETAIL_PATHS or split.path in STATIC_ENDPOINT_TTLS
+
+    def get(self, endpoint):
+        """Return the cached response of an endpoint, or None"""
+        if not self.cacheable(endpoint):
+            return None
+        path = urlsplit(endpoint).path
+        try:
+            entry = self.collection_cache.find_one({"_id": endpoint}, {"response": 1, "expires_at": 1})
+        except PyMongoError as e:
+            print(f"Response cache read failed for {endpoint}: {str(e)}")
+            return None
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        # The TTL monitor runs once a minute, so expired entries can still be returned by find_one
+        if entry is None or (entry.get("expires_at") is not None and entry["expires_at"] <= now):
+            self._count(path, "misses")
+            return None
+        self._count(path, "hits")
+        return entry["response"]
+
+    def store(self, endpoint, response):
+        if not self.cacheable(endpoint):
+            return
+        ttl = self.ttl_for(endpoint, response)
+        if ttl is not None and ttl <= 0:
+            return
+        now = datetime.datetime.now(datetime.timezone.utc)
+        expires_at = None if ttl is NEVER_EXPIRES else now + datetime.timedelta(seconds=ttl)
+        try:
+            self.collection_cache.replace_one(
+                {"_id": endpoint},
+                {"response": response, "cached_at": now, "expires_at": expires_at},
+                upsert=True
+            )
+            self._count(urlsplit(endpoint).path, "stores")
+        except PyMongoError as e:
+            # e.g. responses above the 16MB document limit are just not cached
+            print(f"Response cache write failed for {endpoint}: {str(e)}")
+
+    def _fixtures_settled(self, fixtures):
+        """True if every fixture was played to the end more than the detail window ago"""
+        settled_statuses = Config.get_settled_match_status_array()
+        settled_before = datetime.datetime.now(datetime.timezone.utc).timestamp() - Config.API_CACHE_SETTLED_AFTER_SECONDS
+        return bool(fixtures) and all(
+            fixture.get("fixture", {}).get("status", {}).get("short") in settled_statuses
+            and (fixture.get("fixture", {}).get("timestamp") or 0) < settled_before
+            for fixture in fixtures
+        )
+
+    @staticmethod
+    def _details_complete(fixtures):
+        """True if every fixture embeds non-empty statistics, lineups and events"""
+        return all(fixture.get(field) for fixture in fixtures for field in FIXTURE_DETAIL_FIELDS)
+
+    def _any_in_play(self, fixtures):
+        """True if a fixture kicked off and is not finished yet"""
+        finished_statuses = Config.get_finished_match_status_array()
+        now_ts = datetime.datetime.now(datetime.timezone.utc).timestamp()
+        return any(
+            fixture.get("fixture", {}).get("status", {}).get("short") not in finished_statuses
+            and (fixture.get("fixture", {}).get("timestamp") or now_ts) <= now_ts
+            for fixture in fixtures
+        )
+
+    def ttl_for(self, endpoint, response):
+        """TTL in seconds for a response, NEVER_EXPIRES, or 0 to not cache it"""
+        split = urlsplit(endpoint)
+        path = split.path
+        query = parse_qs(split.query)
+        results = response.get("response") or []
+
+        if path == "/fixtures":
+            if "live" in query:
+                return 0
+            if self._any_in_play(results):
+                return Config.API_CACHE_LIVE_TTL
+            # ids= responses embed the fixture details; keep them only once every detail is there,
+            # so the hydration backfills can still fill details the API did not have yet
+            if self._fixtures_settled(results) and ("ids" not in query or self._details_complete(results)):
+                return NEVER_EXPIRES
+            return Config.API_CACHE_FIXTURES_TTL
+
+        if path in FIXTURE_DETAIL_PATHS:
+            fixture_id = (query.get("fixture") or [None])[0]
+            real_match = self.collection_real_matches.find_one(
+                {"fixture.id": int(fixture_id)},
+                {"fixture.status.short": 1, "fixture.timestamp": 1}
+            ) if fixture_id and fixture_id.isdigit() else None
+            if real_match is not None and results and self._fixtures_settled([real_match]):
+                return NEVER_EXPIRES
+            return Config.API_CACHE_LIVE_TTL
+
+        if path in STATIC_ENDPOINT_TTLS:
+            return STATIC_ENDPOINT_TTLS[path] if results else Config.API_CACHE_FIXTURES_TTL
+
+        return 0
@@ -1,5 +1,8 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
+from ..config import Config
 from ..utils import MatchUpdater
 
 
@@ -12,7 +15,8 @@ class StandingsUpdater:
 
     def update_standings_by_league_and_season(self, league_id, season):
         """
-        GET /standings?league=&season= and upsert into league_standings (one doc per league_id).
+        GET /standings?league=&season= and upsert the season entry into league_standings
+        (one doc per league_id, one entry per season in `seasons`).
         Returns True if API returned at least one standings block, False otherwise.
         """
         league_id = int(league_id)
@@ -50,29 +54,102 @@ class StandingsUpdater:
             "fetched_at": now,
         }
 
-        existing = self.collection_standings.find_one({"league_id": league_id})
-        if not existing:
-            self.collection_standings.insert_one({
-                "league_id": league_id,
-                "seasons": [season_entry],
-                "updated_at": now,
-            })
-            print(f"Inserted standings doc for league {league_id}, season {season}")
+        if self._upsert_season_entry(league_id, season, season_entry, now):
+            print(f"Updated standings for league {league_id}, season {season}")
             return True
+        print(f"Could not store standings for league {league_id}, season {season}")
+        return False
 
-        seasons = list(existing.get("seasons") or [])
-        replaced = False
-        for i, s in enumerate(seasons):
-            if s.get("season") == season:
-                seasons[i] = season_entry
-                replaced = True
-                break
-        if not replaced:
-            seasons.append(season_entry)
-
-        self.collection_standings.update_one(
-            {"league_id": league_id},
-            {"$set": {"seasons": seasons, "updated_at": now}},
+    def _upsert_season_entry(self, league_id, season, season_entry, now, max_attempts=3):
+        """
+        Store one season entry without reading or rewriting the other seasons. Each step is a
+        single atomic update, so concurrent runs for other seasons of the same league cannot
+        lose each other's writes:
+        1. replace the entry in place when the season exists (positional $);
+        2. otherwise $push it, guarded by the season not being there yet;
+        3. otherwise create the league document; if it already exists (the season was added
+           concurrently between the steps), start over.
+        """
+        for _ in range(max_attempts):
+            result = self.collection_standings.update_one(
+                {"league_id": league_id, "seasons.season": season},
+                {"$set": {"seasons.$": season_entry, "updated_at": now}},
+            )
+            if result.matched_count:
+                return True
+
+            result = self.collection_standings.update_one(
+                {"league_id": league_id, "seasons.season": {"$ne": season}},
+                {"$push": {"seasons": season_entry}, "$set": {"updated_at": now}},
+            )
+            if result.matched_count:
+                return True
+
+            result = self.collection_standings.update_one(
+                {"league_id": league_id},
+                {"$setOnInsert": {"seasons": [season_entry], "updated_at": now}},
+                upsert=True,
+            )
+            if result.upserted_id is not None:
+                return True
+        return False
+
+    def update_standings_for_leagues(self, league_seasons, workers=None):
+        """
+        Refresh standings for many (league_id, season) pairs, up to `workers` concurrently
+        (default Config.STANDINGS_WORKERS; the shared API client's rate limiter paces the calls).
+        Returns a run summary with counts, failures and per-league latency.
+        """
+        league_seasons = list(league_seasons)
+        workers = max(1, min(workers or Config.STANDINGS_WORKERS, len(league_seasons) or 1))
+
+        def update(league_season):
+            league_id, season = league_season
+            started = time.monotonic()
+            try:
+                updated = self.update_standings_by_league_and_season(league_id, season)
+                error = None
+            except Exception as e:
+                updated = False
+                error = str(e)
+                print(f"Standings update failed league={league_id} season={season}: {e}")
+            return league_id, season, updated, error, time.monotonic() - started
+
+        run_started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(update, league_seasons))
+
+        latencies = sorted(result[4] for result in results)
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))], 2)
+
+        return {
+            "leagues": len(results),
+            "updated": sum(1 for result in results if result[2]),
+            "empty": sum(1 for result in results if not result[2] and result[3] is None),
+            "failed": [
+                {"league_id": league_id, "season": season, "error": error}
+                for league_id, season, _, error, _ in results if error is not None
+            ],
+            "workers": workers,
+            "elapsed_seconds": round(time.monotonic() - run_started, 2),
+            "latency_seconds": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(latencies[-1], 2) if latencies else None,
+            },
+        }
+
+    @staticmethod
+    def print_run_summary(name, summary):
+        print(
+            f"{name} finished in {summary['elapsed_seconds']}s with {summary['workers']} workers: "
+            f"{summary['updated']}/{summary['leagues']} updated, {summary['empty']} without standings, "
+            f"{len(summary['failed'])} failed; latency p50={summary['latency_seconds']['p50']}s "
+            f"p95={summary['latency_seconds']['p95']}s max={summary['latency_seconds']['max']}s"
         )
-        print(f"Updated standings for league {league_id}, season {season}")
-        return True
+        for failure in summary["failed"]:
+            print(f"  failed league={failure['league_id']} season={failure['season']}: {failure['error']}")
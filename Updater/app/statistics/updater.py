@@ -1,7 +1,7 @@
-import http.client
-import json
-import time
+from concurrent.futures import ThreadPoolExecutor
 from ..config import Config
+from ..api_client import get_api_client
+from ..fingerprint import fingerprint_field, payload_fingerprint
 from ..utils import MatchUpdater
 
 class StatisticsUpdater:
@@ -11,89 +11,14 @@ class StatisticsUpdater:
         self.db = Config.get_database()
         self.collection_real_matches = self.db['real_matches']
         self.collection_settings = self.db['league_settings']
-        self.headers = Config.get_api_headers()
-        self.url = Config.RAPIDAPI_HOST
+        self.api_client = get_api_client()
         self.data_field = "statistics"
         self.data_field_checked = "statistics_checked"
         self.data_type = "statistics"
 
     def _make_api_request_with_retry(self, endpoint, max_retries=5, retry_delay=5):
-        """Make an API request with rate limit retry logic
-        
-        Args:
-            endpoint: The API endpoint to call
-            max_retries: Maximum number of retries (default: 5)
-            retry_delay: Delay in seconds between retries (default: 5)
-        
-        Returns:
-            dict: The JSON response from the API
-        
-        Raises:
-            Exception: If all retries are exhausted or if there's a non-rate-limit error
-        """
-        for attempt in range(max_retries):
-            try:
-                conn = http.client.HTTPSConnection(self.url)
-                conn.request("GET", endpoint, headers=self.headers)
-                response = conn.getresponse()
-                response_data = response.read()
-                
-                # Parse JSON response
-                try:
-                    json_response = json.loads(response_data)
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, check if it's a rate limit error in the raw response
-                    response_text = response_data.decode('utf-8', errors='ignore')
-                    if "rateLimit" in response_text or "Too many requests" in response_text:
-                        if attempt < max_retries - 1:
-                            print(f"Rate limit detected (attempt {attempt + 1}/{max_retries}). Waiting {retry_delay} seconds before retry...")
-                            time.sleep(retry_delay)
-                            continue
-                        else:
-                            raise Exception(f"Rate limit exceeded after {max_retries} attempts")
-                    else:
-                        raise Exception(f"Invalid JSON response: {response_text[:200]}")
-                
-                # Check for errors in the JSON response
-                if "errors" in json_response:
-                    errors = json_response.get("errors", {})
-                    
-                    # Check if it's a rate limit error (retry)
-                    if "rateLimit" in errors:
-                        if attempt < max_retries - 1:
-                            rate_limit_msg = errors.get("rateLimit", "Rate limit exceeded")
-                            print(f"Rate limit detected: {rate_limit_msg} (attempt {attempt + 1}/{max_retries}). Waiting {retry_delay} seconds before retry...")
-                            time.sleep(retry_delay)
-                            continue
-                        else:
-                            raise Exception(f"Rate limit exceeded after {max_retries} attempts: {errors.get('rateLimit', 'Unknown error')}")
-                    
-                    # Check if there are any other errors (don't retry, raise immediately)
-                    if errors:
-                        error_messages = []
-                        for key, value in errors.items():
-                            if isinstance(value, str):
-                                error_messages.append(f"{key}: {value}")
-                            else:
-                                error_messages.append(f"{key}: {json.dumps(value)}")
-                        
-                        error_str = "; ".join(error_messages)
-                        print(f"API error detected: {error_str}")
-                        raise Exception(f"API returned errors: {error_str}")
-                
-                # Success - return the response
-                return json_response
-                
-            except Exception as e:
-                # If it's the last attempt, raise the exception
-                if attempt == max_retries - 1:
-                    raise
-                # For other errors, wait and retry
-                print(f"API request failed (attempt {attempt + 1}/{max_retries}): {str(e)}. Waiting {retry_delay} seconds before retry...")
-                time.sleep(retry_delay)
-        
-        # This should never be reached, but just in case
-        raise Exception(f"Failed to make API request after {max_retries} attempts")
+        """Make an API request through the shared pooled client (see ApiFootballClient.request)"""
+        return self.api_client.request(endpoint, max_retries=max_retries, retry_delay=retry_delay)
 
     def _get_data_from_api(self, fixture_id: int):
         """Fetch fixture statistics from external API"""
@@ -111,14 +36,26 @@ class StatisticsUpdater:
             data_json = self._get_data_from_api(fixture_id)
             data_response = data_json.get("response", [])
 
-            # Upsert statistics field into real_matches
-            query_filter = {"fixture.id": int(fixture_id)}
-            update_doc = {"$set": {self.data_field: data_response, self.data_field_checked: full_update}}
+            # Write statistics into real_matches only if the content (or, on full updates, the checked flag) changed
+            fingerprint = payload_fingerprint(data_response)
+            fingerprint_key = fingerprint_field(self.data_type)
+            changed_conditions = [{fingerprint_key: {"$ne": fingerprint}}]
+            if full_update:
+                changed_conditions.append({self.data_field_checked: {"$ne": True}})
+            query_filter = {"fixture.id": int(fixture_id), "$or": changed_conditions}
+            update_doc = {"$set": {
+                self.data_field: data_response,
+                self.data_field_checked: full_update,
+                fingerprint_key: fingerprint
+            }}
             result = self.collection_real_matches.update_one(query_filter, update_doc)
 
             if result.matched_count == 0:
-                print(f"No real_match found for fixture {fixture_id} to update {self.data_type}")
-                return False
+                if self.collection_real_matches.count_documents({"fixture.id": int(fixture_id)}, limit=1) == 0:
+                    print(f"No real_match found for fixture {fixture_id} to update {self.data_type}")
+                    return False
+                print(f"{self.data_type.capitalize()} unchanged for fixture {fixture_id}")
+                return True
 
             print(f"Updated {self.data_type} for fixture {fixture_id}")
             return True
@@ -137,19 +74,28 @@ class StatisticsUpdater:
         })
         return count
 
-    def _update_matches(self, matches_list, full_update=True):
-        """Update matches from the provided list"""
-        updated_count = 0
-        
-        for match in matches_list:
-            fixture_id = match["fixture"]["id"]
+    def _update_matches(self, matches_list, full_update=True, workers=None, checkpoint=None):
+        """Update matches from the provided list, fetching up to `workers` fixtures concurrently
+        (default Config.DETAIL_WORKERS; the shared API client's rate limiter paces the calls).
+        With a backfill checkpoint, fixtures already completed are skipped and each success is recorded."""
+        fixture_ids = [match["fixture"]["id"] for match in matches_list]
+        if checkpoint is not None:
+            fixture_ids = checkpoint.pending(fixture_ids)
+        workers = min(workers or Config.DETAIL_WORKERS, len(fixture_ids))
+
+        def update(fixture_id):
             success = self.update_match_statistics(fixture_id, full_update)
-            if success:
-                updated_count += 1
-        
-        return updated_count
+            if success and checkpoint is not None:
+                checkpoint.mark_done([fixture_id])
+            return success
+
+        if workers <= 1:
+            return sum(1 for fixture_id in fixture_ids if update(fixture_id))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return sum(1 for success in executor.map(update, fixture_ids) if success)
 
-    def update_statistics_by_league_and_season_full(self, league_id, season):
+    def update_statistics_by_league_and_season_full(self, league_id, season, workers=None, checkpoint=None):
         """Update statistics for all finished matches in a league and season"""
         print(f"Updating {self.data_type} (full) for league {league_id}, season {season}")
         
@@ -160,7 +106,7 @@ class StatisticsUpdater:
             "fixture.status.short": {"$in": finished_statuses}
         })
         
-        updated_count = self._update_matches(list(matches), full_update=True)
+        updated_count = self._update_matches(list(matches), full_update=True, workers=workers, checkpoint=checkpoint)
         print(f"Updated {updated_count} {self.data_type} for league {league_id}, season {season}")
         
         # Count all matches with statistics data in database
@@ -169,7 +115,7 @@ class StatisticsUpdater:
         
         return total_count
 
-    def update_statistics_by_league_and_season_missing(self, league_id, season):
+    def update_statistics_by_league_and_season_missing(self, league_id, season, workers=None, checkpoint=None):
         """Update statistics only for finished matches that don't have statistics data"""
         print(f"Updating {self.data_type} (missing only) for league {league_id}, season {season}")
         
@@ -195,7 +141,7 @@ class StatisticsUpdater:
             ]
         })
         
-        updated_count = self._update_matches(list(matches), full_update=True)
+        updated_count = self._update_matches(list(matches), full_update=True, workers=workers, checkpoint=checkpoint)
         print(f"Updated {updated_count} {self.data_type} (missing only) for league {league_id}, season {season}")
         
         # Count all matches with statistics data in database
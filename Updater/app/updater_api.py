@@ -1,15 +1,21 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from typing import Optional
 import os
 import httpx
 import logging
+from .config import Config
+from .api_client import get_api_client
 from .utils import MatchUpdater
 from .players import PlayersUpdater
 from .lineups import LineupsUpdater
 from .events import EventsUpdater
 from .statistics import StatisticsUpdater
 from .standings import StandingsUpdater
+from .indexes import ensure_indexes, verify_indexes
+from .jobs import JobWorkerPool, JOB_HANDLERS
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -80,6 +86,28 @@ async def validate_admin(request: Request):
 
     return request
 
+# Long-running updates are queued in the `jobs` collection and run by this worker pool,
+# so a backfill never blocks the event loop. Poll /jobs/{job_id} for progress. The remaining
+# synchronous updater calls of the handlers run through run_in_threadpool for the same reason.
+job_worker_pool = JobWorkerPool(JOB_HANDLERS)
+
+@app.on_event("startup")
+def start_job_workers():
+    job_worker_pool.start()
+
+@app.on_event("shutdown")
+def stop_job_workers():
+    job_worker_pool.stop()
+    Config.close_mongodb_client()
+
+def enqueue_job(job_type, params, message):
+    """Queue a job and return its id immediately"""
+    try:
+        job_id = job_worker_pool.queue.enqueue(job_type, params)
+        return {"status": "queued", "message": message, "job_id": job_id}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 class UpdateRequest(BaseModel):
     league_id: int
     season: int
@@ -98,6 +126,10 @@ class UpdateStatisticsRequest(BaseModel):
 class UpdatePlayersRequest(BaseModel):
     page: int
 
+class CrawlPlayerProfilesRequest(BaseModel):
+    workers: Optional[int] = None
+    max_pages: Optional[int] = None
+
 class UpdatePlayerTeamsRequest(BaseModel):
     player_id: int
 
@@ -108,14 +140,29 @@ class UpdateLeaguePlayersRequest(BaseModel):
 class UpdateLeagueLineupsRequest(BaseModel):
     league_id: int
     season: int
+    workers: Optional[int] = None
 
 class UpdateLeagueEventsRequest(BaseModel):
     league_id: int
     season: int
+    workers: Optional[int] = None
 
 class UpdateLeagueStatisticsRequest(BaseModel):
     league_id: int
     season: int
+    workers: Optional[int] = None
+
+class UpdateLeagueDetailsRequest(BaseModel):
+    league_id: int
+    season: int
+    workers: Optional[int] = None
+
+class RebuildPlayerAppearancesRequest(BaseModel):
+    league_id: Optional[int] = None
+    season: Optional[int] = None
+
+class RebuildUserStatsRequest(BaseModel):
+    username: Optional[str] = None
 
 class MultiSeasonUpdateRequest(BaseModel):
     league_id: int
@@ -130,7 +177,10 @@ class MultiSeasonUpdateRequest(BaseModel):
     update_lineups_missing: bool = False
     update_events: bool = False
     update_events_missing: bool = False
+    update_details: bool = False
+    update_details_missing: bool = False
     update_standings: bool = False
+    restart: bool = False
 
 @app.get("/health/")
 async def health_check():
@@ -142,6 +192,25 @@ async def health_check():
         "cors_configured": True
     }
 
+@app.get("/api_cache_stats/")
+async def api_cache_stats(request: Request):
+    """Hit/miss counters of the API response cache per endpoint, counted in Mongo by every Updater
+    process and kept across restarts"""
+    await validate_admin(request)
+    response_cache = get_api_client().response_cache
+    if response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **response_cache.get_metrics()}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, request: Request):
+    """Status, progress and result of a queued job"""
+    await validate_admin(request)
+    job = job_worker_pool.queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
 @app.options("/check_available_seasons/")
 async def check_available_seasons_options():
     """Handle OPTIONS preflight for check_available_seasons"""
@@ -151,19 +220,14 @@ async def check_available_seasons_options():
 @app.post("/update_matches/")
 async def update_matches(req: UpdateRequest, request: Request):
     await validate_admin(request)
-    updater = MatchUpdater()
-    try:
-        updater.update_league_matches(req.league_id, req.season, full=False)
-        return {"status": "success", "message": f"Updated matches for league {req.league_id} in season {req.season}"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return enqueue_job("update_matches", dict(req), f"Matches update queued for league {req.league_id} in season {req.season}")
 
 @app.post("/update_league_current_season/")
 async def update_league_season(req: UpdateRequest, request: Request):
     await validate_admin(request)
     updater = MatchUpdater()
     try:
-        modified = updater.update_league_season(req.league_id, req.season)
+        modified = await run_in_threadpool(updater.update_league_season, req.league_id, req.season)
         if modified:
             return {"status": "success", "message": f"Season updated for league {req.league_id} to {req.season}"}
         else:
@@ -174,12 +238,7 @@ async def update_league_season(req: UpdateRequest, request: Request):
 @app.post("/update_leagues/")
 async def update_leagues(request: Request):
     await validate_admin(request)
-    updater = MatchUpdater()
-    try:
-        updater.add_leagues()
-        return {"status": "success", "message": "Leagues updated"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return enqueue_job("update_leagues", {}, "Leagues update queued")
 
 @app.post("/update_countries/")
 async def update_countries(request: Request):
@@ -187,7 +246,7 @@ async def update_countries(request: Request):
     await validate_admin(request)
     updater = MatchUpdater()
     try:
-        result = updater.add_countries()
+        result = await run_in_threadpool(updater.add_countries)
         return {
             "status": "success",
             "message": (
@@ -205,7 +264,7 @@ async def update_match_statistics(req: UpdateStatisticsRequest, request: Request
     await validate_admin(request)
     updater = StatisticsUpdater()
     try:
-        success = updater.update_match_statistics(req.fixture_id, full_update=True)
+        success = await run_in_threadpool(updater.update_match_statistics, req.fixture_id, full_update=True)
         if success:
             return {"status": "success", "message": f"Updated statistics for fixture {req.fixture_id}"}
         else:
@@ -218,7 +277,7 @@ async def update_match_lineups(req: UpdateStatisticsRequest, request: Request):
     await validate_admin(request)
     updater = LineupsUpdater()
     try:
-        success = updater.update_match_lineups(req.fixture_id, full_update=True)
+        success = await run_in_threadpool(updater.update_match_lineups, req.fixture_id, full_update=True)
         if success:
             return {"status": "success", "message": f"Updated lineups for fixture {req.fixture_id}"}
         else:
@@ -231,7 +290,7 @@ async def update_match_events(req: UpdateStatisticsRequest, request: Request):
     await validate_admin(request)
     updater = EventsUpdater()
     try:
-        success = updater.update_match_events(req.fixture_id, full_update=True)
+        success = await run_in_threadpool(updater.update_match_events, req.fixture_id, full_update=True)
         if success:
             return {"status": "success", "message": f"Updated events for fixture {req.fixture_id}"}
         else:
@@ -243,12 +302,36 @@ async def update_match_events(req: UpdateStatisticsRequest, request: Request):
 async def check_available_seasons(request: Request):
     logger.info("POST request received for check_available_seasons")
     await validate_admin(request)
-    updater = MatchUpdater()
+    return enqueue_job("check_available_seasons", {}, "Available seasons check queued for all leagues")
+
+@app.post("/ensure_indexes/")
+async def ensure_indexes_endpoint(request: Request):
+    """Create missing indexes on the MegaGoal collections, then report hot queries still doing a COLLSCAN"""
+    await validate_admin(request)
     try:
-        updater.check_and_update_available_seasons()
-        return {"status": "success", "message": "Available seasons checked and updated for all leagues"}
+        created = await run_in_threadpool(ensure_indexes)
+        verification = await run_in_threadpool(verify_indexes)
+        return {
+            "status": "success",
+            "message": f"Indexes ensured; {len(verification['collscans'])} hot queries still do a COLLSCAN",
+            "indexes": created,
+            "verification": verification
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/verify_indexes/")
+async def verify_indexes_endpoint(request: Request):
+    """Report hot queries whose winning plan is a COLLSCAN"""
+    await validate_admin(request)
+    try:
+        verification = await run_in_threadpool(verify_indexes)
+        return {
+            "status": "success",
+            "message": f"{len(verification['collscans'])} hot queries still do a COLLSCAN",
+            "verification": verification
+        }
     except Exception as e:
-        logger.error(f"Error in check_available_seasons: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/update_league_standings/")
@@ -256,7 +339,7 @@ async def update_league_standings(req: UpdateRequest, request: Request):
     await validate_admin(request)
     updater = StandingsUpdater()
     try:
-        ok = updater.update_standings_by_league_and_season(req.league_id, req.season)
+        ok = await run_in_threadpool(updater.update_standings_by_league_and_season, req.league_id, req.season)
         if ok:
             return {
                 "status": "success",
@@ -274,7 +357,7 @@ async def update_teams(req: UpdateRequest, request: Request):
     await validate_admin(request)
     updater = MatchUpdater()
     try:
-        updater.update_teams_by_league_and_season(req.league_id, req.season)
+        await run_in_threadpool(updater.update_teams_by_league_and_season, req.league_id, req.season)
         return {"status": "success", "message": f"Updated teams for league {req.league_id} in season {req.season}"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -284,7 +367,7 @@ async def move_league_position(req: MovePositionRequest, request: Request):
     await validate_admin(request)
     updater = MatchUpdater()
     try:
-        success = updater.move_league_position(req.league_id, req.direction)
+        success = await run_in_threadpool(updater.move_league_position, req.league_id, req.direction)
         if success:
             return {"status": "success", "message": f"Moved league {req.league_id} {req.direction}"}
         else:
@@ -297,7 +380,7 @@ async def change_league_position(req: ChangePositionRequest, request: Request):
     await validate_admin(request)
     updater = MatchUpdater()
     try:
-        success = updater.change_league_position(req.league_id, req.new_position)
+        success = await run_in_threadpool(updater.change_league_position, req.league_id, req.new_position)
         if success:
             return {"status": "success", "message": f"Changed league {req.league_id} to position {req.new_position}"}
         else:
@@ -310,17 +393,26 @@ async def update_players(req: UpdatePlayersRequest, request: Request):
     await validate_admin(request)
     updater = PlayersUpdater()
     try:
-        result = updater.update_players_by_page(req.page)
+        result = await run_in_threadpool(updater.update_players_by_page, req.page)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/crawl_player_profiles/")
+async def crawl_player_profiles(req: CrawlPlayerProfilesRequest, request: Request):
+    """Queue a crawl of every /players/profiles page not searched yet (one crawl at a time)"""
+    await validate_admin(request)
+    active_job = job_worker_pool.queue.find_active("crawl_player_profiles")
+    if active_job:
+        return {"status": active_job["status"], "message": "Player profiles crawl already in progress", "job_id": active_job["_id"]}
+    return enqueue_job("crawl_player_profiles", dict(req), "Player profiles crawl queued")
+
 @app.post("/update_player_teams/")
 async def update_player_teams(req: UpdatePlayerTeamsRequest, request: Request):
     await validate_admin(request)
     updater = PlayersUpdater()
     try:
-        success = updater.update_player_teams(req.player_id)
+        success = await run_in_threadpool(updater.update_player_teams, req.player_id)
         if success:
             return {"status": "success", "message": f"Updated teams for player {req.player_id}"}
         else:
@@ -331,212 +423,66 @@ async def update_player_teams(req: UpdatePlayerTeamsRequest, request: Request):
 @app.post("/update_league_players/")
 async def update_league_players(req: UpdateLeaguePlayersRequest, request: Request):
     await validate_admin(request)
-    updater = PlayersUpdater()
-    try:
-        player_count = updater.update_players_by_league_and_season(req.league_id, req.season)
-        return {
-            "status": "success", 
-            "message": f"Updated {player_count} players for league {req.league_id}, season {req.season}",
-            "players_count": player_count
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return enqueue_job("update_league_players", dict(req), f"Players update queued for league {req.league_id}, season {req.season}")
 
 @app.post("/update_league_lineups/")
 async def update_league_lineups(req: UpdateLeagueLineupsRequest, request: Request):
     await validate_admin(request)
-    updater = LineupsUpdater()
-    try:
-        lineup_count = updater.update_lineups_by_league_and_season_full(req.league_id, req.season)
-        return {
-            "status": "success", 
-            "message": f"Updated {lineup_count} lineups for league {req.league_id}, season {req.season}",
-            "lineups_count": lineup_count
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return enqueue_job("update_league_lineups", dict(req), f"Lineups update queued for league {req.league_id}, season {req.season}")
 
 @app.post("/update_league_lineups_missing/")
 async def update_league_lineups_missing(req: UpdateLeagueLineupsRequest, request: Request):
     await validate_admin(request)
-    updater = LineupsUpdater()
-    try:
-        lineup_count = updater.update_lineups_by_league_and_season_missing(req.league_id, req.season)
-        return {
-            "status": "success", 
-            "message": f"Updated {lineup_count} missing lineups for league {req.league_id}, season {req.season}",
-            "lineups_count": lineup_count
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return enqueue_job("update_league_lineups_missing", dict(req), f"Missing lineups update queued for league {req.league_id}, season {req.season}")
 
 @app.post("/update_league_events/")
 async def update_league_events(req: UpdateLeagueEventsRequest, request: Request):
     await validate_admin(request)
-    updater = EventsUpdater()
-    try:
-        events_count = updater.update_events_by_league_and_season_full(req.league_id, req.season)
-        return {
-            "status": "success", 
-            "message": f"Updated {events_count} events for league {req.league_id}, season {req.season}",
-            "events_count": events_count
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return enqueue_job("update_league_events", dict(req), f"Events update queued for league {req.league_id}, season {req.season}")
 
 @app.post("/update_league_events_missing/")
 async def update_league_events_missing(req: UpdateLeagueEventsRequest, request: Request):
     await validate_admin(request)
-    updater = EventsUpdater()
-    try:
-        events_count = updater.update_events_by_league_and_season_missing(req.league_id, req.season)
-        return {
-            "status": "success", 
-            "message": f"Updated {events_count} missing events for league {req.league_id}, season {req.season}",
-            "events_count": events_count
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return enqueue_job("update_league_events_missing", dict(req), f"Missing events update queued for league {req.league_id}, season {req.season}")
 
 @app.post("/update_league_statistics/")
 async def update_league_statistics(req: UpdateLeagueStatisticsRequest, request: Request):
     await validate_admin(request)
-    updater = StatisticsUpdater()
-    try:
-        statistics_count = updater.update_statistics_by_league_and_season_full(req.league_id, req.season)
-        return {
-            "status": "success", 
-            "message": f"Updated {statistics_count} statistics for league {req.league_id}, season {req.season}",
-            "statistics_count": statistics_count
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return enqueue_job("update_league_statistics", dict(req), f"Statistics update queued for league {req.league_id}, season {req.season}")
 
 @app.post("/update_league_statistics_missing/")
 async def update_league_statistics_missing(req: UpdateLeagueStatisticsRequest, request: Request):
     await validate_admin(request)
-    updater = StatisticsUpdater()
-    try:
-        statistics_count = updater.update_statistics_by_league_and_season_missing(req.league_id, req.season)
-        return {
-            "status": "success", 
-            "message": f"Updated {statistics_count} missing statistics for league {req.league_id}, season {req.season}",
-            "statistics_count": statistics_count
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return enqueue_job("update_league_statistics_missing", dict(req), f"Missing statistics update queued for league {req.league_id}, season {req.season}")
+
+@app.post("/update_league_details/")
+async def update_league_details(req: UpdateLeagueDetailsRequest, request: Request):
+    await validate_admin(request)
+    return enqueue_job("update_league_details", dict(req), f"Statistics, lineups and events update queued for league {req.league_id}, season {req.season}")
+
+@app.post("/update_league_details_missing/")
+async def update_league_details_missing(req: UpdateLeagueDetailsRequest, request: Request):
+    await validate_admin(request)
+    return enqueue_job("update_league_details_missing", dict(req), f"Missing statistics, lineups and events update queued for league {req.league_id}, season {req.season}")
 
 @app.post("/multi_season_update/")
 async def multi_season_update(req: MultiSeasonUpdateRequest, request: Request):
     await validate_admin(request)
-    
-    logger.info(f"Starting multi-season update for league {req.league_id} from season {req.season_from} to {req.season_to}")
-    logger.info(f"Update options: matches={req.update_matches}, teams={req.update_teams}, players={req.update_players}, statistics={req.update_statistics}, statistics_missing={req.update_statistics_missing}, lineups={req.update_lineups}, lineups_missing={req.update_lineups_missing}, events={req.update_events}, events_missing={req.update_events_missing}, standings={req.update_standings}")
-    
-    results = {
-        "league_id": req.league_id,
-        "season_from": req.season_from,
-        "season_to": req.season_to,
-        "seasons_processed": [],
-        "total_updates": {
-            "matches": 0,
-            "teams": 0,
-            "players": 0,
-            "statistics": 0,
-            "statistics_missing": 0,
-            "lineups": 0,
-            "lineups_missing": 0,
-            "events": 0,
-            "events_missing": 0,
-            "standings": 0
-        }
-    }
-    
-    try:
-        # Process each season from season_from to season_to
-        for season in range(req.season_from, req.season_to + 1):
-            season_result = {"season": season, "updates": {}}
-            
-            # Update matches
-            if req.update_matches:
-                updater = MatchUpdater()
-                updater.update_league_matches(req.league_id, season, full=False)
-                season_result["updates"]["matches"] = "completed"
-                results["total_updates"]["matches"] += 1
-            
-            # Update teams
-            if req.update_teams:
-                updater = MatchUpdater()
-                updater.update_teams_by_league_and_season(req.league_id, season)
-                season_result["updates"]["teams"] = "completed"
-                results["total_updates"]["teams"] += 1
-            
-            # Update players
-            if req.update_players:
-                updater = PlayersUpdater()
-                updater.update_players_by_league_and_season(req.league_id, season)
-                season_result["updates"]["players"] = "completed"
-                results["total_updates"]["players"] += 1
-            
-            # Update statistics (full)
-            if req.update_statistics:
-                updater = StatisticsUpdater()
-                updater.update_statistics_by_league_and_season_full(req.league_id, season)
-                season_result["updates"]["statistics"] = "completed"
-                results["total_updates"]["statistics"] += 1
-            
-            # Update statistics (missing only)
-            if req.update_statistics_missing:
-                updater = StatisticsUpdater()
-                updater.update_statistics_by_league_and_season_missing(req.league_id, season)
-                season_result["updates"]["statistics_missing"] = "completed"
-                results["total_updates"]["statistics_missing"] += 1
-            
-            # Update lineups (full)
-            if req.update_lineups:
-                updater = LineupsUpdater()
-                updater.update_lineups_by_league_and_season_full(req.league_id, season)
-                season_result["updates"]["lineups"] = "completed"
-                results["total_updates"]["lineups"] += 1
-            
-            # Update lineups (missing only)
-            if req.update_lineups_missing:
-                updater = LineupsUpdater()
-                updater.update_lineups_by_league_and_season_missing(req.league_id, season)
-                season_result["updates"]["lineups_missing"] = "completed"
-                results["total_updates"]["lineups_missing"] += 1
-            
-            # Update events (full)
-            if req.update_events:
-                updater = EventsUpdater()
-                updater.update_events_by_league_and_season_full(req.league_id, season)
-                season_result["updates"]["events"] = "completed"
-                results["total_updates"]["events"] += 1
-            
-            # Update events (missing only)
-            if req.update_events_missing:
-                updater = EventsUpdater()
-                updater.update_events_by_league_and_season_missing(req.league_id, season)
-                season_result["updates"]["events_missing"] = "completed"
-                results["total_updates"]["events_missing"] += 1
-            
-            if req.update_standings:
-                updater = StandingsUpdater()
-                updater.update_standings_by_league_and_season(req.league_id, season)
-                season_result["updates"]["standings"] = "completed"
-                results["total_updates"]["standings"] += 1
-            
-            results["seasons_processed"].append(season_result)
-            logger.info(f"Season {season} processing completed for league {req.league_id}")
-        
-        logger.info(f"Multi-season update completed successfully for league {req.league_id}")
-        logger.info(f"Total updates performed: {results['total_updates']}")
-        
-        return {
-            "status": "success",
-            "message": f"Multi-season update completed for league {req.league_id} from season {req.season_from} to {req.season_to}",
-            "results": results
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+    return enqueue_job("multi_season_update", dict(req), f"Multi-season update queued for league {req.league_id} from season {req.season_from} to {req.season_to}")
+
+@app.post("/rebuild_player_appearances/")
+async def rebuild_player_appearances(req: RebuildPlayerAppearancesRequest, request: Request):
+    """Rebuild player_appearances from the stored lineups and events (all fixtures, or one league and/or season)"""
+    await validate_admin(request)
+    scope = " ".join(part for part in (
+        f"league {req.league_id}" if req.league_id is not None else "",
+        f"season {req.season}" if req.season is not None else ""
+    ) if part) or "all fixtures"
+    return enqueue_job("rebuild_player_appearances", dict(req), f"Player appearances rebuild queued for {scope}")
+
+@app.post("/rebuild_user_stats/")
+async def rebuild_user_stats(req: RebuildUserStatsRequest, request: Request):
+    """Rebuild user_stats from the users' matches (all users, or one username)"""
+    await validate_admin(request)
+    scope = f"user {req.username}" if req.username is not None else "all users"
+    return enqueue_job("rebuild_user_stats", dict(req), f"User stats rebuild queued for {scope}")
@@ -0,0 +1,151 @@
+"""Incremental updates of the materialised `user_stats` documents (`_id` = username).
+
+The schema is defined by Stats (Stats/api/user_stats.py, build_user_stats); _counters and
+build_user_stats below must produce exactly its counters.
+
+The Server applies matches added or removed by a user; the Updater applies the score changes it
+writes into users' matches. Stats builds a missing document from `matches` on the first read,
+so the increments never create documents. UserStatsRebuilder recomputes documents from
+`matches` (nightly and through the rebuild_user_stats job) to reconcile increments that were
+lost, e.g. a match added while Stats was building the user's first document.
+"""
+
+import datetime
+from collections import Counter
+from pymongo import UpdateOne
+from .config import Config
+
+USER_STATS_COLLECTION = "user_stats"
+
+# Fields of a user's match that feed user_stats
+USER_STATS_MATCH_PROJECTION = {
+    "user.username": 1,
+    "fixture.id": 1,
+    "fixture.timestamp": 1,
+    "league.id": 1,
+    "league.name": 1,
+    "league.season": 1,
+    "teams.home.id": 1,
+    "teams.home.name": 1,
+    "teams.away.id": 1,
+    "teams.away.name": 1,
+    "goals.home": 1,
+    "goals.away": 1,
+}
+
+
+def _counters(match, goals):
+    """Counters a match with the given score adds to user_stats (empty without a score)"""
+    if goals.get("home") is None or goals.get("away") is None:
+        return Counter()
+    home_id = match["teams"]["home"]["id"]
+    away_id = match["teams"]["away"]["id"]
+    day = datetime.datetime.fromtimestamp(match["fixture"]["timestamp"], datetime.timezone.utc).strftime("%Y-%m-%d")
+    return Counter({
+        "total_matches": 1,
+        "total_goals": goals["home"] + goals["away"],
+        f"seasons.{match['league']['season']}": 1,
+        f"days.{day}": 1,
+        f"teams.{home_id}.matches": 1,
+        f"teams.{home_id}.goals": goals["home"],
+        f"teams.{away_id}.matches": 1,
+        f"teams.{away_id}.goals": goals["away"],
+        f"leagues.{match['league']['id']}.matches": 1,
+    })
+
+
+def score_change_update(match, new_goals):
+    """UpdateOne moving a user's match (read with USER_STATS_MATCH_PROJECTION) from its stored
+    score to new_goals in the user's stats, or None when that changes no counter"""
+    old_counters = _counters(match, match.get("goals") or {})
+    new_counters = _counters(match, new_goals)
+    increments = {
+        key: new_counters.get(key, 0) - old_counters.get(key, 0)
+        for key in set(old_counters) | set(new_counters)
+    }
+    increments = {key: value for key, value in increments.items() if value != 0}
+    if not increments:
+        return None
+
+    update = {"$inc": increments, "$currentDate": {"updated_at": True}}
+    if not old_counters:
+        # The match starts counting (first score): record the names as the Server does on add
+        update["$set"] = {
+            f"teams.{match['teams']['home']['id']}.name": match["teams"]["home"]["name"],
+            f"teams.{match['teams']['away']['id']}.name": match["teams"]["away"]["name"],
+            f"leagues.{match['league']['id']}.name": match["league"]["name"],
+        }
+    return UpdateOne({"_id": match["user"]["username"]}, update)
+
+
+def _scored_matches_query(username):
+    return {
+        "user.username": username,
+        "goals.home": {"$exists": True, "$ne": None},
+        "goals.away": {"$exists": True, "$ne": None},
+    }
+
+
+def build_user_stats(username, matches):
+    """user_stats document of a user from all their scored matches, same as Stats builds it"""
+    teams = {}
+    # Home sides first, then away sides, so ties keep the order Stats reads them in
+    for side in ("home", "away"):
+        for match in matches:
+            team = match["teams"][side]
+            entry = teams.setdefault(str(team["id"]), {"name": team["name"], "matches": 0, "goals": 0})
+            entry["matches"] += 1
+            entry["goals"] += match["goals"][side]
+
+    leagues = {}
+    seasons = Counter()
+    days = Counter()
+    for match in matches:
+        league = leagues.setdefault(str(match["league"]["id"]), {"name": match["league"]["name"], "matches": 0})
+        league["matches"] += 1
+        seasons[str(match["league"]["season"])] += 1
+        days[datetime.datetime.fromtimestamp(match["fixture"]["timestamp"], datetime.timezone.utc).strftime("%Y-%m-%d")] += 1
+
+    return {
+        "_id": username,
+        "total_matches": len(matches),
+        "total_goals": sum(match["goals"]["home"] + match["goals"]["away"] for match in matches),
+        "seasons": dict(seasons),
+        "days": dict(days),
+        "teams": teams,
+        "leagues": leagues,
+        "updated_at": datetime.datetime.now(datetime.timezone.utc),
+    }
+
+
+class UserStatsRebuilder:
+    """Recomputes user_stats documents from the users' matches"""
+
+    def __init__(self):
+        self.db = Config.get_database()
+        self.collection_matches = self.db["matches"]
+        self.collection_user_stats = self.db[USER_STATS_COLLECTION]
+
+    def rebuild_user(self, username):
+        matches = list(self.collection_matches.find(_scored_matches_query(username), USER_STATS_MATCH_PROJECTION))
+        self.collection_user_stats.replace_one({"_id": username}, build_user_stats(username, matches), upsert=True)
+
+    def rebuild(self, username=None, progress=None):
+        """Rebuild the document of one user, or of every user with matches. Documents of users
+        without matches left are rebuilt empty as well"""
+        if username is not None:
+            usernames = [username]
+        else:
+            usernames = sorted(self.collection_matches.distinct("user.username"))
+            usernames.extend(
+                user_stats["_id"]
+                for user_stats in self.collection_user_stats.find({"_id": {"$nin": usernames}}, {"_id": 1})
+            )
+
+        for users_done, name in enumerate(usernames, start=1):
+            self.rebuild_user(name)
+            if progress is not None:
+                progress(users_done=users_done, users_total=len(usernames))
+
+        print(f"Rebuilt user_stats of {len(usernames)} users")
+        return {"users": len(usernames)}
@@ -1,8 +1,10 @@
-import http.client
-import json
 import datetime
-import time
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateMany, UpdateOne
 from .config import Config
+from .api_client import get_api_client
+from .fingerprint import FINGERPRINTS_FIELD, fingerprint_field, payload_fingerprint
+from .user_stats import USER_STATS_COLLECTION, USER_STATS_MATCH_PROJECTION, score_change_update
 
 class MatchUpdater:
     """Shared utilities for match updating operations"""
@@ -16,86 +18,11 @@ class MatchUpdater:
         self.collection_teams = self.db['teams']
         self.collection_players = self.db['players']
         self.collection_countries = self.db['countries']
-        self.headers = Config.get_api_headers()
-        self.url = Config.RAPIDAPI_HOST
+        self.api_client = get_api_client()
 
     def _make_api_request_with_retry(self, endpoint, max_retries=5, retry_delay=5):
-        """Make an API request with rate limit retry logic
-        
-        Args:
-            endpoint: The API endpoint to call
-            max_retries: Maximum number of retries (default: 5)
-            retry_delay: Delay in seconds between retries (default: 5)
-        
-        Returns:
-            dict: The JSON response from the API
-        
-        Raises:
-            Exception: If all retries are exhausted or if there's a non-rate-limit error
-        """
-        for attempt in range(max_retries):
-            try:
-                conn = http.client.HTTPSConnection(self.url)
-                conn.request("GET", endpoint, headers=self.headers)
-                response = conn.getresponse()
-                response_data = response.read()
-                
-                # Parse JSON response
-                try:
-                    json_response = json.loads(response_data)
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, check if it's a rate limit error in the raw response
-                    response_text = response_data.decode('utf-8', errors='ignore')
-                    if "rateLimit" in response_text or "Too many requests" in response_text:
-                        if attempt < max_retries - 1:
-                            print(f"Rate limit detected (attempt {attempt + 1}/{max_retries}). Waiting {retry_delay} seconds before retry...")
-                            time.sleep(retry_delay)
-                            continue
-                        else:
-                            raise Exception(f"Rate limit exceeded after {max_retries} attempts")
-                    else:
-                        raise Exception(f"Invalid JSON response: {response_text[:200]}")
-                
-                # Check for errors in the JSON response
-                if "errors" in json_response:
-                    errors = json_response.get("errors", {})
-                    
-                    # Check if it's a rate limit error (retry)
-                    if "rateLimit" in errors:
-                        if attempt < max_retries - 1:
-                            rate_limit_msg = errors.get("rateLimit", "Rate limit exceeded")
-                            print(f"Rate limit detected: {rate_limit_msg} (attempt {attempt + 1}/{max_retries}). Waiting {retry_delay} seconds before retry...")
-                            time.sleep(retry_delay)
-                            continue
-                        else:
-                            raise Exception(f"Rate limit exceeded after {max_retries} attempts: {errors.get('rateLimit', 'Unknown error')}")
-                    
-                    # Check if there are any other errors (don't retry, raise immediately)
-                    if errors:
-                        error_messages = []
-                        for key, value in errors.items():
-                            if isinstance(value, str):
-                                error_messages.append(f"{key}: {value}")
-                            else:
-                                error_messages.append(f"{key}: {json.dumps(value)}")
-                        
-                        error_str = "; ".join(error_messages)
-                        print(f"API error detected: {error_str}")
-                        raise Exception(f"API returned errors: {error_str}")
-                
-                # Success - return the response
-                return json_response
-                
-            except Exception as e:
-                # If it's the last attempt, raise the exception
-                if attempt == max_retries - 1:
-                    raise
-                # For other errors, wait and retry
-                print(f"API request failed (attempt {attempt + 1}/{max_retries}): {str(e)}. Waiting {retry_delay} seconds before retry...")
-                time.sleep(retry_delay)
-        
-        # This should never be reached, but just in case
-        raise Exception(f"Failed to make API request after {max_retries} attempts")
+        """Make an API request through the shared pooled client (see ApiFootballClient.request)"""
+        return self.api_client.request(endpoint, max_retries=max_retries, retry_delay=retry_delay)
 
     def league_exists(self, league_id):
         """Check if league exists in database"""
@@ -106,14 +33,15 @@ class MatchUpdater:
             return False, None
         
     def add_leagues_to_db(self, leagues):
-        """Add leagues to database"""
-        for i in range(len(leagues["response"])):
-            exists, league = self.league_exists(leagues["response"][i]["league"]["id"])
-            if exists:
-                query_filter = { "league.id" : int(league["league"]["id"]) }
-                self.collection_leagues.replace_one(query_filter, leagues["response"][i])
-            else:
-                self.collection_leagues.insert_one(leagues["response"][i])
+        """Add or replace leagues in database with one bulk_write of upserts"""
+        operations = [
+            ReplaceOne({"league.id": int(league["league"]["id"])}, league, upsert=True)
+            for league in leagues.get("response", [])
+        ]
+        if not operations:
+            return
+        result = self.collection_leagues.bulk_write(operations, ordered=False)
+        print(f"Leagues synced: {result.upserted_count} inserted, {result.matched_count} replaced")
         
     def get_leagues_from_api(self):
         endpoint = f"/leagues"
@@ -196,28 +124,30 @@ class MatchUpdater:
     # lineups, *_checked, usernames, etc.) is enriched separately and must be preserved.
     FIXTURE_API_FIELDS = ("fixture", "league", "teams", "goals", "score")
 
-    def update_real_match(self, match):
-        """Update real_match fixture data without overwriting enriched fields."""
-        query_filter = {"fixture.id": match["fixture"]["id"]}
-        update_fields = {
+    # Compare-and-set rounds of _write_user_match_scores before giving up on a busy fixture
+    SCORE_WRITE_ATTEMPTS = 3
+    # Id of the last score write of a user's match, to tell which compare-and-sets went through
+    SCORE_WRITE_FIELD = "score_write_id"
+
+    def fixture_fingerprint(self, match):
+        """Fingerprint of the FIXTURE_API_FIELDS of an API fixture"""
+        return payload_fingerprint({
             field: match[field]
             for field in self.FIXTURE_API_FIELDS
             if field in match
+        })
+
+    def get_stored_fingerprints(self, fixture_ids, name):
+        """Map fixture id -> stored fingerprint `name` (None when never written)"""
+        stored = self.collection_real_matches.find(
+            {"fixture.id": {"$in": list(fixture_ids)}},
+            {"fixture.id": 1, FINGERPRINTS_FIELD: 1}
+        )
+        return {
+            real_match["fixture"]["id"]: real_match.get(FINGERPRINTS_FIELD, {}).get(name)
+            for real_match in stored
         }
-        self.collection_real_matches.update_one(query_filter, {"$set": update_fields})
-    
-    def update_matches(self, match):
-        """Update matches in database"""
-        query_filter = {"fixture.id": match["fixture"]["id"]}
-        query_projection = {
-            "$set": {
-                "goals.home": match["goals"]["home"],
-                "goals.away": match["goals"]["away"],
-                "status": match["fixture"]["status"]["short"]
-            }
-        }
-        self.collection_matches.update_many(query_filter, query_projection)
-    
+
     def get_matches_from_api(self, league_id, season, date=None, date_to=None):
         """Get matches from API"""
         season = str(season)
@@ -236,16 +166,151 @@ class MatchUpdater:
         
         return self._make_api_request_with_retry(endpoint)
     
-    def add_real_matches(self, json_real_matches):
-        """Add or update real matches in database"""
-        for match in json_real_matches["response"]:
-            exists, real_match = self.real_match_exists(match["fixture"]["id"])
-            if exists:
-                if not self.real_match_finished(real_match):
-                    self.update_real_match(match)
-                    self.update_matches(match)
+    def _real_match_upsert_operation(self, match, fingerprint):
+        """Build the upsert for one API fixture.
+
+        New fixtures are inserted with the full API payload. Existing fixtures that are not
+        finished get their FIXTURE_API_FIELDS replaced; finished ones are left untouched.
+        The finished check runs inside the update pipeline, so no prior read is needed.
+        The fixture fingerprint is recorded in every case.
+        """
+        finished_statuses = Config.get_finished_match_status_array()
+        update_fields = {
+            field: match[field]
+            for field in self.FIXTURE_API_FIELDS
+            if field in match
+        }
+        # An upserted document only holds the filter fields, so a missing league means "new"
+        is_new = {"$eq": [{"$type": "$league"}, "missing"]}
+        is_finished = {"$in": [{"$ifNull": ["$fixture.status.short", None]}, finished_statuses]}
+        return UpdateOne(
+            {"fixture.id": match["fixture"]["id"]},
+            [{"$replaceWith": {"$cond": [
+                is_new,
+                {"$mergeObjects": ["$$ROOT", {"$literal": match}]},
+                {"$cond": [
+                    is_finished,
+                    "$$ROOT",
+                    {"$mergeObjects": ["$$ROOT", {"$literal": update_fields}]}
+                ]}
+            ]}}, {"$set": {fingerprint_field("fixture"): fingerprint}}],
+            upsert=True
+        )
+
+    def _matches_status_operation(self, match):
+        """Build the status update of users' matches for one API fixture, skipping finished ones"""
+        return UpdateMany(
+            {
+                "fixture.id": match["fixture"]["id"],
+                "status": {"$nin": Config.get_finished_match_status_array()}
+            },
+            {"$set": {"status": match["fixture"]["status"]["short"]}}
+        )
+
+    @staticmethod
+    def _score(goals):
+        goals = goals or {}
+        return goals.get("home"), goals.get("away")
+
+    def _write_user_match_scores(self, fixtures):
+        """Write the scores of the fixtures into users' unfinished matches and apply each change to
+        the user's stats.
+
+        The matches are written in one bulk_write of compare-and-set updates on the score they were
+        read with, each tagged with this round's SCORE_WRITE_FIELD, and user_stats deltas are only
+        applied for the writes that went through, so concurrent writers (the scheduler and an API
+        job on the same fixture) never count a score change twice. Only the matches whose score
+        moved in between are read again and retried."""
+        goals_by_fixture = {match["fixture"]["id"]: match["goals"] for match in fixtures}
+        finished = Config.get_finished_match_status_array()
+        query = {"fixture.id": {"$in": list(goals_by_fixture)}, "status": {"$nin": finished}}
+        for _ in range(self.SCORE_WRITE_ATTEMPTS):
+            pending = [
+                user_match for user_match in self.collection_matches.find(query, USER_STATS_MATCH_PROJECTION)
+                if self._score(user_match.get("goals")) != self._score(goals_by_fixture[user_match["fixture"]["id"]])
+            ]
+            if not pending:
+                return
+
+            write_id = ObjectId()
+            operations = []
+            for user_match in pending:
+                stored_home, stored_away = self._score(user_match.get("goals"))
+                new_goals = goals_by_fixture[user_match["fixture"]["id"]]
+                operations.append(UpdateOne(
+                    {
+                        "_id": user_match["_id"],
+                        "goals.home": stored_home,
+                        "goals.away": stored_away,
+                        "status": {"$nin": finished}
+                    },
+                    {"$set": {
+                        "goals.home": new_goals["home"],
+                        "goals.away": new_goals["away"],
+                        self.SCORE_WRITE_FIELD: write_id
+                    }}
+                ))
+            result = self.collection_matches.bulk_write(operations, ordered=False)
+
+            if result.modified_count == len(pending):
+                applied, retry_ids = pending, []
             else:
-                self.collection_real_matches.insert_one(match)
+                # Some compare-and-sets missed: the tag tells which writes went through
+                written_ids = {
+                    user_match["_id"] for user_match in self.collection_matches.find(
+                        {"_id": {"$in": [user_match["_id"] for user_match in pending]}, self.SCORE_WRITE_FIELD: write_id},
+                        {"_id": 1}
+                    )
+                }
+                applied = [user_match for user_match in pending if user_match["_id"] in written_ids]
+                retry_ids = [user_match["_id"] for user_match in pending if user_match["_id"] not in written_ids]
+
+            user_stats_operations = [
+                operation for operation in (
+                    score_change_update(user_match, goals_by_fixture[user_match["fixture"]["id"]])
+                    for user_match in applied
+                )
+                if operation is not None
+            ]
+            if user_stats_operations:
+                self.db[USER_STATS_COLLECTION].bulk_write(user_stats_operations, ordered=False)
+            if not retry_ids:
+                return
+            query = {"_id": {"$in": retry_ids}, "status": {"$nin": finished}}
+        print(f"Scores of some users' matches kept changing concurrently after {self.SCORE_WRITE_ATTEMPTS} attempts")
+
+    def add_real_matches(self, json_real_matches):
+        """Add or update real matches in database with one bulk write on real_matches and one on matches.
+
+        Fixtures whose fingerprint matches the stored one are not written at all. Score changes
+        of users' matches are applied to their user_stats documents. Returns the ids of the
+        fixtures that were new or changed.
+        """
+        fixtures = json_real_matches.get("response", [])
+        if not fixtures:
+            return []
+
+        fingerprints = {match["fixture"]["id"]: self.fixture_fingerprint(match) for match in fixtures}
+        stored_fingerprints = self.get_stored_fingerprints(fingerprints.keys(), "fixture")
+        changed = [
+            match for match in fixtures
+            if stored_fingerprints.get(match["fixture"]["id"]) != fingerprints[match["fixture"]["id"]]
+        ]
+        print(f"Fixtures changed: {len(changed)} of {len(fixtures)}")
+        if not changed:
+            return []
+
+        self.collection_real_matches.bulk_write(
+            [self._real_match_upsert_operation(match, fingerprints[match["fixture"]["id"]]) for match in changed],
+            ordered=False
+        )
+        # Scores first: the status update can finish a match, which freezes its score
+        self._write_user_match_scores(changed)
+        self.collection_matches.bulk_write(
+            [self._matches_status_operation(match) for match in changed],
+            ordered=False
+        )
+        return [match["fixture"]["id"] for match in changed]
     
     def update_league_last_update(self, league_id):
         """Update last_update field of the league settings"""
@@ -308,7 +373,12 @@ class MatchUpdater:
         self.update_available_season_with_matches(league_id, season, match_count)
 
         # Update statistics, events, and lineups if full update is requested
-        if full:
+        if full and Config.FIXTURE_HYDRATION:
+            # Lazy import to avoid circular dependency
+            from .hydration.updater import HydrationUpdater
+
+            HydrationUpdater().hydrate_by_league_and_season_missing(league_id, season)
+        elif full:
             # Lazy imports to avoid circular dependency
             from .statistics.updater import StatisticsUpdater
             from .events.updater import EventsUpdater
@@ -382,21 +452,84 @@ class MatchUpdater:
         # Log the update
         print(f"Updated {field_name} count for league {league_id}, season {season}: {count}")
 
+    @staticmethod
+    def _non_empty_array(field):
+        """Aggregation expression: true when field holds a non-empty array"""
+        return {"$cond": [{"$isArray": f"${field}"}, {"$gt": [{"$size": f"${field}"}, 0]}, False]}
+
+    def _count_real_matches_by_league_and_season(self, league_ids):
+        """Count real matches, and finished matches with statistics/events/lineups, for every
+        (league, season) of the given leagues in a single aggregation"""
+        finished_statuses = Config.get_finished_match_status_array()
+        is_finished = {"$in": ["$fixture.status.short", finished_statuses]}
+        group = {
+            "_id": {"league": "$league.id", "season": "$league.season"},
+            "real_matches": {"$sum": 1}
+        }
+        for field in ("statistics", "events", "lineups"):
+            group[field] = {"$sum": {"$cond": [{"$and": [is_finished, self._non_empty_array(field)]}, 1, 0]}}
+
+        pipeline = [
+            {"$match": {"league.id": {"$in": league_ids}}},
+            {"$project": {"league.id": 1, "league.season": 1, "fixture.status.short": 1, "statistics": 1, "events": 1, "lineups": 1}},
+            {"$group": group}
+        ]
+        return {
+            (row["_id"]["league"], row["_id"]["season"]): row
+            for row in self.collection_real_matches.aggregate(pipeline, allowDiskUse=True)
+        }
+
+    def _count_teams_by_league_and_season(self, league_ids):
+        """Count teams for every (league, season) of the given leagues in a single aggregation.
+        Team seasons store league and season as strings."""
+        league_ids = [str(league_id) for league_id in league_ids]
+        pipeline = [
+            {"$match": {"seasons.league": {"$in": league_ids}}},
+            {"$project": {"seasons": 1}},
+            {"$unwind": "$seasons"},
+            {"$match": {"seasons.league": {"$in": league_ids}}},
+            {"$group": {
+                "_id": {"league": "$seasons.league", "season": "$seasons.season"},
+                "teams": {"$addToSet": "$_id"}
+            }}
+        ]
+        return {
+            (row["_id"]["league"], row["_id"]["season"]): len(row["teams"])
+            for row in self.collection_teams.aggregate(pipeline, allowDiskUse=True)
+        }
+
     def check_and_update_available_seasons(self):
-        """Check all leagues and update their available_seasons based on existing matches, teams, statistics, events, and lineups in the database. Removes seasons with no matches and preserves players count."""
-        # Get all league settings
-        all_settings = self.collection_settings.find()
-        
+        """Check all leagues and update their available_seasons based on existing matches, teams, statistics, events, and lineups in the database. Removes seasons with no matches and preserves players count.
+
+        All counts come from one aggregation over real_matches and one over teams, and the
+        results are written back with a single bulk write.
+        """
+        all_settings = list(self.collection_settings.find({}, {"league_id": 1, "available_seasons": 1}))
+        league_ids = [setting["league_id"] for setting in all_settings]
+        if not league_ids:
+            return
+
+        leagues = {
+            league["league"]["id"]: league
+            for league in self.collection_leagues.find(
+                {"league.id": {"$in": league_ids}},
+                {"league.id": 1, "seasons.year": 1}
+            )
+        }
+        print(f"Counting matches and teams for {len(league_ids)} leagues")
+        match_counts = self._count_real_matches_by_league_and_season(league_ids)
+        team_counts = self._count_teams_by_league_and_season(league_ids)
+
+        operations = []
         for setting in all_settings:
             league_id = setting["league_id"]
-            print(f"Checking league {league_id}")
-            
+
             # Get the corresponding league from collection_leagues
-            league = self.collection_leagues.find_one({"league.id": league_id})
+            league = leagues.get(league_id)
             if not league:
                 print(f"League {league_id} not found in collection_leagues")
                 continue
-            
+
             # Get existing available_seasons and filter out seasons with no real_matches
             existing_available_seasons = setting.get("available_seasons", [])
             # Remove seasons that have no real_matches (null, 0, or missing)
@@ -404,71 +537,31 @@ class MatchUpdater:
                 season_data for season_data in existing_available_seasons
                 if season_data.get("real_matches") is not None and season_data.get("real_matches", 0) > 0
             ]
-            print(f"Cleaned {len(existing_available_seasons) - len(cleaned_seasons)} seasons with no matches")
-            
+
             # Create a dictionary for quick lookup of existing seasons (preserving players)
             seasons_dict = {season_data.get("season"): season_data for season_data in cleaned_seasons}
-            
+
             # Check each season in the league
             for season_data in league.get("seasons", []):
                 season = season_data.get("year")
                 if not season:
                     continue
-                
-                print(f"Checking match count for league {league_id} and season {season}")
-                # Check if there are any matches for this league and season
-                match_count = self.collection_real_matches.count_documents({
-                    "league.id": league_id,
-                    "league.season": season
-                })
-                
+
+                counts = match_counts.get((league_id, season), {})
+                match_count = counts.get("real_matches", 0)
+
                 # Only process seasons that have matches
                 if match_count == 0:
-                    print(f"No matches found for league {league_id} and season {season}, skipping")
                     # Remove from seasons_dict if it exists
                     if season in seasons_dict:
                         del seasons_dict[season]
                     continue
-                
-                print(f"Checking team count for league {league_id} and season {season}")
-                # Check if there are any teams for this league and season
-                team_count = self.collection_teams.count_documents({
-                    "seasons": {
-                        "$elemMatch": {
-                            "league": str(league_id),
-                            "season": str(season)
-                        }
-                    }
-                })
-                
-                # Count finished matches with statistics data
-                print(f"Checking statistics count for league {league_id} and season {season}")
-                finished_statuses = Config.get_finished_match_status_array()
-                statistics_count = self.collection_real_matches.count_documents({
-                    "league.id": league_id,
-                    "league.season": season,
-                    "fixture.status.short": {"$in": finished_statuses},
-                    "statistics": {"$exists": True, "$ne": None, "$ne": []}
-                })
-                
-                # Count finished matches with events data
-                print(f"Checking events count for league {league_id} and season {season}")
-                events_count = self.collection_real_matches.count_documents({
-                    "league.id": league_id,
-                    "league.season": season,
-                    "fixture.status.short": {"$in": finished_statuses},
-                    "events": {"$exists": True, "$ne": None, "$ne": []}
-                })
-                
-                # Count finished matches with lineups data
-                print(f"Checking lineups count for league {league_id} and season {season}")
-                lineups_count = self.collection_real_matches.count_documents({
-                    "league.id": league_id,
-                    "league.season": season,
-                    "fixture.status.short": {"$in": finished_statuses},
-                    "lineups": {"$exists": True, "$ne": None, "$ne": []}
-                })
-                
+
+                team_count = team_counts.get((str(league_id), str(season)), 0)
+                statistics_count = counts.get("statistics", 0)
+                events_count = counts.get("events", 0)
+                lineups_count = counts.get("lineups", 0)
+
                 # Update or create season entry
                 if season in seasons_dict:
                     # Update existing season, preserve players count
@@ -496,20 +589,17 @@ class MatchUpdater:
                         "standings": False
                     }
 
-                print(f"Finished checking league {league_id} and season {season}")
-
             # Convert dictionary back to list
             available_seasons = list(seasons_dict.values())
-            
-            print(f"Finished checking league {league_id}")
-            
-            # Update the settings with the cleaned and updated available_seasons array
-            self.collection_settings.update_one(
+            operations.append(UpdateOne(
                 {"league_id": league_id},
                 {"$set": {"available_seasons": available_seasons}}
-            )
-            
-            print(f"Updated available_seasons for league {league_id}: {len(available_seasons)} seasons")
+            ))
+            print(f"Checked league {league_id}: {len(available_seasons)} seasons")
+
+        if operations:
+            self.collection_settings.bulk_write(operations, ordered=False)
+        print(f"Updated available_seasons for {len(operations)} leagues")
 
     def team_exists(self, team_id):
         """Check if team exists in database"""
@@ -530,27 +620,24 @@ class MatchUpdater:
             return json_team
 
     def add_teams_and_seasons(self, json_teams):
-        """Add a list of teams with the season"""
-        for i in range(len(json_teams["response"])):
-            team_data = json_teams["response"][i]
-            team_id = team_data["team"]["id"]
-            season_data = json_teams["parameters"]
-            
-            exists, existing_team = self.team_exists(team_id)
-            
-            if not exists:
-                # Team doesn't exist, insert with season
-                team_with_season = self.add_season(team_data, season_data)
-                self.collection_teams.insert_one(team_with_season)
-                print(f"Inserted new team {team_id} with season {season_data}")
-            else:
-                # Team exists, update seasons array
-                updated_team = self.add_season(existing_team, season_data)
-                self.collection_teams.update_one(
-                    {"_id": existing_team["_id"]}, 
-                    {"$set": {"seasons": updated_team["seasons"]}}
-                )
-                print(f"Updated existing team {team_id} with season {season_data}")
+        """Add a list of teams with the season in one bulk_write: new teams are inserted with the
+        API payload, and the season is added to every team's seasons with $addToSet"""
+        season_data = dict(json_teams["parameters"])
+        operations = [
+            UpdateOne(
+                {"team.id": team_data["team"]["id"]},
+                {
+                    "$setOnInsert": {field: value for field, value in team_data.items() if field != "seasons"},
+                    "$addToSet": {"seasons": season_data}
+                },
+                upsert=True
+            )
+            for team_data in json_teams.get("response", [])
+        ]
+        if not operations:
+            return
+        result = self.collection_teams.bulk_write(operations, ordered=False)
+        print(f"Teams with season {season_data}: {result.upserted_count} inserted, {result.matched_count} existing")
 
     def get_teams_from_api(self, league_id, season):
         """Get teams from API"""
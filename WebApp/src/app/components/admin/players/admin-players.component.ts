@@ -22,6 +22,7 @@ export class AdminPlayersComponent implements OnInit {
   // API Update properties
   pageInput: number = 1;
   isUpdatingPlayers: boolean = false;
+  isCrawlingPlayers: boolean = false;
   updateMessage: string = '';
   updateSuccess: boolean = false;
   
@@ -90,6 +91,39 @@ export class AdminPlayersComponent implements OnInit {
     });
   }
 
+  /**
+   * Crawl all players profiles pages not searched yet
+   */
+  crawlPlayerProfiles(): void {
+    this.isCrawlingPlayers = true;
+    this.updateMessage = '';
+
+    this.updaterService.crawlPlayerProfiles().subscribe({
+      next: (job: any) => {
+        const result = job.result;
+        this.updateMessage = `Crawled ${result.pages_crawled} pages (${result.players_written} players); ${result.pages_searched_count} of ${result.total_pages} pages searched`;
+        if (result.pages_failed.length > 0) {
+          this.updateMessage += `, failed pages: ${result.pages_failed.join(', ')}`;
+        }
+        this.updateSuccess = true;
+        this.isCrawlingPlayers = false;
+        this.loadPlayersApiInfo();
+      },
+      error: (error: any) => {
+        this.updateMessage = `Error crawling players: ${error.error?.detail || error.message}`;
+        this.updateSuccess = false;
+        this.isCrawlingPlayers = false;
+      }
+    });
+  }
+
+  /**
+   * Searched pages as "1-50, 60, 62-70"
+   */
+  formatPageRanges(ranges: [number, number][]): string {
+    return ranges.map(([first, last]) => first === last ? `${first}` : `${first}-${last}`).join(', ');
+  }
+
   /**
    * Load players from database with search and pagination
    */
@@ -1,6 +1,7 @@
 export interface PlayersApiInfo {
   type: string;
-  pages_searched: number[];
+  pages_searched_ranges: [number, number][];
+  pages_searched_count: number;
   total_pages: number;
   last_update: string;
 }
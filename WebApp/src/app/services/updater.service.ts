@@ -1,6 +1,7 @@
 import { Injectable } from '@angular/core';
 import { HttpClient, HttpHeaders } from '@angular/common/http';
-import { Observable } from 'rxjs';
+import { Observable, of, throwError, timer } from 'rxjs';
+import { exhaustMap, filter, switchMap, take } from 'rxjs/operators';
 import { environment } from '../../environments/environment';
 
 @Injectable({
@@ -15,17 +16,44 @@ export class UpdaterService {
     withCredentials: environment.production ? true : false
   };
 
+  jobPollInterval = 3000;
+
   constructor(private http: HttpClient) { }
 
+  /**
+   * Get status, progress and result of a background job
+   */
+  getJob(job_id: string): Observable<any> {
+    return this.http.get<any>(
+      this.url + '/jobs/' + job_id,
+      this.options
+    );
+  }
+
+  /**
+   * Long-running updates are queued as background jobs: poll the job until it finishes.
+   * Emits the completed job once, or errors with the job error if it failed.
+   */
+  private followJob(queued: Observable<any>): Observable<any> {
+    return queued.pipe(
+      switchMap(response => timer(0, this.jobPollInterval).pipe(
+        exhaustMap(() => this.getJob(response.job_id)),
+        filter(job => job.status === 'completed' || job.status === 'failed'),
+        take(1)
+      )),
+      switchMap(job => job.status === 'failed' ? throwError(() => new Error(job.error)) : of(job))
+    );
+  }
+
   /**
    * Trigger update of matches for a league and season
    */
   updateMatches(league_id: number, season: number): Observable<any> {
-    return this.http.post<any>(
+    return this.followJob(this.http.post<any>(
       this.url + '/update_matches/',
       { league_id, season },
       this.options
-    );
+    ));
   }
 
   /**
@@ -43,11 +71,11 @@ export class UpdaterService {
    * Trigger update of all leagues
    */
   updateLeagues(): Observable<any> {
-    return this.http.post<any>(
+    return this.followJob(this.http.post<any>(
       this.url + '/update_leagues/',
       {},
       this.options
-    );
+    ));
   }
 
   /**
@@ -65,11 +93,11 @@ export class UpdaterService {
    * Check and update available seasons for all leagues
    */
   checkAvailableSeasons(): Observable<any> {
-    return this.http.post<any>(
+    return this.followJob(this.http.post<any>(
       this.url + '/check_available_seasons/',
       {},
       this.options
-    );
+    ));
   }
 
   /**
@@ -160,6 +188,17 @@ export class UpdaterService {
     );
   }
 
+  /**
+   * Crawl every players profiles page not searched yet (background job)
+   */
+  crawlPlayerProfiles(): Observable<any> {
+    return this.followJob(this.http.post<any>(
+      this.url + '/crawl_player_profiles/',
+      {},
+      this.options
+    ));
+  }
+
   /**
    * Update teams for a specific player
    */
@@ -175,84 +214,84 @@ export class UpdaterService {
    * Update players for a league and season
    */
   updateLeaguePlayers(league_id: number, season: number): Observable<any> {
-    return this.http.post<any>(
+    return this.followJob(this.http.post<any>(
       this.url + '/update_league_players/',
       { league_id, season },
       this.options
-    );
+    ));
   }
 
   /**
    * Update lineups for a league and season
    */
   updateLeagueLineups(league_id: number, season: number): Observable<any> {
-    return this.http.post<any>(
+    return this.followJob(this.http.post<any>(
       this.url + '/update_league_lineups/',
       { league_id, season },
       this.options
-    );
+    ));
   }
 
   /**
    * Update events for a league and season
    */
   updateLeagueEvents(league_id: number, season: number): Observable<any> {
-    return this.http.post<any>(
+    return this.followJob(this.http.post<any>(
       this.url + '/update_league_events/',
       { league_id, season },
       this.options
-    );
+    ));
   }
 
   /**
    * Update statistics for a league and season (full)
    */
   updateLeagueStatistics(league_id: number, season: number): Observable<any> {
-    return this.http.post<any>(
+    return this.followJob(this.http.post<any>(
       this.url + '/update_league_statistics/',
       { league_id, season },
       this.options
-    );
+    ));
   }
 
   /**
    * Update statistics for a league and season (missing only)
    */
   updateLeagueStatisticsMissing(league_id: number, season: number): Observable<any> {
-    return this.http.post<any>(
+    return this.followJob(this.http.post<any>(
       this.url + '/update_league_statistics_missing/',
       { league_id, season },
       this.options
-    );
+    ));
   }
 
   /**
    * Update lineups for a league and season (missing only)
    */
   updateLeagueLineupsMissing(league_id: number, season: number): Observable<any> {
-    return this.http.post<any>(
+    return this.followJob(this.http.post<any>(
       this.url + '/update_league_lineups_missing/',
       { league_id, season },
       this.options
-    );
+    ));
   }
 
   /**
    * Update events for a league and season (missing only)
    */
   updateLeagueEventsMissing(league_id: number, season: number): Observable<any> {
-    return this.http.post<any>(
+    return this.followJob(this.http.post<any>(
       this.url + '/update_league_events_missing/',
       { league_id, season },
       this.options
-    );
+    ));
   }
 
   /**
    * Multi-season update for a league
    */
   multiSeasonUpdate(league_id: number, season_from: number, season_to: number, options: any): Observable<any> {
-    return this.http.post<any>(
+    return this.followJob(this.http.post<any>(
       this.url + '/multi_season_update/',
       { 
         league_id, 
@@ -270,6 +309,6 @@ export class UpdaterService {
         update_standings: options.standings
       },
       this.options
-    );
+    ));
   }
 } 
\ No newline at end of file